@@ -3,6 +3,7 @@ from aletheia.primitives import *
 from aletheia.retrieve import *
 from aletheia.signatures import *
 
+import aletheia.cache
 import aletheia.retrievers
 
 from aletheia.evaluate import Evaluate  # isort: skip
@@ -1,5 +1,10 @@
+import logging
+import threading
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Any, Optional, Type
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Optional, Type, Union
+
+from litellm import ContextWindowExceededError
 
 from aletheia.adapters.types import History
 from aletheia.signatures.signature import Signature
@@ -8,6 +13,14 @@ from aletheia.utils.callback import BaseCallback, with_callbacks
 if TYPE_CHECKING:
     from aletheia.clients.lm import LM
 
+logger = logging.getLogger(__name__)
+
+# The maximum number of compiled prompt prefixes kept by `Adapter._compiled_prefix`
+MAX_COMPILED_PREFIXES = 512
+
+_compiled_prefixes: "OrderedDict[tuple, tuple]" = OrderedDict()
+_compiled_prefixes_lock = threading.Lock()
+
 
 class Adapter(ABC):
     def __init__(self, callbacks: Optional[list[BaseCallback]] = None):
@@ -28,10 +41,146 @@ class Adapter(ABC):
         demos: list[dict[str, Any]],
         inputs: dict[str, Any],
     ) -> list[dict[str, Any]]:
+        inputs_ = self._format_lm_inputs(signature, demos, inputs, lm)
+        outputs = lm(**inputs_, **lm_kwargs)
+        return self._parse_lm_outputs(signature, outputs)
+
+    async def acall(
+        self,
+        lm: "LM",
+        lm_kwargs: dict[str, Any],
+        signature: Type[Signature],
+        demos: list[dict[str, Any]],
+        inputs: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        inputs_ = self._format_lm_inputs(signature, demos, inputs, lm)
+        outputs = await lm.acall(**inputs_, **lm_kwargs)
+        return self._parse_lm_outputs(signature, outputs)
+
+    def batch_call(
+        self,
+        lm: "LM",
+        lm_kwargs: dict[str, Any],
+        signature: Type[Signature],
+        demos: list[dict[str, Any]],
+        inputs_list: list[dict[str, Any]],
+        max_concurrency: Optional[int] = None,
+    ) -> list[Union[list[dict[str, Any]], Exception]]:
+        """
+        Formats a batch of inputs, sends them to the LM in bulk with `lm.batch_call`, and parses the outputs.
+
+        Returns:
+            For each inputs, in order, the list of parsed completions, or the exception raised while processing them.
+        """
+        results: list[Any] = [None] * len(inputs_list)
+        requests, indices = [], []
+
+        for i, inputs in enumerate(inputs_list):
+            try:
+                requests.append({**self._format_lm_inputs(signature, demos, inputs, lm), **lm_kwargs})
+                indices.append(i)
+            except Exception as e:
+                results[i] = e
+
+        for i, outputs in zip(indices, lm.batch_call(requests, max_concurrency=max_concurrency)):
+            if isinstance(outputs, Exception):
+                results[i] = outputs
+                continue
+            try:
+                results[i] = self._parse_lm_outputs(signature, outputs)
+            except Exception as e:
+                results[i] = e
+
+        return results
+
+    def _format_lm_inputs(
+        self,
+        signature: Type[Signature],
+        demos: list[dict[str, Any]],
+        inputs: dict[str, Any],
+        lm: Optional["LM"] = None,
+    ) -> dict[str, Any]:
+        """
+        Format the inputs into the prompt or messages of an LM request. If the context window of `lm` is known, the
+        prompt is checked against it before sending the request: the oldest conversation history turns, then the
+        last demos, are dropped until the prompt fits, and `ContextWindowExceededError` is raised if it can't fit.
+        """
+        # Imported here to avoid a circular import, as `aletheia.clients` depends on the adapters for finetuning.
+        from aletheia.clients.tokens import count_tokens, get_context_window
+
+        inputs_ = self._format_request(signature, demos, inputs)
+
+        model = getattr(lm, "model", None)
+        context_window = get_context_window(model) if isinstance(model, str) else None
+        if context_window is None:
+            return inputs_
+
+        history_field_name = next(
+            (name for name, field in signature.input_fields.items() if field.annotation == History), None
+        )
+        num_tokens = count_tokens(model, **inputs_)
+        dropped = 0
+        while num_tokens > context_window:
+            history = inputs.get(history_field_name) if history_field_name else None
+            if history is not None and history.messages:
+                inputs = {**inputs, history_field_name: History(messages=history.messages[1:])}
+            elif demos:
+                demos = demos[:-1]
+            else:
+                raise ContextWindowExceededError(
+                    message=f"The prompt has about {num_tokens} tokens, more than the {context_window} tokens of the "
+                    f"context window of {model}.",
+                    model=model,
+                    llm_provider=model.split("/", 1)[0] if "/" in model else "",
+                )
+
+            dropped += 1
+            inputs_ = self._format_request(signature, demos, inputs)
+            num_tokens = count_tokens(model, **inputs_)
+
+        if dropped:
+            logger.warning(
+                f"The prompt exceeded the {context_window} tokens of the context window of {model}: dropped {dropped} "
+                "conversation history turns or demos to fit it."
+            )
+        return inputs_
+
+    def _compiled_prefix(
+        self,
+        signature: Type[Signature],
+        demos: list[dict[str, Any]],
+        compile: Callable[[Type[Signature], list[dict[str, Any]]], list[dict[str, Any]]],
+    ) -> list[dict[str, Any]]:
+        """
+        Return the messages that only depend on the signature and the demos (e.g. the system message and the demo
+        turns), built by `compile` the first time they are needed and reused as long as the signature and the demo
+        objects are the same. Optimizers assign new signatures and demos rather than mutating them in place, which
+        invalidates the compiled messages.
+        """
+        key = (type(self), signature, tuple(id(demo) for demo in demos))
+        with _compiled_prefixes_lock:
+            entry = _compiled_prefixes.get(key)
+            if entry is not None:
+                _compiled_prefixes.move_to_end(key)
+
+        if entry is None:
+            # The entry holds the demos, so that their ids can't be reused by other objects while it's cached.
+            entry = (tuple(demos), compile(signature, demos))
+            with _compiled_prefixes_lock:
+                _compiled_prefixes[key] = entry
+                while len(_compiled_prefixes) > MAX_COMPILED_PREFIXES:
+                    _compiled_prefixes.popitem(last=False)
+
+        # The messages are copied so that callers can modify them without affecting the compiled prefix.
+        return [dict(message) for message in entry[1]]
+
+    def _format_request(
+        self, signature: Type[Signature], demos: list[dict[str, Any]], inputs: dict[str, Any]
+    ) -> dict[str, Any]:
         inputs_ = self.format(signature, demos, inputs)
-        inputs_ = dict(prompt=inputs_) if isinstance(inputs_, str) else dict(messages=inputs_)
+        return dict(prompt=inputs_) if isinstance(inputs_, str) else dict(messages=inputs_)
 
-        outputs = lm(**inputs_, **lm_kwargs)
+    def _parse_lm_outputs(self, signature: Type[Signature], outputs: list[Any]) -> list[dict[str, Any]]:
         values = []
 
         for output in outputs:
@@ -1,28 +1,35 @@
+import contextlib
 import enum
 import inspect
 import json
-import re
 import textwrap
-from collections.abc import Mapping
-from typing import Any, Dict, Literal, NamedTuple, Optional, Type
+import threading
+from collections import Counter
+from collections.abc import Iterable, Mapping
+from typing import Any, Dict, Literal, NamedTuple, Optional, Type, Union
 
-import pydantic
 from litellm import ContextWindowExceededError
 from pydantic.fields import FieldInfo
 
 from aletheia.adapters.base import Adapter
+from aletheia.adapters.field_parser import FieldParser, FieldStream, field_header_pattern  # noqa: F401
 from aletheia.adapters.json_adapter import JSONAdapter
 from aletheia.adapters.types.history import History
 from aletheia.adapters.types.image import try_expand_image_tags
-from aletheia.adapters.utils import format_field_value, get_annotation_name, parse_value
+from aletheia.adapters.utils import (
+    format_field_value,
+    get_annotation_name,
+    get_type_adapter,
+    parse_value,
+    repair_value,
+)
 from aletheia.clients.lm import LM
+from aletheia.dsp.utils.settings import settings
 from aletheia.signatures.field import OutputField
 from aletheia.signatures.signature import Signature, SignatureMeta
 from aletheia.signatures.utils import get_aletheia_field_type
 from aletheia.utils.callback import BaseCallback
 
-field_header_pattern = re.compile(r"\[\[ ## (\w+) ## \]\]")
-
 
 class FieldInfoWithName(NamedTuple):
     name: str
@@ -32,10 +39,32 @@ class FieldInfoWithName(NamedTuple):
 # Built-in field indicating that a chat turn has been completed.
 BuiltInCompletedOutputFieldInfo = FieldInfoWithName(name="completed", info=OutputField())
 
+# The paths by which the completions are parsed, counted in `ChatAdapter.stats`
+PARSE_PATHS = ("parsed", "fixed", "repaired", "fallback")
+
+_parse_stats = Counter()
+_parse_stats_lock = threading.Lock()
+
 
 class ChatAdapter(Adapter):
-    def __init__(self, callbacks: Optional[list[BaseCallback]] = None):
+    """
+    The default adapter, which formats the inputs and outputs of a signature as `[[ ## field ## ]]` sections.
+
+    When some output fields of a completion are missing or can't be parsed, they are first fixed up locally (see
+    `repair_value`), then, if `repair` is enabled, asked again to the LM with a short follow-up turn, keeping the
+    fields that were parsed. Only if that fails is the whole request sent again with `JSONAdapter`. The number of
+    completions taking each path is counted, see `ChatAdapter.stats`.
+    """
+
+    def __init__(self, callbacks: Optional[list[BaseCallback]] = None, repair: bool = True):
+        """
+        Args:
+            callbacks: The callbacks called when formatting and parsing.
+            repair: Whether to ask the LM again for the output fields that are missing or invalid in a completion,
+                before falling back to `JSONAdapter`.
+        """
         super().__init__(callbacks)
+        self.repair = repair
 
     def __call__(
         self,
@@ -46,16 +75,177 @@ class ChatAdapter(Adapter):
         inputs: dict[str, Any],
     ) -> list[dict[str, Any]]:
         try:
-            return super().__call__(lm, lm_kwargs, signature, demos, inputs)
+            inputs_ = self._format_lm_inputs(signature, demos, inputs, lm)
+            with self._stream_fields(signature):
+                outputs = lm(**inputs_, **lm_kwargs)
+                values, failures = self._parse_completions(signature, outputs)
+
+            for i, errors in failures.items():
+                request = self._format_repair_request(signature, inputs_, _get_completion_text(outputs[i]), errors)
+                repaired = lm(**request, **_single_completion_kwargs(lm_kwargs))
+                values[i].update(self._parse_repaired_fields(signature, repaired, errors))
+            return values
         except Exception as e:
             if isinstance(e, ContextWindowExceededError):
                 # On context window exceeded error, we don't want to retry with a different adapter.
                 raise e
             # fallback to JSONAdapter
+            _record_parse_path("fallback")
             return JSONAdapter()(lm, lm_kwargs, signature, demos, inputs)
 
+    async def acall(
+        self,
+        lm: LM,
+        lm_kwargs: dict[str, Any],
+        signature: Type[Signature],
+        demos: list[dict[str, Any]],
+        inputs: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        try:
+            inputs_ = self._format_lm_inputs(signature, demos, inputs, lm)
+            with self._stream_fields(signature):
+                outputs = await lm.acall(**inputs_, **lm_kwargs)
+                values, failures = self._parse_completions(signature, outputs)
+
+            for i, errors in failures.items():
+                request = self._format_repair_request(signature, inputs_, _get_completion_text(outputs[i]), errors)
+                repaired = await lm.acall(**request, **_single_completion_kwargs(lm_kwargs))
+                values[i].update(self._parse_repaired_fields(signature, repaired, errors))
+            return values
+        except Exception as e:
+            if isinstance(e, ContextWindowExceededError):
+                # On context window exceeded error, we don't want to retry with a different adapter.
+                raise e
+            # fallback to JSONAdapter
+            _record_parse_path("fallback")
+            return await JSONAdapter().acall(lm, lm_kwargs, signature, demos, inputs)
+
+    def batch_call(
+        self,
+        lm: LM,
+        lm_kwargs: dict[str, Any],
+        signature: Type[Signature],
+        demos: list[dict[str, Any]],
+        inputs_list: list[dict[str, Any]],
+        max_concurrency: Optional[int] = None,
+    ) -> list[Union[list[dict[str, Any]], Exception]]:
+        results = super().batch_call(lm, lm_kwargs, signature, demos, inputs_list, max_concurrency)
+
+        # Fall back to JSONAdapter for the failed inputs, except on context window exceeded errors.
+        failed = [
+            i for i, r in enumerate(results) if isinstance(r, Exception) and not isinstance(r, ContextWindowExceededError)
+        ]
+        if failed:
+            for _ in failed:
+                _record_parse_path("fallback")
+            retried = JSONAdapter().batch_call(
+                lm, lm_kwargs, signature, demos, [inputs_list[i] for i in failed], max_concurrency
+            )
+            for i, result in zip(failed, retried):
+                results[i] = result
+
+        return results
+
+    @staticmethod
+    def stats() -> dict[str, int]:
+        """
+        Return the number of completions parsed by each path, across all the `ChatAdapter`s of the process:
+        `parsed` as is, `fixed` locally, `repaired` with a follow-up LM call, and the number of requests sent again
+        with the `fallback` adapter.
+        """
+        with _parse_stats_lock:
+            return {path: _parse_stats[path] for path in PARSE_PATHS}
+
+    def _parse_lm_outputs(self, signature: Type[Signature], outputs: list[Any]) -> list[dict[str, Any]]:
+        values, failures = self._parse_completions(signature, outputs)
+        for errors in failures.values():
+            raise ValueError(_format_parse_errors(signature, errors))
+        return values
+
+    def _parse_completions(
+        self, signature: Type[Signature], outputs: list[Any]
+    ) -> tuple[list[dict[str, Any]], dict[int, dict[str, Optional[str]]]]:
+        """
+        Parse the completions of an LM call, fixing up their invalid fields locally.
+
+        Returns:
+            The values parsed from each completion, and, for the completions that still have missing or invalid
+            fields, the error of each of these fields by completion index (see `_parse_fields`).
+        """
+        values, failures = [], {}
+        for i, output in enumerate(outputs):
+            completion = _get_completion_text(output)
+            try:
+                value = self.parse(signature, completion)
+                _record_parse_path("parsed")
+            except ValueError:
+                value, errors = self._parse_fields(signature, completion, fix=True)
+                if errors:
+                    failures[i] = errors
+                else:
+                    _record_parse_path("fixed")
+
+            if isinstance(output, dict):
+                value["logprobs"] = output["logprobs"]
+            values.append(value)
+
+        if failures and not self.repair:
+            raise ValueError(_format_parse_errors(signature, next(iter(failures.values()))))
+        return values, failures
+
+    def _format_repair_request(
+        self,
+        signature: Type[Signature],
+        request: dict[str, Any],
+        completion: str,
+        errors: dict[str, Optional[str]],
+    ) -> dict[str, Any]:
+        messages = [
+            *request["messages"],
+            {"role": "assistant", "content": completion},
+            format_repair_turn(signature, errors),
+        ]
+        return dict(messages=messages)
+
+    def _parse_repaired_fields(
+        self, signature: Type[Signature], outputs: list[Any], errors: dict[str, Optional[str]]
+    ) -> dict[str, Any]:
+        fields, remaining_errors = self._parse_fields(signature, _get_completion_text(outputs[0]), errors, fix=True)
+        if remaining_errors:
+            raise ValueError(_format_parse_errors(signature, remaining_errors))
+        _record_parse_path("repaired")
+        return fields
+
+    @contextlib.contextmanager
+    def _stream_fields(self, signature: Type[Signature]):
+        # When the program is streamed, the output fields are parsed as the LM response is streamed, to send them
+        # as `StreamResponse`s along the raw chunks, and the parsed sections are then reused by `parse`.
+        stream = settings.send_stream
+        if stream is None:
+            yield
+            return
+
+        if isinstance(stream, FieldStream):
+            stream = stream.stream
+        with settings.context(send_stream=FieldStream(stream, signature.output_fields)):
+            yield
+
     def format(
         self, signature: Type[Signature], demos: list[dict[str, Any]], inputs: dict[str, Any]
+    ) -> list[dict[str, Any]]:
+        # The system message and the few-shot examples are compiled once per signature and demos.
+        messages = self._compiled_prefix(signature, demos, self._format_instructions_and_demos)
+
+        # Add the chat history after few-shot examples
+        if any(field.annotation == History for field in signature.input_fields.values()):
+            messages.extend(try_expand_image_tags(self.format_conversation_history(signature, inputs)))
+        else:
+            messages.extend(try_expand_image_tags([self.format_turn(signature, inputs, role="user")]))
+
+        return messages
+
+    def _format_instructions_and_demos(
+        self, signature: Type[Signature], demos: list[dict[str, Any]]
     ) -> list[dict[str, Any]]:
         messages: list[dict[str, Any]] = []
 
@@ -80,45 +270,57 @@ class ChatAdapter(Adapter):
             messages.append(self.format_turn(signature, demo, role="user", incomplete=demo in incomplete_demos))
             messages.append(self.format_turn(signature, demo, role="assistant", incomplete=demo in incomplete_demos))
 
-        # Add the chat history after few-shot examples
-        if any(field.annotation == History for field in signature.input_fields.values()):
-            messages.extend(self.format_conversation_history(signature, inputs))
-        else:
-            messages.append(self.format_turn(signature, inputs, role="user"))
-
-        messages = try_expand_image_tags(messages)
-        return messages
+        return try_expand_image_tags(messages)
 
     def parse(self, signature: Type[Signature], completion: str) -> dict[str, Any]:
-        sections = [(None, [])]
-
-        for line in completion.splitlines():
-            match = field_header_pattern.match(line.strip())
-            if match:
-                # If the header pattern is found, split the rest of the line as content
-                header = match.group(1)
-                remaining_content = line[match.end() :].strip()
-                sections.append((header, [remaining_content] if remaining_content else []))
-            else:
-                sections[-1][1].append(line)
-
-        sections = [(k, "\n".join(v).strip()) for k, v in sections]
-
-        fields = {}
-        for k, v in sections:
-            if (k not in fields) and (k in signature.output_fields):
-                try:
-                    fields[k] = parse_value(v, signature.output_fields[k].annotation)
-                except Exception as e:
-                    raise ValueError(
-                        f"Error parsing field {k}: {e}.\n\n\t\tOn attempting to parse the value\n```\n{v}\n```"
-                    )
-
-        if fields.keys() != signature.output_fields.keys():
-            raise ValueError(f"Expected {signature.output_fields.keys()} but got {fields.keys()}")
-
+        fields, errors = self._parse_fields(signature, completion)
+        if errors:
+            raise ValueError(_format_parse_errors(signature, errors))
         return fields
 
+    def _parse_fields(
+        self,
+        signature: Type[Signature],
+        completion: str,
+        field_names: Optional[Iterable[str]] = None,
+        fix: bool = False,
+    ) -> tuple[dict[str, Any], dict[str, Optional[str]]]:
+        """
+        Parse the output fields of a completion, or only `field_names`, fixing up the invalid values locally if `fix`.
+
+        Returns:
+            The parsed fields, and the error of each field that couldn't be parsed, or None for the missing fields.
+        """
+        stream = settings.send_stream
+        if isinstance(stream, FieldStream) and stream.parser.text == completion:
+            # The completion was already parsed while it was streamed.
+            parser = stream.parser
+        else:
+            parser = FieldParser()
+            parser.feed(completion)
+
+        output_fields = signature.output_fields
+        names = output_fields.keys() if field_names is None else set(field_names)
+        fields, errors = {}, {}
+        for k, v in parser.finish():
+            if k not in names or k in fields or k in errors:
+                continue
+            try:
+                fields[k] = parse_value(v, output_fields[k].annotation)
+            except Exception as e:
+                if fix:
+                    try:
+                        fields[k] = repair_value(v, output_fields[k].annotation)
+                        continue
+                    except Exception:
+                        pass
+                errors[k] = f"Error parsing field {k}: {e}.\n\n\t\tOn attempting to parse the value\n```\n{v}\n```"
+
+        for k in names:
+            if k not in fields and k not in errors:
+                errors[k] = None
+        return fields, errors
+
     # TODO(PR): Looks ok?
     def format_finetune_data(
         self, signature: Type[Signature], demos: list[dict[str, Any]], inputs: dict[str, Any], outputs: dict[str, Any]
@@ -233,22 +435,77 @@ def format_turn(
     )
     messages.append(field_messages)
 
+    # Add output field instructions for user messages
+    if role == "user" and signature.output_fields:
+        messages.append("Respond with the corresponding output fields, " + _output_fields_instructions(signature))
+    joined_messages = "\n\n".join(msg for msg in messages)
+    return {"role": role, "content": joined_messages}
+
+
+def format_repair_turn(signature: Type[Signature], errors: Dict[str, Optional[str]]) -> dict[str, Any]:
+    """
+    Constructs a follow-up user message asking the LLM to respond again with only the output fields that were
+    missing or invalid in its previous response, so that the fields it got right don't need to be generated again.
+
+    Args:
+        signature: The aletheia signature to which the LLM responses should conform.
+        errors: A dictionary mapping the names of the missing or invalid output fields to their parsing error, or to
+            None if the field is missing.
+
+    Returns:
+        A user message that can be appended to the chat thread, after the previous response of the LLM.
+    """
+    problems = []
+    for name, error in errors.items():
+        problem = error.split("\n\n\t\tOn attempting to parse the value")[0] if error else "The field is missing."
+        problems.append(f"- `{name}`: {problem}")
+
+    content = (
+        "Some output fields of your response are missing or invalid:\n"
+        + "\n".join(problems)
+        + "\n\nRespond again with only these output fields, "
+        + _output_fields_instructions(signature, errors)
+    )
+    return {"role": "user", "content": content}
+
+
+def _output_fields_instructions(signature: Type[Signature], field_names: Optional[Iterable[str]] = None) -> str:
     def type_info(v):
         if v.annotation is not str:
             return f" (must be formatted as a valid Python {get_annotation_name(v.annotation)})"
         else:
             return ""
 
-    # Add output field instructions for user messages
-    if role == "user" and signature.output_fields:
-        field_instructions = (
-            "Respond with the corresponding output fields, starting with the field "
-            + ", then ".join(f"`[[ ## {f} ## ]]`{type_info(v)}" for f, v in signature.output_fields.items())
-            + ", and then ending with the marker for `[[ ## completed ## ]]`."
-        )
-        messages.append(field_instructions)
-    joined_messages = "\n\n".join(msg for msg in messages)
-    return {"role": role, "content": joined_messages}
+    fields = signature.output_fields.items()
+    if field_names is not None:
+        fields = [(f, v) for f, v in fields if f in field_names]
+    return (
+        "starting with the field "
+        + ", then ".join(f"`[[ ## {f} ## ]]`{type_info(v)}" for f, v in fields)
+        + ", and then ending with the marker for `[[ ## completed ## ]]`."
+    )
+
+
+def _get_completion_text(output: Any) -> str:
+    return output["text"] if isinstance(output, dict) else output
+
+
+def _single_completion_kwargs(lm_kwargs: dict[str, Any]) -> dict[str, Any]:
+    # Follow-up requests repair one completion at a time.
+    return {k: v for k, v in lm_kwargs.items() if k != "n"}
+
+
+def _format_parse_errors(signature: Type[Signature], errors: Dict[str, Optional[str]]) -> str:
+    invalid = [error for error in errors.values() if error is not None]
+    if invalid:
+        return invalid[0]
+    parsed = {k: None for k in signature.output_fields if k not in errors}
+    return f"Expected {signature.output_fields.keys()} but got {parsed.keys()}"
+
+
+def _record_parse_path(path: str) -> None:
+    with _parse_stats_lock:
+        _parse_stats[path] += 1
 
 
 def enumerate_fields(fields: dict) -> str:
@@ -273,7 +530,7 @@ def move_type_to_front(d):
 
 
 def prepare_schema(field_type):
-    schema = pydantic.TypeAdapter(field_type).json_schema()
+    schema = get_type_adapter(field_type).json_schema()
     schema = move_type_to_front(schema)
     return schema
 
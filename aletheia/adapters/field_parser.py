@@ -0,0 +1,160 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional, Tuple
+
+field_header_pattern = re.compile(r"\[\[ ## (\w+) ## \]\]")
+
+_HEADER_PREFIX = "[[ ## "
+
+# The line boundaries of `str.splitlines`, other than "\n"
+_line_boundary = re.compile(r"[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+
+@dataclass
+class StreamResponse:
+    """A chunk of the value of an output field, streamed as soon as the LM generates it."""
+
+    signature_field_name: str
+    chunk: str
+
+
+class FieldParser:
+    """
+    An incremental parser of completions made of `[[ ## field ## ]]` sections, as produced with `ChatAdapter`.
+
+    Text is fed in chunks, e.g. as it's streamed by the LM, and each call to `feed` returns the new text of the
+    `stream_fields` sections as `(field name, text)` deltas, as soon as it can't be part of a section header. The
+    deltas of a field add up to its final, stripped value. Once the completion is complete, `finish` returns all the
+    sections, without scanning the text again.
+    """
+
+    def __init__(self, stream_fields: Optional[Iterable[str]] = None):
+        """
+        Args:
+            stream_fields: The names of the fields whose values are streamed by `feed`. Only the first section of
+                each field is streamed, like only the first one is parsed.
+        """
+        self.stream_fields = set(stream_fields or ())
+        self._chunks: List[str] = []
+        self._line = ""
+        self._sections: List[Tuple[Optional[str], List[str]]] = [(None, [])]
+        self._seen = set()
+
+        # Streaming state of the current section
+        self._streaming = False
+        self._started = False
+        self._pending_whitespace = ""
+        self._streamed_lines = 0
+        self._line_emitted = 0
+
+    @property
+    def text(self) -> str:
+        """The text fed so far."""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        """Consume a chunk of the completion, and return the new text of the streamed fields."""
+        if not text:
+            return []
+        self._chunks.append(text)
+
+        deltas = []
+        buffer = self._line + text
+        end = buffer.rfind("\n")
+        if end >= 0:
+            # Lines are split like `str.splitlines`, which also splits on other line boundaries.
+            for line in (buffer[:end] + "\n").splitlines():
+                self._consume_line(line, deltas)
+            buffer = buffer[end + 1 :]
+        self._line = buffer
+
+        # Stream the incomplete last line, unless it may turn out to be a section header, or several lines.
+        if self._streaming and buffer and not _may_be_header(buffer) and not _line_boundary.search(buffer):
+            self._append(buffer[self._line_emitted :], deltas, new_line=self._line_emitted == 0)
+            self._line_emitted = len(buffer)
+        return deltas
+
+    def finish(self) -> List[Tuple[Optional[str], str]]:
+        """Consume the rest of the completion, and return its `(field name, value)` sections in order."""
+        if self._line:
+            for line in self._line.splitlines():
+                self._consume_line(line, [])
+            self._line = ""
+        return [(header, "\n".join(lines).strip()) for header, lines in self._sections]
+
+    def _consume_line(self, line: str, deltas: List[Tuple[str, str]]) -> None:
+        match = field_header_pattern.match(line.strip())
+        if match:
+            header = match.group(1)
+            remaining_content = line[match.end() :].strip()
+            self._sections.append((header, [remaining_content] if remaining_content else []))
+
+            self._streaming = header in self.stream_fields and header not in self._seen
+            self._seen.add(header)
+            self._started = False
+            self._pending_whitespace = ""
+            self._streamed_lines = 0
+            self._line_emitted = 0
+            if self._streaming and remaining_content:
+                self._append(remaining_content, deltas, new_line=True)
+            return
+
+        self._sections[-1][1].append(line)
+        if self._streaming:
+            self._append(line[self._line_emitted :], deltas, new_line=self._line_emitted == 0)
+        self._line_emitted = 0
+
+    def _append(self, text: str, deltas: List[Tuple[str, str]], new_line: bool) -> None:
+        if new_line:
+            if self._streamed_lines:
+                text = "\n" + text
+            self._streamed_lines += 1
+
+        # Leading and trailing whitespace is held back, as the parsed values are stripped.
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return
+            self._started = True
+        body = text.rstrip()
+        if body:
+            deltas.append((self._sections[-1][0], self._pending_whitespace + body))
+            self._pending_whitespace = text[len(body) :]
+        else:
+            self._pending_whitespace += text
+
+
+def _may_be_header(line: str) -> bool:
+    line = line.lstrip()
+    return line.startswith(_HEADER_PREFIX) or _HEADER_PREFIX.startswith(line)
+
+
+def get_chunk_text(chunk: Any) -> Optional[str]:
+    """Get the generated text of a streamed LM response chunk, if any."""
+    choices = getattr(chunk, "choices", None)
+    if not choices:
+        return None
+    delta = getattr(choices[0], "delta", None)
+    content = getattr(delta, "content", None)
+    return content if isinstance(content, str) else None
+
+
+class FieldStream:
+    """
+    A wrapper of the send stream of a streamed program (see `aletheia.streamify`), which forwards the LM response
+    chunks, and also sends a `StreamResponse` for each new piece of an output field parsed from them.
+    """
+
+    def __init__(self, stream: Any, stream_fields: Iterable[str]):
+        self.stream = stream
+        self.parser = FieldParser(stream_fields)
+
+    async def send(self, value: Any) -> None:
+        await self.stream.send(value)
+
+        text = get_chunk_text(value)
+        if text:
+            for field_name, chunk in self.parser.feed(text):
+                await self.stream.send(StreamResponse(signature_field_name=field_name, chunk=chunk))
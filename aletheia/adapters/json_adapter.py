@@ -1,10 +1,13 @@
 import enum
+import functools
 import inspect
 import json
 import logging
 import textwrap
+import threading
+import weakref
 from copy import deepcopy
-from typing import Any, Dict, KeysView, Literal, NamedTuple, Type
+from typing import Any, Dict, KeysView, Literal, NamedTuple, Optional, Type, Union
 
 import json_repair
 import litellm
@@ -15,7 +18,13 @@ from pydantic.fields import FieldInfo
 from aletheia.adapters.base import Adapter
 from aletheia.adapters.types.history import History
 from aletheia.adapters.types.image import try_expand_image_tags
-from aletheia.adapters.utils import format_field_value, get_annotation_name, parse_value, serialize_for_json
+from aletheia.adapters.utils import (
+    format_field_value,
+    get_annotation_name,
+    get_type_adapter,
+    parse_value,
+    serialize_for_json,
+)
 from aletheia.clients.lm import LM
 from aletheia.signatures.signature import Signature, SignatureMeta
 from aletheia.signatures.utils import get_aletheia_field_type
@@ -40,13 +49,10 @@ class JSONAdapter(Adapter):
         demos: list[dict[str, Any]],
         inputs: dict[str, Any],
     ) -> list[dict[str, Any]]:
-        inputs = self.format(signature, demos, inputs)
-        inputs = dict(prompt=inputs) if isinstance(inputs, str) else dict(messages=inputs)
+        inputs = self._format_lm_inputs(signature, demos, inputs, lm)
 
         try:
-            provider = lm.model.split("/", 1)[0] or "openai"
-            params = litellm.get_supported_openai_params(model=lm.model, custom_llm_provider=provider)
-            if params and "response_format" in params:
+            if _supports_response_format(lm):
                 try:
                     response_format = _get_structured_outputs_response_format(signature)
                     outputs = lm(**inputs, **lm_kwargs, response_format=response_format)
@@ -63,6 +69,68 @@ class JSONAdapter(Adapter):
         except litellm.UnsupportedParamsError:
             outputs = lm(**inputs, **lm_kwargs)
 
+        return self._parse_lm_outputs(signature, outputs)
+
+    async def acall(
+        self,
+        lm: LM,
+        lm_kwargs: dict[str, Any],
+        signature: Type[Signature],
+        demos: list[dict[str, Any]],
+        inputs: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        inputs = self._format_lm_inputs(signature, demos, inputs, lm)
+
+        try:
+            if _supports_response_format(lm):
+                try:
+                    response_format = _get_structured_outputs_response_format(signature)
+                    outputs = await lm.acall(**inputs, **lm_kwargs, response_format=response_format)
+                except Exception as e:
+                    logger.debug(
+                        f"Failed to obtain response using signature-based structured outputs"
+                        f" response format: Falling back to default 'json_object' response format."
+                        f" Exception: {e}"
+                    )
+                    outputs = await lm.acall(**inputs, **lm_kwargs, response_format={"type": "json_object"})
+            else:
+                outputs = await lm.acall(**inputs, **lm_kwargs)
+
+        except litellm.UnsupportedParamsError:
+            outputs = await lm.acall(**inputs, **lm_kwargs)
+
+        return self._parse_lm_outputs(signature, outputs)
+
+    def batch_call(
+        self,
+        lm: LM,
+        lm_kwargs: dict[str, Any],
+        signature: Type[Signature],
+        demos: list[dict[str, Any]],
+        inputs_list: list[dict[str, Any]],
+        max_concurrency: Optional[int] = None,
+    ) -> list[Union[list[dict[str, Any]], Exception]]:
+        batch_lm_kwargs = lm_kwargs
+        if _supports_response_format(lm):
+            try:
+                response_format = _get_structured_outputs_response_format(signature)
+            except Exception:
+                response_format = {"type": "json_object"}
+            batch_lm_kwargs = {**lm_kwargs, "response_format": response_format}
+
+        results = super().batch_call(lm, batch_lm_kwargs, signature, demos, inputs_list, max_concurrency)
+
+        # Retry the failed inputs one by one, going through the response format fallbacks of `__call__`.
+        for i, result in enumerate(results):
+            if isinstance(result, Exception) and not isinstance(result, litellm.ContextWindowExceededError):
+                try:
+                    results[i] = self(lm, lm_kwargs, signature, demos, inputs_list[i])
+                except Exception as e:
+                    results[i] = e
+
+        return results
+
+    def _parse_lm_outputs(self, signature: Type[Signature], outputs: list[Any]) -> list[dict[str, Any]]:
         values = []
 
         for output in outputs:
@@ -76,6 +144,20 @@ class JSONAdapter(Adapter):
 
     def format(
         self, signature: Type[Signature], demos: list[dict[str, Any]], inputs: dict[str, Any]
+    ) -> list[dict[str, Any]]:
+        # The system message and the few-shot examples are compiled once per signature and demos.
+        messages = self._compiled_prefix(signature, demos, self._format_instructions_and_demos)
+
+        # Add the chat history after few-shot examples
+        if any(field.annotation == History for field in signature.input_fields.values()):
+            messages.extend(try_expand_image_tags(self.format_conversation_history(signature, inputs)))
+        else:
+            messages.extend(try_expand_image_tags([self.format_turn(signature, inputs, role="user")]))
+
+        return messages
+
+    def _format_instructions_and_demos(
+        self, signature: Type[Signature], demos: list[dict[str, Any]]
     ) -> list[dict[str, Any]]:
         messages = []
 
@@ -96,14 +178,7 @@ class JSONAdapter(Adapter):
             messages.append(self.format_turn(signature, demo, role="user", incomplete=demo in incomplete_demos))
             messages.append(self.format_turn(signature, demo, role="assistant", incomplete=demo in incomplete_demos))
 
-        # Add the chat history after few-shot examples
-        if any(field.annotation == History for field in signature.input_fields.values()):
-            messages.extend(self.format_conversation_history(signature, inputs))
-        else:
-            messages.append(self.format_turn(signature, inputs, role="user"))
-
-        messages = try_expand_image_tags(messages)
-        return messages
+        return try_expand_image_tags(messages)
 
     def parse(self, signature: Type[Signature], completion: str) -> dict[str, Any]:
         fields = json_repair.loads(completion)
@@ -280,7 +355,7 @@ def prepare_instructions(signature: SignatureMeta):
             desc = f"must be one of: {'; '.join([str(x) for x in type_.__args__])}"
         else:
             desc = "must adhere to the JSON schema: "
-            desc += json.dumps(pydantic.TypeAdapter(type_).json_schema())
+            desc += json.dumps(get_type_adapter(type_).json_schema())
 
         desc = (" " * 8) + f"# note: the value you produce {desc}" if desc else ""
         return f"{{{field_name}}}{desc}"
@@ -312,9 +387,48 @@ def prepare_instructions(signature: SignatureMeta):
     return "\n\n".join(parts).strip()
 
 
+def _supports_response_format(lm: LM) -> bool:
+    """
+    Checks whether the provider of the specified LM supports the `response_format` request parameter.
+    """
+    return _model_supports_response_format(lm.model)
+
+
+@functools.lru_cache(maxsize=None)
+def _model_supports_response_format(model: str) -> bool:
+    provider = model.split("/", 1)[0] or "openai"
+    params = litellm.get_supported_openai_params(model=model, custom_llm_provider=provider)
+    return bool(params and "response_format" in params)
+
+
+# The structured outputs response formats of signatures, which are built once per signature
+_response_formats: "weakref.WeakKeyDictionary[SignatureMeta, pydantic.BaseModel]" = weakref.WeakKeyDictionary()
+_response_formats_lock = threading.Lock()
+
+
 def _get_structured_outputs_response_format(signature: SignatureMeta) -> pydantic.BaseModel:
     """
     Obtains the LiteLLM / OpenAI `response_format` parameter for generating structured outputs from
+    an LM request, based on the output fields of the specified aletheia signature. The response format
+    is built once per signature.
+
+    Args:
+        signature: The aletheia signature for which to obtain the `response_format` request parameter.
+    Returns:
+        A Pydantic model representing the `response_format` parameter for the LM request.
+    """
+    with _response_formats_lock:
+        response_format = _response_formats.get(signature)
+    if response_format is None:
+        response_format = _build_structured_outputs_response_format(signature)
+        with _response_formats_lock:
+            _response_formats[signature] = response_format
+    return response_format
+
+
+def _build_structured_outputs_response_format(signature: SignatureMeta) -> pydantic.BaseModel:
+    """
+    Builds the LiteLLM / OpenAI `response_format` parameter for generating structured outputs from
     an LM request, based on the output fields of the specified aletheia signature.
 
     Args:
@@ -1,12 +1,40 @@
 import ast
+import difflib
 import enum
+import functools
 import json
+import re
 from typing import Any, List, Literal, Union, get_args, get_origin
 
 import json_repair
 from pydantic import TypeAdapter
 from pydantic.fields import FieldInfo
 
+# Types that pydantic serializes to themselves in JSON mode
+_JSON_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+# Minimum similarity of a value to an enum member or literal, for `repair_value` to pick it
+CHOICE_SIMILARITY_CUTOFF = 0.8
+
+_code_fence_pattern = re.compile(r"^```[\w-]*\n(.*?)\n?```$", re.DOTALL)
+
+
+def get_type_adapter(annotation: Any) -> TypeAdapter:
+    """
+    Get a pydantic `TypeAdapter` for the specified type annotation. Adapters are expensive to build, so they are
+    shared across calls for hashable annotations.
+    """
+    try:
+        hash(annotation)
+    except TypeError:
+        return TypeAdapter(annotation)
+    return _cached_type_adapter(annotation)
+
+
+@functools.lru_cache(maxsize=1024)
+def _cached_type_adapter(annotation: Any) -> TypeAdapter:
+    return TypeAdapter(annotation)
+
 
 def serialize_for_json(value: Any) -> Any:
     """
@@ -20,8 +48,10 @@ def serialize_for_json(value: Any) -> Any:
     # Attempt to format the value as a JSON-compatible object using pydantic, falling back to
     # a string representation of the value if that fails (e.g. if the value contains an object
     # that pydantic doesn't recognize or can't serialize)
+    if type(value) in _JSON_SCALAR_TYPES:
+        return value
     try:
-        return TypeAdapter(type(value)).dump_python(value, mode="json")
+        return get_type_adapter(type(value)).dump_python(value, mode="json")
     except Exception:
         return str(value)
 
@@ -94,7 +124,7 @@ def parse_value(value, annotation):
         return find_enum_member(annotation, value)
 
     if not isinstance(value, str):
-        return TypeAdapter(annotation).validate_python(value)
+        return get_type_adapter(annotation).validate_python(value)
 
     candidate = json_repair.loads(value)  # json_repair.loads returns "" on failure.
     if candidate == "" and value != "":
@@ -103,7 +133,59 @@ def parse_value(value, annotation):
         except (ValueError, SyntaxError):
             candidate = value
 
-    return TypeAdapter(annotation).validate_python(candidate)
+    return get_type_adapter(annotation).validate_python(candidate)
+
+
+def repair_value(value: Any, annotation: Any) -> Any:
+    """
+    Fix up a field value that `parse_value` rejected, without asking the LM again: the value is unwrapped from
+    Markdown code fences and quotes, and matched to the closest enum member or literal choice of the annotation,
+    ignoring case, punctuation, and small typos.
+
+    Raises:
+        ValueError: If the value can't be fixed up.
+    """
+    if isinstance(value, str):
+        value = value.strip()
+        match = _code_fence_pattern.match(value)
+        if match:
+            value = match.group(1).strip()
+
+    choices = _get_choices(annotation)
+    if choices is None:
+        return parse_value(value, annotation)
+
+    # Values like "Color.RED" or "Literal['red']" are matched on their last part.
+    candidates = [_normalize_choice(value)]
+    candidates.append(_normalize_choice(re.split(r"[.\[]", str(value))[-1]))
+    for candidate in candidates:
+        if candidate in choices:
+            return choices[candidate]
+
+    matches = difflib.get_close_matches(candidates[0], list(choices), n=1, cutoff=CHOICE_SIMILARITY_CUTOFF)
+    if matches:
+        return choices[matches[0]]
+    raise ValueError(f"{value!r} doesn't match any of {[str(choice) for choice in dict.fromkeys(choices.values())]}")
+
+
+def _get_choices(annotation: Any) -> Union[dict[str, Any], None]:
+    if isinstance(annotation, enum.EnumMeta):
+        pairs = [(member.name, member) for member in annotation] + [(member.value, member) for member in annotation]
+    elif get_origin(annotation) is Literal:
+        pairs = [(arg, arg) for arg in get_args(annotation)]
+    else:
+        return None
+
+    choices = {}
+    for key, choice in pairs:
+        # Choices that are the same once normalized are ambiguous, and only matched exactly by `parse_value`.
+        normalized = _normalize_choice(key)
+        choices[normalized] = None if choices.get(normalized, choice) != choice else choice
+    return {key: choice for key, choice in choices.items() if choice is not None}
+
+
+def _normalize_choice(value: Any) -> str:
+    return re.sub(r"[\W_]+", " ", str(value)).strip().casefold()
 
 
 def get_annotation_name(annotation):
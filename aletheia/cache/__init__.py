@@ -0,0 +1,16 @@
+from aletheia.cache.base import CacheBackend
+from aletheia.cache.disk import DiskCache
+from aletheia.cache.memory import MemoryCache
+from aletheia.cache.namespaces import create_cache
+from aletheia.cache.snapshot import export, import_
+from aletheia.cache.tiered import TieredCache
+
+__all__ = [
+    "CacheBackend",
+    "DiskCache",
+    "MemoryCache",
+    "TieredCache",
+    "create_cache",
+    "export",
+    "import_",
+]
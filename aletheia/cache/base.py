@@ -0,0 +1,46 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, Tuple
+
+
+class CacheBackend(ABC):
+    """
+    Base class for the key-value stores backing aletheia's caches of LM responses, embeddings and retriever
+    results. Keys are strings and values are arbitrary picklable objects. Implementations must be threadsafe.
+
+    Users can implement their own subclasses to plug a custom store into aletheia, e.g.
+    `aletheia.configure(lm_cache=MyCache())`.
+    """
+
+    # Whether the backend keeps entries beyond the lifetime of the process
+    persistent: bool = False
+
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value cached under `key`, or `default` if it is absent."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def put(self, key: str, value: Any) -> None:
+        """Cache `value` under `key`."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def __contains__(self, key: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        raise NotImplementedError
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Iterate over the `(key, value)` pairs held by the cache. Used to export cache snapshots."""
+        raise NotImplementedError(f"{self.__class__.__name__} does not support iterating over its entries.")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the cache statistics."""
+        return {}
+
+    def __deepcopy__(self, memo):
+        # Caches are process-wide resources: copying the aletheia settings must not duplicate them.
+        return self
@@ -0,0 +1,114 @@
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from diskcache import FanoutCache
+
+from aletheia.cache.base import CacheBackend
+
+# Sentinel distinguishing a cache miss from a cached value
+_MISSING = object()
+
+
+def default_cache_dir() -> str:
+    """The root directory of aletheia's disk caches, configurable through the `aletheia_CACHEDIR` variable."""
+    return os.environ.get("aletheia_CACHEDIR") or os.path.join(Path.home(), ".aletheia_cache")
+
+
+class DiskCache(CacheBackend):
+    """
+    A persistent cache stored in a directory of SQLite shards (a `diskcache.FanoutCache`). Writes are
+    distributed across the shards by key, so that many threads and processes can write concurrently
+    without contending on a single database.
+
+    The cache is safe to share between several processes on one host: point each process at the same
+    `directory` and they will read each other's entries. Each cache directory has its own size limit,
+    enforced by evicting the least recently used entries.
+    """
+
+    persistent = True
+
+    def __init__(
+        self,
+        directory: str,
+        size_limit: Optional[float] = None,
+        shards: int = 8,
+        ttl: Optional[float] = None,
+        timeout: float = 1.0,
+    ):
+        """
+        Args:
+            directory: The directory in which the shards are stored. It is created if it doesn't exist.
+            size_limit: The approximate maximum number of bytes stored on disk across all shards. If None,
+                diskcache's default of 1 GB is used.
+            shards: The number of SQLite shards to distribute entries and writes across.
+            ttl: The number of seconds after which an entry expires. If None, entries never expire.
+            timeout: The number of seconds to wait for a shard that is locked by another writer.
+        """
+        self.directory = str(directory)
+        self.shards = shards
+        self.ttl = ttl
+
+        settings = dict(eviction_policy="least-recently-used")
+        if size_limit is not None:
+            settings["size_limit"] = int(size_limit)
+        self._cache = FanoutCache(self.directory, shards=shards, timeout=timeout, **settings)
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def size_limit(self) -> int:
+        # FanoutCache splits its size limit evenly across the shards
+        return int(self._cache.size_limit * self.shards)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._cache.get(key, default=_MISSING, retry=True)
+        with self._lock:
+            if value is _MISSING:
+                self._misses += 1
+                return default
+            self._hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        # FanoutCache.set returns False instead of raising if a shard stays locked beyond the timeout, in
+        # which case the entry is simply not cached.
+        self._cache.set(key, value, expire=self.ttl, retry=True)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._cache
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        for key in self._cache:
+            value = self._cache.get(key, default=_MISSING, retry=True)
+            # Entries may expire or be evicted while iterating
+            if value is not _MISSING:
+                yield key, value
+
+    def clear(self) -> None:
+        self._cache.clear(retry=True)
+
+    def close(self) -> None:
+        self._cache.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "entries": len(self._cache),
+            "bytes": self._cache.volume(),
+            "max_bytes": self.size_limit,
+            "shards": self.shards,
+            "directory": self.directory,
+        }
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(directory={self.directory!r}, size_limit={self.size_limit})"
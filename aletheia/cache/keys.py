@@ -0,0 +1,77 @@
+import functools
+from hashlib import sha256
+from typing import Any, Dict
+
+import pydantic
+import ujson
+
+# Strings at least this long (e.g. retrieved passages, formatted demos, base64-encoded images) are hashed
+# once and their digest is memoized, so that repeated requests sharing them don't rehash their content.
+MEMOIZED_TEXT_MIN_LENGTH = 1024
+
+
+def request_cache_key(request: Dict[str, Any]) -> str:
+    """
+    Obtain a unique cache key for the given request dictionary by feeding an unambiguous, type-tagged
+    encoding of the request into a single SHA-256 hasher. Long strings and pydantic model schemas are
+    hashed once and their digests are memoized, so the cost of keying a request is dominated by the
+    parts of the request that actually change between calls.
+
+    Note: Values that cannot be encoded should *not* be ignored / discarded, since that would
+    potentially lead to cache collisions. For example, consider request A containing only encodable
+    values and request B containing the same encodable values in addition to one unencodable value.
+    Discarding the unencodable value would lead to a cache collision between requests A and B, even
+    though they are semantically different. Instead, an exception is raised and the caller is expected
+    to bypass the cache.
+    """
+    hasher = sha256()
+    _update(hasher, request)
+    return hasher.hexdigest()
+
+
+def _update(hasher, value: Any) -> None:
+    if isinstance(value, str):
+        if len(value) >= MEMOIZED_TEXT_MIN_LENGTH:
+            hasher.update(b"h")
+            hasher.update(_text_digest(value))
+        else:
+            encoded = value.encode()
+            hasher.update(b"s%d:" % len(encoded))
+            hasher.update(encoded)
+    elif value is None or isinstance(value, (bool, int, float)):
+        # repr() distinguishes True from 1 and 1.0 from 1, and never contains the ";" terminator
+        hasher.update(b"p%s;" % repr(value).encode())
+    elif isinstance(value, dict):
+        hasher.update(b"d%d:" % len(value))
+        for k in sorted(value):
+            _update(hasher, k)
+            _update(hasher, value[k])
+    elif isinstance(value, (list, tuple)):
+        hasher.update(b"l%d:" % len(value))
+        for item in value:
+            _update(hasher, item)
+    elif isinstance(value, type) and issubclass(value, pydantic.BaseModel):
+        hasher.update(b"m")
+        hasher.update(_model_schema_digest(value))
+    elif isinstance(value, pydantic.BaseModel):
+        _update(hasher, value.model_dump())
+    elif callable(value) and hasattr(value, "__code__") and hasattr(value.__code__, "co_code"):
+        hasher.update(b"c")
+        hasher.update(sha256(value.__code__.co_code).digest())
+    else:
+        # Note: We don't attempt to compute a hash of the value, since the default implementation of
+        # hash() is id(), which may collide if the same memory address is reused for different objects
+        # at different times. Values that cannot be converted to JSON raise here.
+        encoded = ujson.dumps(value, sort_keys=True).encode()
+        hasher.update(b"j%d:" % len(encoded))
+        hasher.update(encoded)
+
+
+@functools.lru_cache(maxsize=4096)
+def _text_digest(text: str) -> bytes:
+    return sha256(text.encode()).digest()
+
+
+@functools.lru_cache(maxsize=256)
+def _model_schema_digest(model: type) -> bytes:
+    return sha256(ujson.dumps(model.model_json_schema(), sort_keys=True).encode()).digest()
@@ -0,0 +1,173 @@
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Tuple
+
+from aletheia.cache.base import CacheBackend
+
+# Default limits of the in-memory LM cache. The byte limit is approximate, since the size of a cached
+# response is estimated from its pickled representation.
+MEMORY_CACHE_MAX_ENTRIES = os.environ.get("aletheia_MEMORY_CACHE_MAX_ENTRIES")
+MEMORY_CACHE_LIMIT = int(float(os.environ.get("aletheia_MEMORY_CACHE_LIMIT", 1e9)))  # 1 GB default
+MEMORY_CACHE_TTL = os.environ.get("aletheia_MEMORY_CACHE_TTL")
+
+
+class _CacheEntry(NamedTuple):
+    value: Any
+    size: int
+    expires_at: Optional[float]
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimate the number of bytes held by a cached value. LM responses are pickled to obtain their size,
+    which is cheap compared to the LM call that produced them. Values that cannot be pickled fall back
+    to their shallow `sys.getsizeof` size.
+    """
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class MemoryCache(CacheBackend):
+    """
+    A threadsafe in-memory LRU cache for LM responses, bounded both in the number of entries and in the
+    approximate number of bytes that the cached values occupy. Entries can optionally expire after a
+    time-to-live, and hit / miss / eviction counts are recorded so that the cache can be monitored in
+    long-running processes.
+
+    The cache is shared process-wide through `aletheia.settings.lm_cache`:
+
+    ```python
+    import aletheia
+    from aletheia.cache import MemoryCache
+
+    aletheia.configure(lm_cache=MemoryCache(max_entries=100_000, max_bytes=2e9, ttl=24 * 3600))
+    ...
+    print(aletheia.settings.lm_cache.stats())
+    ```
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = MEMORY_CACHE_MAX_ENTRIES,
+        max_bytes: Optional[float] = MEMORY_CACHE_LIMIT,
+        ttl: Optional[float] = MEMORY_CACHE_TTL,
+    ):
+        """
+        Args:
+            max_entries: The maximum number of entries to keep. If None, the number of entries is unbounded.
+            max_bytes: The approximate maximum number of bytes to keep. If None, the size is unbounded.
+            ttl: The number of seconds after which an entry expires. If None, entries never expire.
+        """
+        self.max_entries = int(max_entries) if max_entries is not None else None
+        self.max_bytes = int(max_bytes) if max_bytes is not None else None
+        self.ttl = float(ttl) if ttl is not None else None
+
+        self._entries: "OrderedDict[Any, _CacheEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Return the value cached under `key`, or `default` if it is absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+
+            if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry.value
+
+    def put(self, key: Any, value: Any) -> None:
+        """Cache `value` under `key`, evicting the least recently used entries if the cache is full."""
+        size = estimate_size(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # A value larger than the whole cache would evict everything else and then be evicted itself.
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = _CacheEntry(value=value, size=size, expires_at=expires_at)
+            self._bytes += size
+
+            while self._entries and self._is_over_limit():
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._evictions += 1
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        """Iterate over a snapshot of the unexpired entries, from least to most recently used."""
+        now = time.monotonic()
+        with self._lock:
+            entries = [
+                (key, entry.value)
+                for key, entry in self._entries.items()
+                if entry.expires_at is None or entry.expires_at > now
+            ]
+        return iter(entries)
+
+    def clear(self) -> None:
+        """Remove all entries from the cache. Statistics are preserved."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return a snapshot of the cache statistics: the hit, miss, eviction and expiration counts, the number
+        of resident entries and bytes, and the configured limits.
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+            }
+
+    def __contains__(self, key: Any) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (entry.expires_at is None or entry.expires_at > time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(max_entries={self.max_entries}, max_bytes={self.max_bytes}, ttl={self.ttl})"
+        )
+
+    def _is_over_limit(self) -> bool:
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self._bytes > self.max_bytes
+
+    def _remove(self, key: Any) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
@@ -0,0 +1,81 @@
+import os
+from typing import Literal, Optional
+
+from aletheia.cache.base import CacheBackend
+from aletheia.cache.disk import DiskCache, default_cache_dir
+from aletheia.cache.memory import MEMORY_CACHE_LIMIT, MemoryCache
+from aletheia.cache.tiered import TieredCache
+
+# The aletheia settings holding the cache of each namespace
+NAMESPACE_SETTINGS = {
+    "lm": "lm_cache",
+    "embeddings": "embedding_cache",
+    "retrievers": "retriever_cache",
+}
+
+# Default disk size limit of each namespace, so that e.g. large embedding matrices can't evict LM responses
+NAMESPACE_DISK_LIMITS = {
+    "lm": int(float(os.environ.get("aletheia_LM_CACHE_LIMIT", 2e10))),  # 20 GB default
+    "embeddings": int(float(os.environ.get("aletheia_EMBEDDING_CACHE_LIMIT", 5e9))),  # 5 GB default
+    "retrievers": int(float(os.environ.get("aletheia_RETRIEVER_CACHE_LIMIT", 5e9))),  # 5 GB default
+}
+
+
+def create_cache(
+    namespace: Literal["lm", "embeddings", "retrievers"],
+    memory: bool = True,
+    disk: bool = True,
+    memory_max_bytes: Optional[float] = MEMORY_CACHE_LIMIT,
+    disk_size_limit: Optional[float] = None,
+    directory: Optional[str] = None,
+    shards: int = 8,
+) -> CacheBackend:
+    """
+    Create the cache of a namespace, tiered from memory to a sharded local disk store. Each namespace has
+    its own disk directory and size limit. Several processes on one host can share a namespace's disk tier
+    by using the same directory, while each process keeps its own memory tier.
+
+    Example:
+
+    ```python
+    import aletheia
+    from aletheia.cache import create_cache
+
+    aletheia.configure(
+        lm_cache=create_cache("lm", disk_size_limit=1e10),
+        embedding_cache=create_cache("embeddings", memory=False),
+    )
+    ```
+
+    Args:
+        namespace: The namespace of the cache: "lm", "embeddings" or "retrievers".
+        memory: Whether to include an in-memory LRU tier.
+        disk: Whether to include a persistent disk tier.
+        memory_max_bytes: The approximate maximum number of bytes held by the memory tier.
+        disk_size_limit: The approximate maximum number of bytes held by the disk tier. Defaults to the
+            namespace's limit, configurable through the `aletheia_{LM,EMBEDDING,RETRIEVER}_CACHE_LIMIT`
+            environment variables.
+        directory: The directory of the disk tier. Defaults to `<aletheia_CACHEDIR>/<namespace>`.
+        shards: The number of SQLite shards of the disk tier.
+
+    Returns:
+        The cache backend, to be configured as the `lm_cache`, `embedding_cache` or `retriever_cache` setting.
+    """
+    if namespace not in NAMESPACE_SETTINGS:
+        raise ValueError(f"Unknown cache namespace: {namespace}. Expected one of {list(NAMESPACE_SETTINGS)}.")
+
+    tiers = []
+    if memory:
+        tiers.append(MemoryCache(max_bytes=memory_max_bytes))
+    if disk:
+        tiers.append(
+            DiskCache(
+                directory or os.path.join(default_cache_dir(), namespace),
+                size_limit=disk_size_limit if disk_size_limit is not None else NAMESPACE_DISK_LIMITS[namespace],
+                shards=shards,
+            )
+        )
+
+    if not tiers:
+        raise ValueError("At least one of `memory` and `disk` must be enabled.")
+    return tiers[0] if len(tiers) == 1 else TieredCache(tiers)
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class _LeaderAborted(Exception):
+    """Recorded for the waiters when the leader is cancelled or interrupted, so that they retry the call."""
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key, so that only the first caller (the "leader") executes
+    the call while later callers wait for the leader's result instead of repeating the work. This is used
+    to avoid sending identical LM requests to the provider when many threads or tasks miss the cache for
+    the same request at the same time, e.g. while evaluating or optimizing a program with many threads.
+
+    Sync and async callers share the same registry of in-flight calls, so a thread can wait on a request
+    issued by a coroutine and vice versa. If the leader fails, its exception is raised to every waiter. If
+    the leader is cancelled or interrupted, waiters retry the call themselves.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Execute `fn` unless a call with the same key is already in flight, in which case wait for its result.
+
+        Returns:
+            A tuple of the result and a boolean indicating whether the result was shared by another caller.
+        """
+        while True:
+            future, is_leader = self._join(key)
+            if is_leader:
+                return self._lead(key, future, fn), False
+
+            try:
+                return future.result(), True
+            except _LeaderAborted:
+                # The leader was cancelled or interrupted; try again, possibly as the new leader.
+                continue
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """The async counterpart of `do`, where `fn` returns an awaitable."""
+        while True:
+            future, is_leader = self._join(key)
+            if is_leader:
+                try:
+                    result = await fn()
+                except BaseException as e:
+                    self._fail(key, future, e)
+                    raise
+                self._succeed(key, future, result)
+                return result, False
+
+            try:
+                # The shared future is shielded, so that cancelling this waiter (e.g. on a timeout) doesn't cancel
+                # the future of the leader and the other waiters.
+                return await asyncio.shield(asyncio.wrap_future(future)), True
+            except _LeaderAborted:
+                # The leader was cancelled or interrupted; try again, possibly as the new leader.
+                continue
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    def _lead(self, key: Hashable, future: Future, fn: Callable[[], Any]) -> Any:
+        try:
+            result = fn()
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._succeed(key, future, result)
+        return result
+
+    def _succeed(self, key: Hashable, future: Future, result: Any) -> None:
+        self._complete(key, future, result=result)
+
+    def _fail(self, key: Hashable, future: Future, exception: BaseException) -> None:
+        if not isinstance(exception, Exception):
+            # Cancellation and interrupts are specific to the leader; let the waiters retry instead.
+            exception = _LeaderAborted()
+        self._complete(key, future, exception=exception)
+
+    def _complete(self, key: Hashable, future: Future, result: Any = None, exception: BaseException = None) -> None:
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+        # The future may have been completed elsewhere, e.g. cancelled by code outside of this class.
+        if future.done():
+            return
+        try:
+            if exception is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exception)
+        except InvalidStateError:
+            pass
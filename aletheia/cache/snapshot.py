@@ -0,0 +1,153 @@
+import gzip
+import hashlib
+import os
+import pickle
+from typing import Callable, Dict, List, Optional, Tuple
+
+from aletheia.cache.memory import MemoryCache
+from aletheia.cache.namespaces import NAMESPACE_SETTINGS
+
+SNAPSHOT_FORMAT = "aletheia-cache-snapshot"
+SNAPSHOT_VERSION = 1
+
+
+def export(
+    path: str,
+    filter: Optional[Callable[[str, str], bool]] = None,
+    namespaces: Optional[List[str]] = None,
+) -> int:
+    """
+    Export the entries of the configured caches (`lm_cache`, `embedding_cache` and `retriever_cache`) to a
+    compressed snapshot file, which `import_` loads back on another machine. A program evaluated after
+    importing the snapshot of a previous run is served entirely from memory, without network access.
+
+    Values are stored once per distinct content, addressed by the SHA-256 of their pickled bytes, so that
+    identical responses cached under several keys don't inflate the snapshot.
+
+    Since the in-memory LM cache holds the responses requested by the current process, exporting at the end
+    of a run captures the entries touched during that run. Persistent caches are exported in full unless a
+    `filter` is given.
+
+    Example:
+
+    ```python
+    import aletheia
+
+    evaluate(program)
+    aletheia.cache.export("evaluate_snapshot.pkl.gz")
+
+    # In CI, without network access:
+    aletheia.cache.import_("evaluate_snapshot.pkl.gz")
+    evaluate(program)
+    ```
+
+    Args:
+        path: The file to write the snapshot to.
+        filter: An optional predicate called with the namespace and the key of each entry, which returns
+            whether to export the entry.
+        namespaces: The namespaces to export, among "lm", "embeddings" and "retrievers". Defaults to all.
+
+    Returns:
+        The number of exported entries.
+    """
+    # Imported lazily since the settings module itself depends on `aletheia.cache`
+    from aletheia.dsp.utils.settings import settings
+
+    entries: List[Tuple[str, str, str]] = []
+    blobs: Dict[str, bytes] = {}
+
+    for namespace in _resolve_namespaces(namespaces):
+        cache = settings.get(NAMESPACE_SETTINGS[namespace])
+        if cache is None:
+            continue
+
+        for key, value in cache.items():
+            if filter is not None and not filter(namespace, key):
+                continue
+            try:
+                blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                # Values that can't be pickled can't be replayed either
+                continue
+            digest = hashlib.sha256(blob).hexdigest()
+            blobs.setdefault(digest, blob)
+            entries.append((namespace, key, digest))
+
+    snapshot = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "entries": entries,
+        "blobs": blobs,
+    }
+
+    # Write to a temporary file first, so that an interrupted export doesn't leave a truncated snapshot.
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+    return len(entries)
+
+
+def import_(path: str, namespaces: Optional[List[str]] = None) -> int:
+    """
+    Load a snapshot written by `export` into the configured caches. If the cache of a namespace in the
+    snapshot isn't configured, an unbounded `MemoryCache` is configured for it.
+
+    Snapshots are pickled, so only import snapshots from sources you trust.
+
+    Args:
+        path: The snapshot file to load.
+        namespaces: The namespaces to import, among "lm", "embeddings" and "retrievers". Defaults to all.
+
+    Returns:
+        The number of imported entries.
+    """
+    from aletheia.dsp.utils.settings import settings
+
+    with gzip.open(path, "rb") as f:
+        snapshot = pickle.load(f)
+
+    if not isinstance(snapshot, dict) or snapshot.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"{path} is not an aletheia cache snapshot.")
+    if snapshot["version"] > SNAPSHOT_VERSION:
+        raise ValueError(
+            f"The cache snapshot {path} has version {snapshot['version']}, but this version of aletheia only "
+            f"supports snapshots up to version {SNAPSHOT_VERSION}. Please upgrade aletheia."
+        )
+
+    blobs = snapshot["blobs"]
+    for digest, blob in blobs.items():
+        if hashlib.sha256(blob).hexdigest() != digest:
+            raise ValueError(f"The cache snapshot {path} is corrupted: the content of entry {digest} doesn't match.")
+
+    selected = set(_resolve_namespaces(namespaces))
+    values = {}
+    imported = 0
+
+    for namespace, key, digest in snapshot["entries"]:
+        if namespace not in selected:
+            continue
+
+        setting = NAMESPACE_SETTINGS[namespace]
+        cache = settings.get(setting)
+        if cache is None:
+            cache = MemoryCache(max_entries=None, max_bytes=None, ttl=None)
+            settings.configure(**{setting: cache})
+
+        if digest not in values:
+            values[digest] = pickle.loads(blobs[digest])
+        cache.put(key, values[digest])
+        imported += 1
+
+    return imported
+
+
+def _resolve_namespaces(namespaces: Optional[List[str]]) -> List[str]:
+    if namespaces is None:
+        return list(NAMESPACE_SETTINGS)
+
+    unknown = [namespace for namespace in namespaces if namespace not in NAMESPACE_SETTINGS]
+    if unknown:
+        raise ValueError(f"Unknown cache namespaces: {unknown}. Expected some of {list(NAMESPACE_SETTINGS)}.")
+    return list(namespaces)
@@ -0,0 +1,80 @@
+import threading
+from typing import Any, Dict, Iterator, List, Tuple
+
+from aletheia.cache.base import CacheBackend
+
+# Sentinel distinguishing a cache miss from a cached value
+_MISSING = object()
+
+
+class TieredCache(CacheBackend):
+    """
+    A cache composed of several backends ordered from fastest to slowest, typically memory → local disk.
+    Lookups try each tier in order and copy a value found in a slower tier into the faster tiers before
+    it, so that subsequent lookups are served from memory. Values are written to every tier.
+
+    ```python
+    from aletheia.cache import DiskCache, MemoryCache, TieredCache
+
+    cache = TieredCache([MemoryCache(max_bytes=5e8), DiskCache("/tmp/aletheia_cache/lm", size_limit=1e10)])
+    ```
+    """
+
+    def __init__(self, tiers: List[CacheBackend]):
+        if not tiers:
+            raise ValueError("`TieredCache` requires at least one tier.")
+        self.tiers = list(tiers)
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def persistent(self) -> bool:
+        return any(tier.persistent for tier in self.tiers)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key, _MISSING)
+            if value is not _MISSING:
+                for faster_tier in self.tiers[:i]:
+                    faster_tier.put(key, value)
+                with self._lock:
+                    self._hits += 1
+                return value
+
+        with self._lock:
+            self._misses += 1
+        return default
+
+    def put(self, key: str, value: Any) -> None:
+        for tier in self.tiers:
+            tier.put(key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return any(key in tier for tier in self.tiers)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        seen = set()
+        for tier in self.tiers:
+            for key, value in tier.items():
+                if key not in seen:
+                    seen.add(key)
+                    yield key, value
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the combined hit and miss counts of the cache, and the statistics of each tier."""
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "tiers": [tier.stats() for tier in self.tiers],
+        }
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.tiers!r})"
@@ -1,4 +1,6 @@
 from aletheia.clients.lm import LM
+from aletheia.clients.hedging import Hedging
+from aletheia.clients.routed_lm import RoutedLM
 from aletheia.clients.provider import Provider, TrainingJob
 from aletheia.clients.base_lm import BaseLM, inspect_history
 from aletheia.clients.embedding import Embedder
@@ -22,8 +24,8 @@ def _litellm_track_cache_hit_callback(kwargs, completion_response, start_time, e
 litellm.success_callback = [_litellm_track_cache_hit_callback]
 
 try:
-    # TODO: There's probably value in getting litellm to support FanoutCache and to separate the limit for
-    # the LM cache from the embeddings cache. Then we can lower the default 30GB limit.
+    # This is the legacy cache shared by LM responses and embeddings. Sharded caches with separate limits per
+    # namespace can be configured with `aletheia.cache.create_cache`; a persistent `lm_cache` bypasses this one.
     litellm.cache = Cache(disk_cache_dir=DISK_CACHE_DIR, type="disk")
 
     if litellm.cache.cache.disk_cache.size_limit != DISK_CACHE_LIMIT:
@@ -55,6 +57,8 @@ def disable_litellm_logging():
 __all__ = [
     "BaseLM",
     "LM",
+    "Hedging",
+    "RoutedLM",
     "Provider",
     "TrainingJob",
     "inspect_history",
@@ -1,11 +1,15 @@
+import asyncio
 import datetime
 import uuid
 from abc import ABC
+from typing import Any, Optional, Union
 
+from aletheia.clients.history import LMHistory
 from aletheia.dsp.utils import settings
 from aletheia.utils.callback import with_callbacks
 
-GLOBAL_HISTORY = []
+# The most recent calls of all LMs, up to `aletheia.settings.max_history_size`
+GLOBAL_HISTORY = LMHistory()
 
 
 class BaseLM(ABC):
@@ -45,12 +49,9 @@ class BaseLM(ABC):
         self.model_type = model_type
         self.cache = cache
         self.kwargs = dict(temperature=temperature, max_tokens=max_tokens, **kwargs)
-        self.history = []
-
-    @with_callbacks
-    def __call__(self, prompt=None, messages=None, **kwargs):
-        response = self.forward(prompt=prompt, messages=messages, **kwargs)
+        self.history = LMHistory()
 
+    def _process_lm_response(self, response, prompt, messages, **kwargs):
         if kwargs.get("logprobs"):
             outputs = [
                 {
@@ -62,7 +63,8 @@ class BaseLM(ABC):
         else:
             outputs = [c.message.content if hasattr(c, "message") else c["text"] for c in response.choices]
 
-        if settings.disable_history:
+        current_settings = settings.snapshot()
+        if current_settings.disable_history:
             return outputs
 
         # Logging, with removed api key & where `cost` is None on cache hit.
@@ -71,7 +73,6 @@ class BaseLM(ABC):
             "prompt": prompt,
             "messages": messages,
             "kwargs": kwargs,
-            "response": response,
             "outputs": outputs,
             "usage": dict(response.usage),
             "cost": getattr(response, "_hidden_params", {}).get("response_cost"),
@@ -81,11 +82,45 @@ class BaseLM(ABC):
             "response_model": response.model,
             "model_type": self.model_type,
         }
+        if current_settings.history_include_response:
+            entry["response"] = response
         self.history.append(entry)
         self.update_global_history(entry)
 
         return outputs
 
+    @with_callbacks
+    def __call__(self, prompt=None, messages=None, **kwargs):
+        response = self.forward(prompt=prompt, messages=messages, **kwargs)
+        return self._process_lm_response(response, prompt, messages, **kwargs)
+
+    @with_callbacks
+    async def acall(self, prompt=None, messages=None, **kwargs):
+        response = await self.aforward(prompt=prompt, messages=messages, **kwargs)
+        return self._process_lm_response(response, prompt, messages, **kwargs)
+
+    def batch_call(
+        self, requests: list[dict[str, Any]], max_concurrency: Optional[int] = None
+    ) -> list[Union[list[Any], Exception]]:
+        """
+        Calls the language model on a batch of requests, each a dict of the keyword arguments of `__call__`
+        (e.g. `{"messages": [...], "temperature": 0.7}`).
+
+        Returns:
+            For each request, in order, the list of outputs, or the exception raised while processing it.
+        """
+        responses = self.batch_forward(requests, max_concurrency=max_concurrency)
+
+        results = []
+        for request, response in zip(requests, responses):
+            if isinstance(response, Exception):
+                results.append(response)
+                continue
+
+            kwargs = {k: v for k, v in request.items() if k not in ("prompt", "messages")}
+            results.append(self._process_lm_response(response, request.get("prompt"), request.get("messages"), **kwargs))
+        return results
+
     def forward(self, prompt=None, messages=None, **kwargs):
         """Forward pass for the language model.
 
@@ -94,13 +129,63 @@ class BaseLM(ABC):
         """
         raise NotImplementedError("Subclasses must implement this method.")
 
+    async def aforward(self, prompt=None, messages=None, **kwargs):
+        """Async forward pass for the language model.
+
+        Subclasses that support native async execution should implement this method, and the response should be
+        identical to [OpenAI response format](https://platform.openai.com/docs/api-reference/responses/object).
+        """
+        raise NotImplementedError("Subclasses must implement this method.")
+
+    def batch_forward(
+        self, requests: list[dict[str, Any]], max_concurrency: Optional[int] = None
+    ) -> list[Union[Any, Exception]]:
+        """Forward pass for a batch of requests, each a dict of the keyword arguments of `forward`.
+
+        The requests are fanned out concurrently on an event loop through `aforward`, with at most `max_concurrency`
+        (by default, `aletheia.settings.async_max_workers`) in flight at once. Subclasses that only implement `forward`
+        run it in worker threads instead. Subclasses can override this method to dispatch the requests through a
+        provider's batch endpoint.
+
+        Returns:
+            For each request, in order, the response in the OpenAI response format, or the exception raised by it.
+        """
+        from aletheia.utils.asyncify import run_async
+
+        return run_async(self._abatch_forward, requests, max_concurrency)
+
+    async def _abatch_forward(self, requests, max_concurrency=None):
+        from aletheia.utils.asyncify import asyncify
+
+        if type(self).aforward is BaseLM.aforward:
+            forward = asyncify(self.forward)
+        else:
+            forward = self.aforward
+
+        semaphore = asyncio.Semaphore(max_concurrency or settings.async_max_workers)
+
+        async def forward_one(request):
+            async with semaphore:
+                try:
+                    return await forward(**request)
+                except Exception as e:
+                    return e
+
+        return await asyncio.gather(*(forward_one(request) for request in requests))
+
     def copy(self, **kwargs):
-        """Returns a copy of the language model with possibly updated parameters."""
+        """Returns a copy of the language model with possibly updated parameters.
+
+        The copy is shallow: it shares the provider, callbacks, cache settings and launched processes of the
+        original, and only has its own `kwargs` and history, which makes it cheap to create a variant of an LM for
+        each request (e.g. with a different temperature). Use `copy.deepcopy` for a fully independent LM.
+        """
 
         import copy
 
-        new_instance = copy.deepcopy(self)
-        new_instance.history = []
+        new_instance = copy.copy(self)
+        new_instance.kwargs = dict(self.kwargs)
+        new_instance.history = LMHistory()
 
         for key, value in kwargs.items():
             if hasattr(self, key):
@@ -114,10 +199,13 @@ class BaseLM(ABC):
         _inspect_history(self.history, n)
 
     def update_global_history(self, entry):
-        if settings.disable_history:
+        current_settings = settings.snapshot()
+        if current_settings.disable_history:
             return
 
         GLOBAL_HISTORY.append(entry)
+        if current_settings.history_sink is not None:
+            current_settings.history_sink.write(entry)
 
 
 def _green(text: str, end: str = "\n"):
@@ -1,6 +1,9 @@
 import litellm
 import numpy as np
 
+from aletheia.cache.keys import request_cache_key
+from aletheia.dsp.utils.settings import settings
+
 
 class Embedder:
     """aletheia embedding class.
@@ -116,10 +119,7 @@ class Embedder:
 
         for batch_inputs in chunk(inputs, batch_size):
             if isinstance(self.model, str):
-                embedding_response = litellm.embedding(
-                    model=self.model, input=batch_inputs, caching=caching, **merged_kwargs
-                )
-                batch_embeddings = [data["embedding"] for data in embedding_response.data]
+                batch_embeddings = self._compute_hosted_embeddings(batch_inputs, caching, merged_kwargs)
             elif callable(self.model):
                 batch_embeddings = self.model(batch_inputs, **merged_kwargs)
             else:
@@ -135,3 +135,26 @@ class Embedder:
             return embeddings[0]
         else:
             return embeddings
+
+    def _compute_hosted_embeddings(self, batch_inputs, caching, kwargs):
+        embedding_cache = settings.embedding_cache
+        if not caching or embedding_cache is None:
+            embedding_response = litellm.embedding(model=self.model, input=batch_inputs, caching=caching, **kwargs)
+            return [data["embedding"] for data in embedding_response.data]
+
+        # When an embedding cache is configured, it replaces LiteLLM's cache, which is shared with LM responses.
+        try:
+            key = "embedding:" + request_cache_key(dict(model=self.model, input=batch_inputs, **kwargs))
+        except Exception:
+            key = None
+
+        if key is not None:
+            batch_embeddings = embedding_cache.get(key)
+            if batch_embeddings is not None:
+                return batch_embeddings
+
+        embedding_response = litellm.embedding(model=self.model, input=batch_inputs, caching=False, **kwargs)
+        batch_embeddings = [data["embedding"] for data in embedding_response.data]
+        if key is not None:
+            embedding_cache.put(key, batch_embeddings)
+        return batch_embeddings
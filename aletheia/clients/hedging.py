@@ -0,0 +1,200 @@
+import asyncio
+import contextvars
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Hedging:
+    """
+    A hedging policy cutting the tail latency of LM requests. When a request takes longer than the hedging delay,
+    a duplicate request is sent, and the first response that comes back is used while the other request is
+    cancelled. With a delay at a high percentile of the recent latencies (e.g. the 95th), only the slowest few
+    percents of the requests are duplicated, which bounds the extra load on the provider.
+
+    The duplicate request is sent to the same deployment, or to a secondary one given by `deployment`, e.g. another
+    region or API key of the same model.
+
+    Example:
+
+    ```python
+    import aletheia
+
+    lm = aletheia.LM(
+        "openai/gpt-4o-mini",
+        hedging=aletheia.Hedging(percentile=95, deployment={"api_base": "https://secondary.example.com/v1"}),
+    )
+    ```
+
+    Hedging applies to the requests sent to the provider, below the LM cache: the winning response is cached once,
+    and only its usage is reported to `aletheia.track_usage()`. Async requests cancel the losing request; sync
+    requests can't interrupt a provider call in progress, so the losing request runs to completion in the
+    background and its response is discarded. Streamed requests are not hedged.
+    """
+
+    def __init__(
+        self,
+        delay: Optional[float] = None,
+        percentile: float = 95.0,
+        window: int = 200,
+        min_samples: int = 20,
+        deployment: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            delay: The number of seconds after which a duplicate request is sent. If None, the delay is the
+                `percentile` of the latencies of the recent requests.
+            percentile: The percentile of the recent latencies used as the hedging delay, between 0 and 100.
+            window: The number of recent latencies the percentile is computed over.
+            min_samples: The number of latencies to measure before requests are hedged, when `delay` is None.
+            deployment: The LM request arguments, e.g. `api_base` and `api_key`, of the deployment the duplicate
+                requests are sent to. If None, duplicates are sent to the same deployment as the requests.
+        """
+        if not 0 < percentile <= 100:
+            raise ValueError(f"`percentile` must be in (0, 100], but got {percentile}.")
+
+        self.delay = delay
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.deployment = deployment or {}
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._requests = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+
+    def __deepcopy__(self, memo):
+        # Copies of an LM share the hedging policy, and thus the latency measurements of the deployment.
+        return self
+
+    def hedge_delay(self) -> Optional[float]:
+        """The number of seconds after which a request is hedged, or None if requests are not hedged yet."""
+        if self.delay is not None:
+            return self.delay
+
+        with self._lock:
+            if len(self._latencies) < max(self.min_samples, 1):
+                return None
+            latencies = sorted(self._latencies)
+        index = min(int(len(latencies) * self.percentile / 100), len(latencies) - 1)
+        return latencies[index]
+
+    def hedge_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """The duplicate of an LM request, sent to the hedging deployment."""
+        return {**request, **self.deployment}
+
+    def call(self, send: Callable[[Dict[str, Any]], Any], request: Dict[str, Any]) -> Any:
+        """Send an LM request with `send`, hedging it with a duplicate if it's slower than the hedging delay."""
+        delay = self.hedge_delay()
+        self._count_request()
+        if delay is None:
+            return self._timed(send, request)
+
+        outcomes = queue.Queue()
+        self._start(send, request, outcomes, index=0)
+        hedged = False
+        try:
+            index, result, error = outcomes.get(timeout=delay)
+        except queue.Empty:
+            self._count_hedge()
+            self._start(send, self.hedge_request(request), outcomes, index=1)
+            hedged = True
+            index, result, error = outcomes.get()
+
+        if error is not None and hedged:
+            # The first attempt to finish failed, but the other one may still succeed.
+            index, result, other_error = outcomes.get()
+            if other_error is None:
+                error = None
+        if error is not None:
+            raise error
+
+        self._count_win(index)
+        return result
+
+    async def acall(self, send: Callable[[Dict[str, Any]], Awaitable[Any]], request: Dict[str, Any]) -> Any:
+        """The async counterpart of `call`. The losing request is cancelled."""
+        delay = self.hedge_delay()
+        self._count_request()
+        if delay is None:
+            return await self._atimed(send, request)
+
+        tasks = [asyncio.ensure_future(self._atimed(send, request))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self._count_hedge()
+                tasks.append(asyncio.ensure_future(self._atimed(send, self.hedge_request(request))))
+
+            # The first successful response wins. A failure is only raised once every attempt has failed.
+            error = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._count_win(tasks.index(task))
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current hedging delay, and the number of requests, hedged requests and hedges that won."""
+        delay = self.hedge_delay()
+        with self._lock:
+            return {
+                "delay": delay,
+                "requests": self._requests,
+                "hedged": self._hedged,
+                "hedge_wins": self._hedge_wins,
+            }
+
+    def _start(self, send, request, outcomes: queue.Queue, index: int) -> None:
+        def run():
+            try:
+                outcomes.put((index, self._timed(send, request), None))
+            except Exception as e:
+                outcomes.put((index, None, e))
+
+        # The attempts run in the caller's context, so that they see its settings overrides.
+        threading.Thread(target=contextvars.copy_context().run, args=(run,), daemon=True).start()
+
+    def _timed(self, send, request):
+        start = time.monotonic()
+        result = send(request)
+        self._record_latency(time.monotonic() - start)
+        return result
+
+    async def _atimed(self, send, request):
+        start = time.monotonic()
+        result = await send(request)
+        self._record_latency(time.monotonic() - start)
+        return result
+
+    def _record_latency(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+
+    def _count_request(self) -> None:
+        with self._lock:
+            self._requests += 1
+
+    def _count_hedge(self) -> None:
+        with self._lock:
+            self._hedged += 1
+
+    def _count_win(self, index: int) -> None:
+        if index > 0:
+            logger.debug("A hedged LM request was answered by its duplicate first.")
+            with self._lock:
+                self._hedge_wins += 1
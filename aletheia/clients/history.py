@@ -0,0 +1,85 @@
+import json
+import logging
+import logging.handlers
+import threading
+from typing import Any, Dict, Optional
+
+from aletheia.dsp.utils.settings import settings
+
+
+class LMHistory(list):
+    """
+    The history of the calls of an LM: a list keeping only the most recent entries, up to `max_size`, so that a
+    long-running process doesn't accumulate every LM call in memory.
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        """
+        Args:
+            max_size: The maximum number of entries to keep. If None, `aletheia.settings.max_history_size` is used,
+                and if that is None too, the history is unbounded.
+        """
+        super().__init__()
+        self.max_size = max_size
+        self._lock = threading.Lock()
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        max_size = self.max_size if self.max_size is not None else settings.max_history_size
+        with self._lock:
+            super().append(entry)
+            if max_size is not None and len(self) > max_size:
+                del self[: len(self) - max_size]
+
+    def __getstate__(self):
+        return {"max_size": self.max_size}
+
+    def __setstate__(self, state):
+        self.max_size = state["max_size"]
+        self._lock = threading.Lock()
+
+
+class JSONLHistorySink:
+    """
+    An append-only JSON Lines file receiving every LM history entry, e.g. to audit or replay LM calls beyond the
+    entries kept in memory. The file is rotated when it reaches `max_bytes`, keeping `backup_count` old files.
+
+    Example:
+
+    ```python
+    import aletheia
+    from aletheia.clients.history import JSONLHistorySink
+
+    aletheia.configure(history_sink=JSONLHistorySink("lm_history.jsonl", max_bytes=100_000_000, backup_count=5))
+    ```
+    """
+
+    def __init__(self, path: str, max_bytes: int = 0, backup_count: int = 0):
+        """
+        Args:
+            path: The path of the JSON Lines file.
+            max_bytes: The size in bytes after which the file is rotated. If 0, the file is never rotated.
+            backup_count: The number of rotated files to keep, named `path.1`, `path.2`, etc.
+        """
+        self.path = path
+        self._handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+        )
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def write(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, default=_to_json)
+        self._handler.handle(logging.makeLogRecord({"msg": line, "levelno": logging.INFO}))
+
+    def close(self) -> None:
+        self._handler.close()
+
+
+def _to_json(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        try:
+            return value.model_dump()
+        except Exception:
+            pass
+    return str(value)
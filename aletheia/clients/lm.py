@@ -1,22 +1,28 @@
+import copy
 import functools
+import inspect
 import logging
 import os
 import re
 import threading
-from hashlib import sha256
 from typing import Any, Dict, List, Literal, Optional, cast
 
 import litellm
-import pydantic
-import ujson
 from anyio.streams.memory import MemoryObjectSendStream
 from asyncer import syncify
-from cachetools import LRUCache, cached
 from litellm import RetryPolicy
 
 import aletheia
+from aletheia.cache.base import CacheBackend
+from aletheia.cache.keys import request_cache_key
+from aletheia.cache.memory import MemoryCache
+from aletheia.cache.single_flight import SingleFlight
+from aletheia.clients.hedging import Hedging
+from aletheia.clients.history import LMHistory
 from aletheia.clients.openai import OpenAIProvider
 from aletheia.clients.provider import Provider, TrainingJob
+from aletheia.clients.rate_limiter import acall_with_rate_limit, call_with_rate_limit, configure_rate_limit
+from aletheia.clients.tokens import calibrate_token_count
 from aletheia.clients.utils_finetune import TrainDataFormat
 from aletheia.dsp.utils.settings import settings
 from aletheia.utils.callback import BaseCallback, with_callbacks
@@ -25,6 +31,12 @@ from .base_lm import BaseLM
 
 logger = logging.getLogger(__name__)
 
+# Sentinel distinguishing a cache miss from a cached value
+_CACHE_MISS = object()
+
+# Registry of the LM requests currently sent to providers, used to coalesce identical concurrent requests
+_IN_FLIGHT_REQUESTS = SingleFlight()
+
 
 class LM(BaseLM):
     """
@@ -45,6 +57,9 @@ class LM(BaseLM):
         finetuning_model: Optional[str] = None,
         launch_kwargs: Optional[dict[str, Any]] = None,
         train_kwargs: Optional[dict[str, Any]] = None,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        hedging: Optional[Hedging] = None,
         **kwargs,
     ):
         """
@@ -66,6 +81,12 @@ class LM(BaseLM):
             provider: The provider to use. If not specified, the provider will be inferred from the model.
             finetuning_model: The model to finetune. In some providers, the models available for finetuning is different
                 from the models available for inference.
+            rpm: The maximum number of requests per minute to send to the model deployment. The budget is shared
+                 by all LMs of the process with the same model and API base, and adapts to the provider's rate
+                 limits. If not specified, requests are only slowed down after rate limit errors.
+            tpm: The maximum number of tokens per minute to send to the model deployment, shared like `rpm`.
+            hedging: A `Hedging` policy sending a duplicate of the requests that are slower than usual, to cut
+                     the tail latency. If not specified, requests are not hedged.
         """
         # Remember to update LM.copy() if you modify the constructor!
         self.model = model
@@ -74,12 +95,16 @@ class LM(BaseLM):
         self.cache_in_memory = cache_in_memory
         self.provider = provider or self.infer_provider()
         self.callbacks = callbacks or []
-        self.history = []
+        self.history = LMHistory()
         self.callbacks = callbacks or []
         self.num_retries = num_retries
         self.finetuning_model = finetuning_model
         self.launch_kwargs = launch_kwargs or {}
         self.train_kwargs = train_kwargs or {}
+        self.hedging = hedging
+
+        if rpm is not None or tpm is not None:
+            configure_rate_limit(model, rpm=rpm, tpm=tpm, api_base=kwargs.get("api_base"))
 
         # Handle model-specific configuration for different model families
         model_family = model.split("/")[-1].lower() if "/" in model else model.lower()
@@ -112,6 +137,7 @@ class LM(BaseLM):
             results = completion(
                 request=dict(model=self.model, messages=messages, **kwargs),
                 num_retries=self.num_retries,
+                hedging=self.hedging,
             )
         else:
             completion = litellm_completion if self.model_type == "chat" else litellm_text_completion
@@ -119,12 +145,52 @@ class LM(BaseLM):
             results = completion(
                 request=dict(model=self.model, messages=messages, **kwargs),
                 num_retries=self.num_retries,
+                hedging=self.hedging,
+                # only leverage LiteLLM cache in this case
+                cache={"no-cache": not cache, "no-store": not cache},
+            )
+
+        if not getattr(results, "cache_hit", False) and hasattr(results, "usage"):
+            usage_tracker = settings.snapshot().usage_tracker
+            if usage_tracker:
+                usage_tracker.add_usage(self.model, dict(results.usage))
+            calibrate_token_count(self.model, getattr(results.usage, "prompt_tokens", None), messages=messages)
+        return results
+
+    @with_callbacks
+    async def aforward(self, prompt=None, messages=None, **kwargs):
+        # Build the request.
+        cache = kwargs.pop("cache", self.cache)
+        # disable cache will also disable in memory cache
+        cache_in_memory = cache and kwargs.pop("cache_in_memory", self.cache_in_memory)
+        messages = messages or [{"role": "user", "content": prompt}]
+        kwargs = {**self.kwargs, **kwargs}
+
+        # Make the request and handle LRU & disk caching.
+        if cache_in_memory:
+            completion = cached_alitellm_completion if self.model_type == "chat" else cached_alitellm_text_completion
+
+            results = await completion(
+                request=dict(model=self.model, messages=messages, **kwargs),
+                num_retries=self.num_retries,
+                hedging=self.hedging,
+            )
+        else:
+            completion = alitellm_completion if self.model_type == "chat" else alitellm_text_completion
+
+            results = await completion(
+                request=dict(model=self.model, messages=messages, **kwargs),
+                num_retries=self.num_retries,
+                hedging=self.hedging,
                 # only leverage LiteLLM cache in this case
                 cache={"no-cache": not cache, "no-store": not cache},
             )
 
-        if not getattr(results, "cache_hit", False) and aletheia.settings.usage_tracker and hasattr(results, "usage"):
-            settings.usage_tracker.add_usage(self.model, dict(results.usage))
+        if not getattr(results, "cache_hit", False) and hasattr(results, "usage"):
+            usage_tracker = settings.snapshot().usage_tracker
+            if usage_tracker:
+                usage_tracker.add_usage(self.model, dict(results.usage))
+            calibrate_token_count(self.model, getattr(results.usage, "prompt_tokens", None), messages=messages)
         return results
 
     def launch(self, launch_kwargs: Optional[Dict[str, Any]] = None):
@@ -201,92 +267,145 @@ class LM(BaseLM):
         return {key: getattr(self, key) for key in state_keys} | self.kwargs
 
 
-def request_cache(maxsize: Optional[int] = None):
+def request_cache(maxsize: Optional[int] = None, key_prefix: Optional[str] = None):
     """
     A threadsafe decorator to create an in-memory LRU cache for LM inference functions that accept
     a dictionary-like LM request. An in-memory cache for LM calls is critical for ensuring
     good performance when optimizing and evaluating aletheia LMs (disk caching alone is too slow).
 
+    By default, responses are stored in the process-wide `aletheia.settings.lm_cache`, which is bounded in
+    entries and bytes and exposes hit / miss / eviction statistics via `aletheia.settings.lm_cache.stats()`.
+    Setting `aletheia.settings.lm_cache` to None disables in-memory caching.
+    Identical requests that miss the cache while one of them is already in flight are coalesced: later
+    callers wait for the response of the first one instead of sending duplicate requests to the provider.
+
     Args:
-        maxsize: The maximum size of the cache. If unspecified, no max size is enforced (cache is unbounded).
+        maxsize: If specified, use a private cache holding at most `maxsize` entries instead of the shared
+            `aletheia.settings.lm_cache`.
+        key_prefix: A prefix separating the cache entries of the wrapped function from those of other
+            functions sharing the same cache. Functions that return identical responses for identical
+            requests (e.g. sync and async variants of the same call) should share a prefix. Defaults to
+            the qualified name of the wrapped function.
 
     Returns:
         A decorator that wraps the target function with caching.
     """
 
-    def cache_key(request: Dict[str, Any]) -> str:
-        """
-        Obtain a unique cache key for the given request dictionary by hashing its JSON
-        representation. For request fields having types that are known to be JSON-incompatible,
-        convert them to a JSON-serializable format before hashing.
-
-        Note: Values that cannot be converted to JSON should *not* be ignored / discarded, since
-        that would potentially lead to cache collisions. For example, consider request A
-        containing only JSON-convertible values and request B containing the same JSON-convertible
-        values in addition to one unconvertible value. Discarding the unconvertible value would
-        lead to a cache collision between requests A and B, even though they are semantically
-        different.
-        """
+    def decorator(func):
+        prefix = key_prefix or func.__qualname__
+        private_cache = MemoryCache(max_entries=maxsize, max_bytes=None, ttl=None) if maxsize else None
 
-        def transform_value(value):
-            if isinstance(value, type) and issubclass(value, pydantic.BaseModel):
-                return value.model_json_schema()
-            elif isinstance(value, pydantic.BaseModel):
-                return value.model_dump()
-            elif callable(value) and hasattr(value, "__code__") and hasattr(value.__code__, "co_code"):
-                return value.__code__.co_code.decode("utf-8")
-            else:
-                # Note: We don't attempt to compute a hash of the value, since the default
-                # implementation of hash() is id(), which may collide if the same memory address
-                # is reused for different objects at different times
-                return value
-
-        params = {k: transform_value(v) for k, v in request.items()}
-        return sha256(ujson.dumps(params, sort_keys=True).encode()).hexdigest()
+        def get_cache() -> Optional[CacheBackend]:
+            return private_cache if private_cache is not None else settings.lm_cache
 
-    def decorator(func):
-        @cached(
-            # NB: cachetools doesn't support maxsize=None; it recommends using float("inf") instead
-            cache=LRUCache(maxsize=maxsize or float("inf")),
-            key=lambda key, request, *args, **kwargs: key,
-            # Use a lock to ensure thread safety for the cache when aletheia LMs are queried
-            # concurrently, e.g. during optimization and evaluation
-            lock=threading.RLock(),
-        )
-        def func_cached(key: str, request: Dict[str, Any], *args, **kwargs):
-            return func(request, *args, **kwargs)
+        def prefixed_cache_key(request: Dict[str, Any]) -> str:
+            return f"{prefix}:{request_cache_key(request)}"
+
+        if inspect.iscoroutinefunction(func):
+            return _async_request_cache(func, prefixed_cache_key, get_cache)
 
         @functools.wraps(func)
         def wrapper(request: dict, *args, **kwargs):
             try:
-                key = cache_key(request)
+                key = prefixed_cache_key(request)
             except Exception:
                 # If the cache key cannot be computed (e.g. because it contains a value that cannot
                 # be converted to JSON), bypass the cache and call the target function directly
                 return func(request, *args, **kwargs)
-            cache_hit = key in func_cached.cache
-            output = func_cached(key, request, *args, **kwargs)
-            if cache_hit and hasattr(output, "usage"):
-                # Clear the usage data when cache is hit, because no LM call is made
-                output.usage = {}
 
-            return func_cached(key, request, *args, **kwargs)
+            cache = get_cache()
+            if cache is None:
+                return func(request, *args, **kwargs)
+
+            output = cache.get(key, _CACHE_MISS)
+            if output is not _CACHE_MISS:
+                if hasattr(output, "usage"):
+                    # Clear the usage data when cache is hit, because no LM call is made
+                    output.usage = {}
+                return output
+
+            def call_and_store():
+                output = func(request, *args, **kwargs)
+                cache.put(key, output)
+                return output
 
+            # Identical requests that miss the cache concurrently are sent to the provider only once
+            output, shared = _IN_FLIGHT_REQUESTS.do(key, call_and_store)
+            return _as_shared_response(output) if shared else output
+
+        wrapper.get_cache = get_cache
         return wrapper
 
     return decorator
 
 
-@request_cache(maxsize=None)
-def cached_litellm_completion(request: Dict[str, Any], num_retries: int):
+def _async_request_cache(func, cache_key, get_cache):
+    """
+    The async counterpart of the `request_cache` wrapper. The cache lock is only held for the lookup
+    and the insertion, never across the awaited LM call.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(request: dict, *args, **kwargs):
+        try:
+            key = cache_key(request)
+        except Exception:
+            # If the cache key cannot be computed (e.g. because it contains a value that cannot
+            # be converted to JSON), bypass the cache and call the target function directly
+            return await func(request, *args, **kwargs)
+
+        cache = get_cache()
+        if cache is None:
+            return await func(request, *args, **kwargs)
+
+        output = cache.get(key, _CACHE_MISS)
+        if output is not _CACHE_MISS:
+            if hasattr(output, "usage"):
+                # Clear the usage data when cache is hit, because no LM call is made
+                output.usage = {}
+            return output
+
+        async def call_and_store():
+            output = await func(request, *args, **kwargs)
+            cache.put(key, output)
+            return output
+
+        # Identical requests that miss the cache concurrently are sent to the provider only once
+        output, shared = await _IN_FLIGHT_REQUESTS.ado(key, call_and_store)
+        return _as_shared_response(output) if shared else output
+
+    wrapper.get_cache = get_cache
+    return wrapper
+
+
+def _as_shared_response(output):
+    """
+    Prepare a response obtained by waiting on an identical in-flight request. Like a cache hit, no LM call was
+    made on behalf of the waiting caller, so its usage is cleared on a copy that leaves the original intact.
+    """
+    if not hasattr(output, "usage"):
+        return output
+    output = copy.copy(output)
+    output.usage = {}
+    return output
+
+
+@request_cache(key_prefix="litellm_completion")
+def cached_litellm_completion(request: Dict[str, Any], num_retries: int, hedging: Optional[Hedging] = None):
     return litellm_completion(
         request,
-        cache={"no-cache": False, "no-store": False},
+        cache=_litellm_cache_args(),
         num_retries=num_retries,
+        hedging=hedging,
     )
 
 
-def litellm_completion(request: Dict[str, Any], num_retries: int, cache={"no-cache": True, "no-store": True}):
+def litellm_completion(
+    request: Dict[str, Any],
+    num_retries: int,
+    cache={"no-cache": True, "no-store": True},
+    hedging: Optional[Hedging] = None,
+):
     retry_kwargs = dict(
         retry_policy=_get_litellm_retry_policy(num_retries),
         # In LiteLLM version 1.55.3 (the first version that supports retry_policy as an argument
@@ -297,16 +416,81 @@ def litellm_completion(request: Dict[str, Any], num_retries: int, cache={"no-cac
 
     stream = aletheia.settings.send_stream
     if stream is None:
-        return litellm.completion(
+
+        def send(request):
+            return call_with_rate_limit(
+                request,
+                num_retries,
+                lambda: litellm.completion(
+                    cache=cache,
+                    **retry_kwargs,
+                    **request,
+                ),
+            )
+
+        return hedging.call(send, request) if hedging else send(request)
+
+    # The stream is already opened, and will be closed by the caller.
+    stream = cast(MemoryObjectSendStream, stream)
+
+    @syncify
+    async def stream_completion():
+        response = await litellm.acompletion(
             cache=cache,
+            stream=True,
             **retry_kwargs,
             **request,
         )
+        chunks = []
+        async for chunk in response:
+            chunks.append(chunk)
+            await stream.send(chunk)
+        return litellm.stream_chunk_builder(chunks)
+
+    return call_with_rate_limit(request, num_retries, stream_completion)
+
+
+@request_cache(key_prefix="litellm_completion")
+async def cached_alitellm_completion(request: Dict[str, Any], num_retries: int, hedging: Optional[Hedging] = None):
+    return await alitellm_completion(
+        request,
+        cache=_litellm_cache_args(),
+        num_retries=num_retries,
+        hedging=hedging,
+    )
+
+
+async def alitellm_completion(
+    request: Dict[str, Any],
+    num_retries: int,
+    cache={"no-cache": True, "no-store": True},
+    hedging: Optional[Hedging] = None,
+):
+    retry_kwargs = dict(
+        retry_policy=_get_litellm_retry_policy(num_retries),
+        # See the note in `litellm_completion` on why max_retries is set to 0
+        max_retries=0,
+    )
+
+    stream = aletheia.settings.send_stream
+    if stream is None:
+
+        async def send(request):
+            return await acall_with_rate_limit(
+                request,
+                num_retries,
+                lambda: litellm.acompletion(
+                    cache=cache,
+                    **retry_kwargs,
+                    **request,
+                ),
+            )
+
+        return await hedging.acall(send, request) if hedging else await send(request)
 
     # The stream is already opened, and will be closed by the caller.
     stream = cast(MemoryObjectSendStream, stream)
 
-    @syncify
     async def stream_completion():
         response = await litellm.acompletion(
             cache=cache,
@@ -320,19 +504,75 @@ def litellm_completion(request: Dict[str, Any], num_retries: int, cache={"no-cac
             await stream.send(chunk)
         return litellm.stream_chunk_builder(chunks)
 
-    return stream_completion()
+    return await acall_with_rate_limit(request, num_retries, stream_completion)
 
 
-@request_cache(maxsize=None)
-def cached_litellm_text_completion(request: Dict[str, Any], num_retries: int):
+@request_cache(key_prefix="litellm_text_completion")
+def cached_litellm_text_completion(request: Dict[str, Any], num_retries: int, hedging: Optional[Hedging] = None):
     return litellm_text_completion(
         request,
         num_retries=num_retries,
-        cache={"no-cache": False, "no-store": False},
+        cache=_litellm_cache_args(),
+        hedging=hedging,
     )
 
 
-def litellm_text_completion(request: Dict[str, Any], num_retries: int, cache={"no-cache": True, "no-store": True}):
+def litellm_text_completion(
+    request: Dict[str, Any],
+    num_retries: int,
+    cache={"no-cache": True, "no-store": True},
+    hedging: Optional[Hedging] = None,
+):
+    def send(request):
+        return call_with_rate_limit(
+            request,
+            num_retries,
+            lambda: litellm.text_completion(
+                cache=cache,
+                **_build_text_completion_request(request, num_retries),
+            ),
+        )
+
+    return hedging.call(send, request) if hedging else send(request)
+
+
+@request_cache(key_prefix="litellm_text_completion")
+async def cached_alitellm_text_completion(
+    request: Dict[str, Any], num_retries: int, hedging: Optional[Hedging] = None
+):
+    return await alitellm_text_completion(
+        request,
+        num_retries=num_retries,
+        cache=_litellm_cache_args(),
+        hedging=hedging,
+    )
+
+
+async def alitellm_text_completion(
+    request: Dict[str, Any],
+    num_retries: int,
+    cache={"no-cache": True, "no-store": True},
+    hedging: Optional[Hedging] = None,
+):
+    async def send(request):
+        return await acall_with_rate_limit(
+            request,
+            num_retries,
+            lambda: litellm.atext_completion(
+                cache=cache,
+                **_build_text_completion_request(request, num_retries),
+            ),
+        )
+
+    return await hedging.acall(send, request) if hedging else await send(request)
+
+
+def _build_text_completion_request(request: Dict[str, Any], num_retries: int) -> Dict[str, Any]:
+    """
+    Translate a chat-style aletheia LM request into the keyword arguments of a LiteLLM text completion call.
+    """
+    request = dict(request)
+
     # Extract the provider and model from the model string.
     # TODO: Not all the models are in the format of "provider/model"
     model = request.pop("model").split("/", 1)
@@ -345,8 +585,7 @@ def litellm_text_completion(request: Dict[str, Any], num_retries: int, cache={"n
     # Build the prompt from the messages.
     prompt = "\n\n".join([x["content"] for x in request.pop("messages")] + ["BEGIN RESPONSE:"])
 
-    return litellm.text_completion(
-        cache=cache,
+    return dict(
         model=f"text-completion-openai/{model}",
         api_key=api_key,
         api_base=api_base,
@@ -360,9 +599,21 @@ def litellm_text_completion(request: Dict[str, Any], num_retries: int, cache={"n
     )
 
 
+def _litellm_cache_args() -> Dict[str, bool]:
+    """
+    Get the LiteLLM cache control arguments for requests that go through the aletheia LM cache. LiteLLM's own disk
+    cache is skipped when the LM cache already persists responses (e.g. a tiered memory → disk cache), so that
+    responses are not stored on disk twice.
+    """
+    skip = getattr(settings.lm_cache, "persistent", False)
+    return {"no-cache": skip, "no-store": skip}
+
+
 def _get_litellm_retry_policy(num_retries: int) -> RetryPolicy:
     """
-    Get a LiteLLM retry policy for retrying requests when transient API errors occur.
+    Get a LiteLLM retry policy for retrying requests when transient API errors occur. Rate limit errors are
+    retried by the rate limiter of the model deployment instead (see `aletheia.clients.rate_limiter`), so that
+    the backoff applies to all the requests sent to the deployment.
     Args:
         num_retries: The number of times to retry a request if it fails transiently due to
                      network error, rate limiting, etc. Requests are retried with exponential
@@ -372,7 +623,7 @@ def _get_litellm_retry_policy(num_retries: int) -> RetryPolicy:
     """
     return RetryPolicy(
         TimeoutErrorRetries=num_retries,
-        RateLimitErrorRetries=num_retries,
+        RateLimitErrorRetries=0,
         InternalServerErrorRetries=num_retries,
         ContentPolicyViolationErrorRetries=num_retries,
         # We don't retry on errors that are unlikely to be transient
@@ -0,0 +1,342 @@
+import asyncio
+import contextvars
+import logging
+import random
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import litellm
+
+logger = logging.getLogger(__name__)
+
+# Factors by which the effective limits shrink on a rate limit error, and grow back on each successful request
+RATE_LIMIT_DECREASE_FACTOR = 0.7
+RATE_LIMIT_INCREASE_FACTOR = 1.01
+
+# Backoff applied after a rate limit error that doesn't tell how long to wait, in seconds
+INITIAL_BACKOFF = 0.5
+MAX_BACKOFF = 8.0
+
+# Functions called with each rate limit error of the requests sent in the current context, e.g. by ParallelExecutor
+# to adapt its concurrency. Set with `listen_to_rate_limits`.
+rate_limit_listeners: contextvars.ContextVar[Tuple[Callable[[Exception], None], ...]] = contextvars.ContextVar(
+    "aletheia_rate_limit_listeners", default=()
+)
+
+
+class RateLimiter:
+    """
+    A token bucket limiter enforcing a requests-per-minute (RPM) and a tokens-per-minute (TPM) budget for one
+    model deployment. Requests reserve capacity before being sent and wait until the budgets allow them, so that
+    concurrent threads spread their requests over time instead of bursting into the provider's rate limits.
+
+    The effective limits adapt to the provider's feedback:
+        - The limits reported in `x-ratelimit-limit-*` response headers cap the configured budgets, and a request
+          budget exhausted according to the `x-ratelimit-remaining-*` headers pauses requests until it resets.
+        - On a rate limit (429) error, the effective limits shrink and requests pause for the time requested by
+          the provider, or an exponential backoff. The limits then grow back with each successful request.
+
+    A limiter without configured or reported limits doesn't delay requests, except for the pauses that follow
+    rate limit errors.
+    """
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        """
+        Args:
+            rpm: The maximum number of requests per minute. If None, the limit reported by the provider is used.
+            tpm: The maximum number of tokens (prompt and completion) per minute. If None, the limit reported by
+                the provider is used.
+        """
+        self._lock = threading.Lock()
+        self._configured = {"requests": rpm, "tokens": tpm}
+        self._reported: Dict[str, Optional[float]] = {"requests": None, "tokens": None}
+        self._limits: Dict[str, Optional[float]] = {"requests": rpm, "tokens": tpm}
+        self._available: Dict[str, float] = {"requests": rpm or 0.0, "tokens": tpm or 0.0}
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+
+        self._throttled = 0
+        self._wait_time = 0.0
+
+    def configure(self, rpm: Optional[float] = None, tpm: Optional[float] = None) -> None:
+        """Set the requests-per-minute and tokens-per-minute budgets. Budgets passed as None are left unchanged."""
+        with self._lock:
+            for resource, limit in (("requests", rpm), ("tokens", tpm)):
+                if limit is not None:
+                    previous_limit = self._limits[resource]
+                    self._configured[resource] = limit
+                    self._limits[resource] = self._ceiling(resource)
+                    if previous_limit is None:
+                        self._available[resource] = self._limits[resource]
+                    else:
+                        self._available[resource] = min(self._available[resource], self._limits[resource])
+
+    @property
+    def rpm(self) -> Optional[float]:
+        """The current effective requests-per-minute limit."""
+        return self._limits["requests"]
+
+    @property
+    def tpm(self) -> Optional[float]:
+        """The current effective tokens-per-minute limit."""
+        return self._limits["tokens"]
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Wait until a request using `tokens` tokens fits in the budgets, and reserve it. Returns the time waited."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, tokens: int = 0) -> float:
+        """The async counterpart of `acquire`."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def record_success(self, estimated_tokens: int = 0, response: Any = None) -> None:
+        """
+        Record a successful response: reconcile the reserved tokens with the actual usage, apply the rate limit
+        headers of the response, and let the effective limits grow back towards their ceilings.
+        """
+        actual_tokens = getattr(getattr(response, "usage", None), "total_tokens", None)
+        hidden_params = getattr(response, "_hidden_params", None)
+        headers = hidden_params.get("additional_headers") if isinstance(hidden_params, dict) else None
+
+        with self._lock:
+            if isinstance(actual_tokens, int) and self._limits["tokens"] is not None:
+                self._available["tokens"] += estimated_tokens - actual_tokens
+
+            if isinstance(headers, dict):
+                self._apply_headers(headers)
+
+            for resource in ("requests", "tokens"):
+                limit, ceiling = self._limits[resource], self._ceiling(resource)
+                if limit is not None:
+                    self._limits[resource] = limit * RATE_LIMIT_INCREASE_FACTOR
+                    if ceiling is not None:
+                        self._limits[resource] = min(self._limits[resource], ceiling)
+
+    def record_rate_limit(self, retry_after: Optional[float] = None, attempt: int = 0) -> float:
+        """
+        Record a rate limit error: shrink the effective limits and pause all requests for `retry_after` seconds,
+        or an exponential backoff based on the number of the failed `attempt`. Returns the pause duration.
+        """
+        if retry_after is None or not 0 < retry_after <= 60:
+            retry_after = min(INITIAL_BACKOFF * 2**attempt, MAX_BACKOFF) * (1 - 0.25 * random.random())
+
+        with self._lock:
+            now = time.monotonic()
+            self._throttled += 1
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+
+            for resource in ("requests", "tokens"):
+                if self._limits[resource] is not None:
+                    self._limits[resource] = max(self._limits[resource] * RATE_LIMIT_DECREASE_FACTOR, 1.0)
+                    self._available[resource] = min(self._available[resource], 0.0)
+
+        return retry_after
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the effective limits and the number of rate limit errors and the total time spent waiting."""
+        with self._lock:
+            return {
+                "rpm": self._limits["requests"],
+                "tpm": self._limits["tokens"],
+                "throttled": self._throttled,
+                "wait_time": self._wait_time,
+            }
+
+    def _reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            # Capacity is reserved immediately, possibly driving the buckets into debt that later requests wait for.
+            wait = max(self._blocked_until - now, 0.0)
+            for resource, amount in (("requests", 1), ("tokens", tokens)):
+                limit = self._limits[resource]
+                if limit is None:
+                    continue
+                self._available[resource] -= amount
+                if self._available[resource] < 0:
+                    wait = max(wait, -self._available[resource] * 60.0 / limit)
+
+            self._wait_time += wait
+            return wait
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        for resource, limit in self._limits.items():
+            if limit is not None:
+                # At most a minute's worth of capacity can accumulate, bounding the size of bursts.
+                self._available[resource] = min(self._available[resource] + elapsed * limit / 60.0, limit)
+
+    def _ceiling(self, resource: str) -> Optional[float]:
+        limits = [limit for limit in (self._configured[resource], self._reported[resource]) if limit is not None]
+        return min(limits) if limits else None
+
+    def _apply_headers(self, headers: Dict[str, Any]) -> None:
+        for resource in ("requests", "tokens"):
+            reported = _parse_number(headers.get(f"x-ratelimit-limit-{resource}"))
+            if reported is not None and reported != self._reported[resource]:
+                self._reported[resource] = reported
+                ceiling = self._ceiling(resource)
+                limit = self._limits[resource]
+                self._limits[resource] = ceiling if limit is None else min(limit, ceiling)
+                if limit is None:
+                    self._available[resource] = ceiling
+
+            remaining = _parse_number(headers.get(f"x-ratelimit-remaining-{resource}"))
+            if remaining is not None and remaining <= 0:
+                reset = _parse_duration(headers.get(f"x-ratelimit-reset-{resource}"))
+                if reset is not None:
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + reset)
+
+
+_RATE_LIMITERS: Dict[Tuple[str, Optional[str]], RateLimiter] = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(model: str, api_base: Optional[str] = None) -> RateLimiter:
+    """Get the process-wide rate limiter of a model deployment, identified by its model name and API base."""
+    key = (model, api_base)
+    with _RATE_LIMITERS_LOCK:
+        if key not in _RATE_LIMITERS:
+            _RATE_LIMITERS[key] = RateLimiter()
+        return _RATE_LIMITERS[key]
+
+
+def configure_rate_limit(
+    model: str, rpm: Optional[float] = None, tpm: Optional[float] = None, api_base: Optional[str] = None
+) -> RateLimiter:
+    """
+    Set the requests-per-minute and tokens-per-minute budgets shared by all requests to a model deployment in
+    this process.
+
+    Example:
+
+    ```python
+    import aletheia
+    from aletheia.clients.rate_limiter import configure_rate_limit
+
+    configure_rate_limit("openai/gpt-4o-mini", rpm=5000, tpm=2_000_000)
+    ```
+    """
+    limiter = get_rate_limiter(model, api_base)
+    limiter.configure(rpm=rpm, tpm=tpm)
+    return limiter
+
+
+def estimate_request_tokens(request: Dict[str, Any]) -> int:
+    """
+    Roughly estimate the number of tokens used by an LM request, before it is sent: about four characters per
+    prompt token, plus the maximum number of completion tokens for each generation.
+    """
+    chars = 0
+    for message in request.get("messages") or []:
+        content = message.get("content")
+        if isinstance(content, str):
+            chars += len(content)
+        elif isinstance(content, list):
+            chars += sum(len(part.get("text", "")) for part in content if isinstance(part, dict))
+
+    max_tokens = request.get("max_tokens") or request.get("max_completion_tokens") or 0
+    return chars // 4 + max_tokens * (request.get("n") or 1)
+
+
+def call_with_rate_limit(request: Dict[str, Any], num_retries: int, call: Callable[[], Any]) -> Any:
+    """
+    Send an LM request through the rate limiter of its model deployment, retrying it up to `num_retries` times
+    on rate limit errors.
+    """
+    limiter = get_rate_limiter(request["model"], request.get("api_base"))
+    tokens = estimate_request_tokens(request)
+
+    for attempt in range(num_retries + 1):
+        limiter.acquire(tokens)
+        try:
+            response = call()
+        except litellm.RateLimitError as e:
+            if attempt == num_retries:
+                raise
+            wait = limiter.record_rate_limit(_get_retry_after(e), attempt)
+            logger.debug(f"Rate limited by {request['model']}, retrying in {wait:.2f}s: {e}")
+            _notify_rate_limit(e)
+            continue
+        limiter.record_success(tokens, response)
+        return response
+
+
+async def acall_with_rate_limit(request: Dict[str, Any], num_retries: int, call: Callable[[], Awaitable[Any]]) -> Any:
+    """The async counterpart of `call_with_rate_limit`."""
+    limiter = get_rate_limiter(request["model"], request.get("api_base"))
+    tokens = estimate_request_tokens(request)
+
+    for attempt in range(num_retries + 1):
+        await limiter.aacquire(tokens)
+        try:
+            response = await call()
+        except litellm.RateLimitError as e:
+            if attempt == num_retries:
+                raise
+            wait = limiter.record_rate_limit(_get_retry_after(e), attempt)
+            logger.debug(f"Rate limited by {request['model']}, retrying in {wait:.2f}s: {e}")
+            _notify_rate_limit(e)
+            continue
+        limiter.record_success(tokens, response)
+        return response
+
+
+def listen_to_rate_limits(listener: Callable[[Exception], None]) -> contextvars.Token:
+    """
+    Call `listener` with each rate limit error of the requests sent in the current context, including the errors
+    that are retried. Returns the token to reset `rate_limit_listeners` with.
+    """
+    return rate_limit_listeners.set((*rate_limit_listeners.get(), listener))
+
+
+def _notify_rate_limit(error: Exception) -> None:
+    for listener in rate_limit_listeners.get():
+        try:
+            listener(error)
+        except Exception as e:
+            logger.warning(f"Error in rate limit listener {listener!r}: {e}")
+
+
+def _get_retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is None:
+        return None
+    retry_after = _parse_number(headers.get("retry-after-ms"))
+    if retry_after is not None:
+        return retry_after / 1000
+    return _parse_number(headers.get("retry-after"))
+
+
+def _parse_number(value: Any) -> Optional[float]:
+    if not isinstance(value, (str, int, float)):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _parse_duration(value: Any) -> Optional[float]:
+    """Parse a rate limit reset duration such as "20ms", "1.5s" or "6m0s" into seconds."""
+    if value is None:
+        return None
+    number = _parse_number(value)
+    if number is not None:
+        return number
+
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", str(value))
+    if not parts:
+        return None
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(amount) * units[unit] for amount, unit in parts)
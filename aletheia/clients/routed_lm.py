@@ -0,0 +1,242 @@
+import copy
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, List, Literal, Optional
+
+import litellm
+
+from aletheia.clients.base_lm import BaseLM
+from aletheia.clients.history import LMHistory
+
+logger = logging.getLogger(__name__)
+
+# Errors caused by the request itself rather than by the endpoint, which would fail on any endpoint
+_REQUEST_ERRORS = (litellm.BadRequestError,)
+
+
+class _Endpoint:
+    """The load, latency and health statistics of one deployment of a `RoutedLM`."""
+
+    def __init__(self, lm: BaseLM):
+        self.lm = lm
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.probing = False
+
+    @property
+    def api_base(self) -> Optional[str]:
+        return self.lm.kwargs.get("api_base")
+
+
+class RoutedLM(BaseLM):
+    """
+    A language model that routes each request to one of several deployments of the same model, e.g. several
+    local SGLang servers launched with `LocalProvider`, or several API keys or regions of a hosted model.
+    It can be used anywhere an LM is expected, including `aletheia.configure(lm=...)`.
+
+    Each request is sent to the least loaded (or, with `strategy="latency"`, the fastest) healthy endpoint.
+    If the endpoint fails, the request is retried on the next best one. Endpoints failing `failure_threshold`
+    requests in a row are ejected for `cooldown` seconds, after which a single probe request decides whether
+    they rejoin the pool.
+
+    Example:
+
+    ```python
+    import aletheia
+
+    lm = aletheia.RoutedLM(
+        [
+            aletheia.LM("openai/meta-llama/Llama-3.1-8B-Instruct", api_base="http://node-1:7501/v1", api_key="local"),
+            aletheia.LM("openai/meta-llama/Llama-3.1-8B-Instruct", api_base="http://node-2:7501/v1", api_key="local"),
+        ]
+    )
+    aletheia.configure(lm=lm)
+    ```
+
+    Responses are cached by each endpoint's LM, so an identical request may miss the cache if it's routed to a
+    different endpoint than before.
+    """
+
+    def __init__(
+        self,
+        lms: List[BaseLM],
+        strategy: Literal["least_loaded", "latency"] = "least_loaded",
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        latency_smoothing: float = 0.2,
+    ):
+        """
+        Args:
+            lms: The LMs of the deployments to route requests to. They must be of the same model type.
+            strategy: How to choose the endpoint of a request: "least_loaded" picks the endpoint with the fewest
+                requests in flight, and "latency" picks the endpoint with the lowest expected latency given its
+                recent response times and its requests in flight.
+            failure_threshold: The number of consecutive failures after which an endpoint is ejected.
+            cooldown: The number of seconds for which an ejected endpoint receives no requests.
+            latency_smoothing: The weight of the latest response time in the moving average of an endpoint's
+                latency.
+        """
+        if not lms:
+            raise ValueError("`RoutedLM` requires at least one LM.")
+        if len({lm.model_type for lm in lms}) > 1:
+            raise ValueError("All the LMs of a `RoutedLM` must have the same model type.")
+        if strategy not in ("least_loaded", "latency"):
+            raise ValueError(f"Unknown routing strategy: {strategy}. Expected 'least_loaded' or 'latency'.")
+
+        first = lms[0]
+        self.model = first.model
+        self.model_type = first.model_type
+        self.cache = first.cache
+        self.kwargs = {k: v for k, v in first.kwargs.items() if not k.startswith("api_")}
+        self.history = LMHistory()
+
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.latency_smoothing = latency_smoothing
+
+        self._endpoints = [_Endpoint(lm) for lm in lms]
+        self._lock = threading.Lock()
+
+    @property
+    def lms(self) -> List[BaseLM]:
+        return [endpoint.lm for endpoint in self._endpoints]
+
+    def forward(self, prompt=None, messages=None, **kwargs):
+        tried = []
+        while True:
+            endpoint = self._acquire_endpoint(exclude=tried)
+            start = time.monotonic()
+            try:
+                response = endpoint.lm.forward(prompt=prompt, messages=messages, **kwargs)
+            except Exception as e:
+                if not self._handle_failure(endpoint, e, tried):
+                    raise
+                continue
+            self._record_success(endpoint, time.monotonic() - start)
+            return response
+
+    async def aforward(self, prompt=None, messages=None, **kwargs):
+        tried = []
+        while True:
+            endpoint = self._acquire_endpoint(exclude=tried)
+            start = time.monotonic()
+            try:
+                response = await endpoint.lm.aforward(prompt=prompt, messages=messages, **kwargs)
+            except Exception as e:
+                if not self._handle_failure(endpoint, e, tried):
+                    raise
+                continue
+            self._record_success(endpoint, time.monotonic() - start)
+            return response
+
+    def launch(self, launch_kwargs: Optional[Dict[str, Any]] = None):
+        for lm in self.lms:
+            lm.launch(launch_kwargs)
+
+    def kill(self, launch_kwargs: Optional[Dict[str, Any]] = None):
+        for lm in self.lms:
+            lm.kill(launch_kwargs)
+
+    def copy(self, **kwargs):
+        """Returns a router over copies of the endpoint LMs with possibly updated parameters."""
+        return RoutedLM(
+            [lm.copy(**kwargs) for lm in self.lms],
+            strategy=self.strategy,
+            failure_threshold=self.failure_threshold,
+            cooldown=self.cooldown,
+            latency_smoothing=self.latency_smoothing,
+        )
+
+    def __deepcopy__(self, memo):
+        new_instance = RoutedLM(
+            [copy.deepcopy(lm, memo) for lm in self.lms],
+            strategy=self.strategy,
+            failure_threshold=self.failure_threshold,
+            cooldown=self.cooldown,
+            latency_smoothing=self.latency_smoothing,
+        )
+        new_instance.history = copy.deepcopy(self.history, memo)
+        return new_instance
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return the load, latency and health statistics of each endpoint."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "api_base": endpoint.api_base,
+                    "in_flight": endpoint.in_flight,
+                    "latency": endpoint.latency,
+                    "requests": endpoint.requests,
+                    "failures": endpoint.failures,
+                    "healthy": endpoint.open_until <= now,
+                }
+                for endpoint in self._endpoints
+            ]
+
+    def _acquire_endpoint(self, exclude: List[_Endpoint]) -> _Endpoint:
+        with self._lock:
+            now = time.monotonic()
+            candidates = [endpoint for endpoint in self._endpoints if endpoint not in exclude]
+            healthy = [endpoint for endpoint in candidates if self._is_available(endpoint, now)]
+
+            if healthy:
+                endpoint = min(healthy, key=lambda endpoint: (self._cost(endpoint), random.random()))
+            else:
+                # Every endpoint is ejected: rather than failing outright, try the one that recovers first.
+                endpoint = min(candidates, key=lambda endpoint: endpoint.open_until)
+
+            if endpoint.open_until > 0 and endpoint.open_until <= now:
+                # The cooldown has elapsed: this request probes whether the endpoint has recovered.
+                endpoint.probing = True
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def _is_available(self, endpoint: _Endpoint, now: float) -> bool:
+        if endpoint.open_until == 0:
+            return True
+        # An ejected endpoint receives a single probe request once its cooldown has elapsed.
+        return endpoint.open_until <= now and not endpoint.probing
+
+    def _cost(self, endpoint: _Endpoint) -> float:
+        if self.strategy == "least_loaded":
+            return endpoint.in_flight
+        # Endpoints without latency measurements are tried first, so that every endpoint gets measured.
+        return (endpoint.latency or 0.0) * (endpoint.in_flight + 1)
+
+    def _record_success(self, endpoint: _Endpoint, latency: float) -> None:
+        with self._lock:
+            endpoint.in_flight -= 1
+            endpoint.consecutive_failures = 0
+            endpoint.open_until = 0.0
+            endpoint.probing = False
+            if endpoint.latency is None:
+                endpoint.latency = latency
+            else:
+                endpoint.latency += self.latency_smoothing * (latency - endpoint.latency)
+
+    def _handle_failure(self, endpoint: _Endpoint, error: Exception, tried: List[_Endpoint]) -> bool:
+        """Record a failed request, and return whether it should be retried on another endpoint."""
+        with self._lock:
+            endpoint.in_flight -= 1
+            if isinstance(error, _REQUEST_ERRORS):
+                endpoint.probing = False
+                return False
+
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            if endpoint.probing or endpoint.consecutive_failures >= self.failure_threshold:
+                logger.warning(f"Ejecting endpoint {endpoint.api_base} for {self.cooldown}s after error: {error}")
+                endpoint.open_until = time.monotonic() + self.cooldown
+            endpoint.probing = False
+
+            tried.append(endpoint)
+            return len(tried) < len(self._endpoints)
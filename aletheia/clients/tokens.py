@@ -0,0 +1,135 @@
+import functools
+import threading
+from typing import Any, Dict, List, Optional
+
+import litellm
+
+# Number of characters per token assumed for models without a local tokenizer, until calibrated against the
+# prompt token counts reported by the provider
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+# Weight of the latest observation in the moving average of a model's characters per token
+CALIBRATION_SMOOTHING = 0.2
+
+# Tokens added by chat formatting to each message, and to each prompt to prime the reply
+TOKENS_PER_MESSAGE = 4
+TOKENS_PER_PROMPT = 3
+
+# Tokens assumed for each image of a prompt, which aren't counted from the message text
+TOKENS_PER_IMAGE = 765
+
+_CONTEXT_WINDOWS: Dict[str, int] = {}
+_CHARS_PER_TOKEN: Dict[str, float] = {}
+_lock = threading.Lock()
+
+
+def register_context_window(model: str, max_input_tokens: int) -> None:
+    """
+    Register the context window of a model, e.g. a local or fine-tuned model that LiteLLM doesn't know about, or
+    override the one known by LiteLLM.
+    """
+    with _lock:
+        _CONTEXT_WINDOWS[model] = max_input_tokens
+
+
+def get_context_window(model: str) -> Optional[int]:
+    """Return the maximum number of input tokens of a model, or None if it's unknown."""
+    with _lock:
+        if model in _CONTEXT_WINDOWS:
+            return _CONTEXT_WINDOWS[model]
+    return _litellm_context_window(model)
+
+
+def count_tokens(model: str, messages: Optional[List[Dict[str, Any]]] = None, prompt: Optional[str] = None) -> int:
+    """
+    Count the tokens of a chat prompt, given as `messages`, or of a text `prompt`, without sending a request.
+
+    Models with a tokenizer available locally (e.g. OpenAI models, through `tiktoken`) get an exact count of the
+    text tokens. Other models get an estimate based on the number of characters, calibrated with the prompt token
+    counts reported in the responses of the model (see `calibrate_token_count`).
+    """
+    if messages is None:
+        texts, overhead = [prompt or ""], 0
+    else:
+        texts, overhead = [], TOKENS_PER_PROMPT
+        for message in messages:
+            overhead += TOKENS_PER_MESSAGE
+            content = message.get("content")
+            if isinstance(content, str):
+                texts.append(content)
+            elif isinstance(content, list):
+                for part in content:
+                    if not isinstance(part, dict):
+                        continue
+                    if part.get("type") == "image_url":
+                        overhead += TOKENS_PER_IMAGE
+                    elif isinstance(part.get("text"), str):
+                        texts.append(part["text"])
+
+    encoding = _get_encoding(model)
+    if encoding is not None:
+        return overhead + sum(len(encoding.encode(text, disallowed_special=())) for text in texts)
+
+    with _lock:
+        chars_per_token = _CHARS_PER_TOKEN.get(model, DEFAULT_CHARS_PER_TOKEN)
+    return overhead + int(sum(len(text) for text in texts) / chars_per_token)
+
+
+def calibrate_token_count(
+    model: str, prompt_tokens: Any, messages: Optional[List[Dict[str, Any]]] = None, prompt: Optional[str] = None
+) -> None:
+    """
+    Refine the characters-per-token ratio used to estimate the token counts of a model without a local tokenizer,
+    given the number of prompt tokens reported by the provider for a request.
+    """
+    if not isinstance(prompt_tokens, int) or _get_encoding(model) is not None:
+        return
+
+    if messages is None:
+        chars, overhead = len(prompt or ""), 0
+    else:
+        chars, overhead = 0, TOKENS_PER_PROMPT + TOKENS_PER_MESSAGE * len(messages)
+        for message in messages:
+            content = message.get("content")
+            if isinstance(content, str):
+                chars += len(content)
+            elif isinstance(content, list):
+                # Prompts with images can't be calibrated reliably, as their tokens don't depend on the text.
+                return
+
+    text_tokens = prompt_tokens - overhead
+    if chars < 100 or text_tokens <= 0:
+        return
+
+    with _lock:
+        previous = _CHARS_PER_TOKEN.get(model, DEFAULT_CHARS_PER_TOKEN)
+        _CHARS_PER_TOKEN[model] = previous + CALIBRATION_SMOOTHING * (chars / text_tokens - previous)
+
+
+def _model_names(model: str) -> List[str]:
+    # LiteLLM model names are of the form "provider/model", while tokenizers and cost maps may only know the model.
+    return [model, model.split("/", 1)[-1]] if "/" in model else [model]
+
+
+@functools.lru_cache(maxsize=None)
+def _litellm_context_window(model: str) -> Optional[int]:
+    for name in _model_names(model):
+        info = litellm.model_cost.get(name)
+        if info:
+            return info.get("max_input_tokens") or info.get("max_tokens")
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+
+    for name in _model_names(model):
+        try:
+            return tiktoken.encoding_for_model(name)
+        except Exception:
+            continue
+    return None
@@ -3,8 +3,10 @@ from typing import Any, List, Optional, Union
 
 import requests
 
+from aletheia.cache.keys import request_cache_key
 from aletheia.dsp.cache_utils import CacheMemory, NotebookCacheMemory
 from aletheia.dsp.utils import dotdict
+from aletheia.dsp.utils.settings import settings
 
 # TODO: Ideally, this takes the name of the index and looks up its port.
 
@@ -24,16 +26,31 @@ class ColBERTv2:
     def __call__(
         self, query: str, k: int = 10, simplify: bool = False,
     ) -> Union[list[str], list[dotdict]]:
-        if self.post_requests:
-            topk: list[dict[str, Any]] = colbertv2_post_request(self.url, query, k)
-        else:
-            topk: list[dict[str, Any]] = colbertv2_get_request(self.url, query, k)
+        topk: list[dict[str, Any]] = self._request(query, k)
 
         if simplify:
             return [psg["long_text"] for psg in topk]
 
         return [dotdict(psg) for psg in topk]
 
+    def _request(self, query: str, k: int) -> list[dict[str, Any]]:
+        request = colbertv2_post_request if self.post_requests else colbertv2_get_request
+
+        retriever_cache = settings.retriever_cache
+        if retriever_cache is None:
+            return request(self.url, query, k)
+
+        # When a retriever cache is configured, it is used instead of the legacy joblib caches.
+        key = "colbertv2:" + request_cache_key(dict(url=self.url, query=query, k=k, post=self.post_requests))
+        topk = retriever_cache.get(key)
+        if topk is None:
+            request = colbertv2_post_request_v2 if self.post_requests else colbertv2_get_request_v2
+            # Unwrap the joblib cache (or the no-op decorator used when it is disabled).
+            request = getattr(request, "func", None) or request.__wrapped__
+            topk = request(self.url, query, k)
+            retriever_cache.put(key, topk)
+        return topk
+
 
 @CacheMemory.cache
 def colbertv2_get_request_v2(url: str, query: str, k: int):
@@ -1,7 +1,10 @@
+import contextvars
 import copy
 import threading
+from collections.abc import Mapping
 from contextlib import contextmanager
 
+from aletheia.cache.memory import MemoryCache
 from aletheia.dsp.utils.utils import dotdict
 
 DEFAULT_CONFIG = dotdict(
@@ -18,26 +21,82 @@ DEFAULT_CONFIG = dotdict(
     backoff_time=10,
     callbacks=[],
     async_max_workers=8,
+    max_parallel_workers=None,
     send_stream=None,
     disable_history=False,
+    max_history_size=10000,
+    history_include_response=False,
+    history_sink=None,
     track_usage=False,
     usage_tracker=None,
+    lm_cache=MemoryCache(),
+    embedding_cache=None,
+    retriever_cache=None,
 )
 
 # Global base configuration and owner tracking
 main_thread_config = copy.deepcopy(DEFAULT_CONFIG)
 config_owner_thread_id = None
 
+# Incremented on each change of the global configuration, to invalidate the settings snapshots
+config_version = 0
+
 # Global lock for settings configuration
 global_lock = threading.Lock()
 
 
-class ThreadLocalOverrides(threading.local):
-    def __init__(self):
-        self.overrides = dotdict()
+class Overrides:
+    """
+    A layer of settings overrides, set by `aletheia.context`. Layers are never modified once set, so that the
+    contexts they are propagated to (threads, asyncio tasks, callbacks) can share them without copying.
+    """
+
+    __slots__ = ("values", "snapshot")
+
+    def __init__(self, values: dotdict):
+        self.values = values
+        # The last snapshot of the settings with these overrides, with the config version it was taken at
+        self.snapshot = None
+
+
+# The settings overrides of the current context. Context variables are inherited by asyncio tasks, and copied into
+# worker threads with `contextvars.copy_context`, which is O(1).
+current_overrides: contextvars.ContextVar[Overrides] = contextvars.ContextVar(
+    "aletheia_settings_overrides", default=Overrides(dotdict())
+)
+
 
+class SettingsSnapshot(Mapping):
+    """
+    A read-only view of the settings at a point in time, with the thread's overrides applied, whose values can be
+    read as attributes (e.g. `snapshot.lm`) without the lookups of `aletheia.settings`.
+    """
 
-thread_local_overrides = ThreadLocalOverrides()
+    __slots__ = ("_config",)
+
+    def __init__(self, config: dict):
+        object.__setattr__(self, "_config", config)
+
+    def __getattr__(self, name):
+        try:
+            return self._config[name]
+        except KeyError:
+            raise AttributeError(f"'SettingsSnapshot' object has no attribute '{name}'") from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings snapshots are read-only, use `aletheia.configure` or `aletheia.context`.")
+
+    def __getitem__(self, key):
+        return self._config[key]
+
+    def __iter__(self):
+        return iter(self._config)
+
+    def __len__(self):
+        return len(self._config)
+
+    def __repr__(self):
+        return f"SettingsSnapshot({self._config!r})"
 
 
 class Settings:
@@ -46,8 +105,8 @@ class Settings:
     Thread-safe global configuration.
     - 'configure' can be called by only one 'owner' thread (the first thread that calls it).
     - Other threads see the configured global values from 'main_thread_config'.
-    - 'context' sets thread-local overrides. These overrides propagate to threads spawned
-      inside that context block, when (and only when!) using a ParallelExecutor that copies overrides.
+    - 'context' sets overrides in the current context (see `contextvars`). These overrides propagate to the asyncio
+      tasks created inside that context block, and to threads spawned with aletheia primitives that copy the context.
 
       1. Only one unique thread (which can be any thread!) can call aletheia.configure.
       2. It affects a global state, visible to all. As a result, user threads work, but they shouldn't be
@@ -68,7 +127,7 @@ class Settings:
         return global_lock
 
     def __getattr__(self, name):
-        overrides = getattr(thread_local_overrides, "overrides", dotdict())
+        overrides = current_overrides.get().values
         if name in overrides:
             return overrides[name]
         elif name in main_thread_config:
@@ -89,7 +148,7 @@ class Settings:
         self.__setattr__(key, value)
 
     def __contains__(self, key):
-        overrides = getattr(thread_local_overrides, "overrides", dotdict())
+        overrides = current_overrides.get().values
         return key in overrides or key in main_thread_config
 
     def get(self, key, default=None):
@@ -99,15 +158,30 @@ class Settings:
             return default
 
     def copy(self):
-        overrides = getattr(thread_local_overrides, "overrides", dotdict())
+        overrides = current_overrides.get().values
         return dotdict({**main_thread_config, **overrides})
 
+    def snapshot(self) -> SettingsSnapshot:
+        """
+        Return the current settings as a read-only `SettingsSnapshot`, for hot paths that read several settings
+        per call. The snapshot is built once per configuration change or `context` block, and reused until then,
+        including by the threads and tasks the context is propagated to.
+        """
+        overrides = current_overrides.get()
+        cached = overrides.snapshot
+        if cached is not None and cached[0] == config_version:
+            return cached[1]
+
+        snapshot = SettingsSnapshot({**main_thread_config, **overrides.values})
+        overrides.snapshot = (config_version, snapshot)
+        return snapshot
+
     @property
     def config(self):
         return self.copy()
 
     def configure(self, **kwargs):
-        global main_thread_config, config_owner_thread_id
+        global main_thread_config, config_owner_thread_id, config_version
         current_thread_id = threading.get_ident()
 
         with self.lock:
@@ -120,26 +194,29 @@ class Settings:
         # Update global config
         for k, v in kwargs.items():
             main_thread_config[k] = v
+        config_version += 1
 
     @contextmanager
     def context(self, **kwargs):
         """
-        Context manager for temporary configuration changes at the thread level.
-        Does not affect global configuration. Changes only apply to the current thread.
-        If threads are spawned inside this block using ParallelExecutor, they will inherit these overrides.
+        Context manager for temporary configuration changes in the current context.
+        Does not affect global configuration. Changes only apply to the current thread or asyncio task.
+        Asyncio tasks created inside this block, and threads spawned using aletheia primitives (ParallelExecutor,
+        asyncify, etc.), inherit these overrides.
         """
 
-        original_overrides = getattr(thread_local_overrides, "overrides", dotdict()).copy()
-        new_overrides = dotdict({**main_thread_config, **original_overrides, **kwargs})
-        thread_local_overrides.overrides = new_overrides
+        # The overrides are replaced rather than updated, so that the enclosing ones, and the snapshots taken from
+        # them, are unaffected. Settings that aren't overridden are still read from the global configuration.
+        original_overrides = current_overrides.get()
+        current_overrides.set(Overrides(dotdict({**original_overrides.values, **kwargs})))
 
         try:
             yield
         finally:
-            thread_local_overrides.overrides = original_overrides
+            current_overrides.set(original_overrides)
 
     def __repr__(self):
-        overrides = getattr(thread_local_overrides, "overrides", dotdict())
+        overrides = current_overrides.get().values
         combined_config = {**main_thread_config, **overrides}
         return repr(combined_config)
 
@@ -9,7 +9,8 @@ import tqdm
 
 import aletheia
 from aletheia.utils.callback import with_callbacks
-from aletheia.utils.parallelizer import ParallelExecutor
+from aletheia.utils.parallelizer import AdaptiveConcurrency, ParallelExecutor
+from aletheia.utils.process_pool import ProcessPool
 
 try:
     from IPython.display import HTML
@@ -60,6 +61,8 @@ class Evaluate:
         return_outputs: bool = False,
         provide_traceback: bool = False,
         failure_score: float = 0.0,
+        metric_processes: Optional[int] = None,
+        adaptive_concurrency: Union[bool, AdaptiveConcurrency] = False,
         **kwargs,
     ):
         """
@@ -75,6 +78,12 @@ class Evaluate:
             return_outputs (bool): Whether to return the aletheia program's outputs for every data in `devset`.
             provide_traceback (bool): Whether to provide traceback information during evaluation.
             failure_score (float): The default score to use if evaluation fails due to an exception.
+            metric_processes (Optional[int]): The number of processes to run the metric in, for CPU-bound metrics.
+                The program still runs in `num_threads` threads. The metric, examples and predictions must be
+                picklable, otherwise the metric runs in the threads. If not provided, the metric runs in the threads.
+            adaptive_concurrency (Union[bool, AdaptiveConcurrency]): Whether to adapt the number of examples evaluated
+                at once to the provider's rate limits and latency, up to `num_threads`. An `AdaptiveConcurrency`
+                instance can be passed to share the learned limit across evaluations.
         """
         self.devset = devset
         self.metric = metric
@@ -86,6 +95,8 @@ class Evaluate:
         self.return_outputs = return_outputs
         self.provide_traceback = provide_traceback
         self.failure_score = failure_score
+        self.metric_processes = metric_processes
+        self.adaptive_concurrency = adaptive_concurrency
 
     @with_callbacks
     def __call__(
@@ -153,11 +164,21 @@ class Evaluate:
             max_errors=self.max_errors,
             provide_traceback=self.provide_traceback,
             compare_results=True,
+            adaptive_concurrency=self.adaptive_concurrency,
         )
 
         def process_item(example):
             prediction = program(**example.inputs())
-            score = metric(example, prediction)
+            return score_prediction(example, prediction)
+
+        def process_batched_item(item):
+            _, example, prediction = item
+            if isinstance(prediction, Exception):
+                raise prediction
+            return score_prediction(example, prediction)
+
+        def score_prediction(example, prediction):
+            score = metric_pool(example, prediction) if metric_pool else metric(example, prediction)
 
             # Increment assert and suggest failures to program's attributes
             if hasattr(program, "_assert_failures"):
@@ -167,7 +188,21 @@ class Evaluate:
 
             return prediction, score
 
-        results = executor.execute(process_item, devset)
+        metric_pool = ProcessPool(metric, self.metric_processes) if self.metric_processes else None
+
+        # The batched path has its own fixed concurrency, so the adaptive concurrency runs the examples one by one.
+        can_batch_forward = hasattr(program, "_can_batch_forward") and program._can_batch_forward()
+
+        try:
+            if can_batch_forward and not self.adaptive_concurrency:
+                # The LM requests are sent in bulk, `num_threads` examples at a time, and the metric runs in the thread
+                # pool, so that the progress and the errors are still accounted as the chunks complete.
+                results = executor.execute(process_batched_item, program._batch_forward_chunks(devset, num_threads))
+            else:
+                results = executor.execute(process_item, devset)
+        finally:
+            if metric_pool:
+                metric_pool.shutdown()
         assert len(devset) == len(results)
 
         results = [((aletheia.Prediction(), self.failure_score) if r is None else r) for r in results]
@@ -169,12 +169,16 @@ class Synthesizer:
         task_description, input_keys, output_keys = self._get_dataset_metadata(ground_source)
 
         if self.config.num_example_for_optim:
-            self.generate_input_data.__doc__ += INPUT_GENERATION_TASK_WITH_EXAMPLES_SUFFIX
+            self.generate_input_data = self.generate_input_data.with_instructions(
+                self.generate_input_data.__doc__ + INPUT_GENERATION_TASK_WITH_EXAMPLES_SUFFIX
+            )
         
         if self.config.feedback_mode:
-            self.generate_input_data.__doc__ += INPUT_GENERATION_TASK_WITH_FEEDBACK_SUFFIX
+            self.generate_input_data = self.generate_input_data.with_instructions(
+                self.generate_input_data.__doc__ + INPUT_GENERATION_TASK_WITH_FEEDBACK_SUFFIX
+            )
 
-        self.generate_output_data.__doc__ = task_description
+        self.generate_output_data = self.generate_output_data.with_instructions(task_description)
 
         self.input_predictor, self.output_predictor = self._prepare_synthetic_data_predictors(
             input_keys=input_keys,
@@ -233,7 +237,7 @@ class Synthesizer:
                     feedback=feedback,
                 ).updated_task_description
 
-                self.output_predictor.signature.__doc__ = task_description
+                self.output_predictor.signature = self.output_predictor.signature.with_instructions(task_description)
 
         return data
 
@@ -35,3 +35,16 @@ class ChainOfThought(Module):
 
     def forward(self, **kwargs):
         return self.predict(**kwargs)
+
+    async def aforward(self, **kwargs):
+        return await self.predict.acall(**kwargs)
+
+    def batch_forward(self, inputs_list, max_concurrency=None):
+        return self.predict.batch_forward(inputs_list, max_concurrency=max_concurrency)
+
+    def _can_batch_forward(self):
+        return (
+            type(self).forward is ChainOfThought.forward
+            and super()._can_batch_forward()
+            and self.predict._can_batch_forward()
+        )
@@ -1,8 +1,8 @@
 import threading
-from typing import Any, List, Tuple
+from typing import Any, List, Tuple, Union
 
 from aletheia.primitives.example import Example
-from aletheia.utils.parallelizer import ParallelExecutor
+from aletheia.utils.parallelizer import AdaptiveConcurrency, ParallelExecutor
 
 
 class Parallel:
@@ -14,6 +14,7 @@ class Parallel:
         return_failed_examples: bool = False,
         provide_traceback: bool = False,
         disable_progress_bar: bool = False,
+        adaptive_concurrency: Union[bool, AdaptiveConcurrency] = False,
     ):
         super().__init__()
         self.num_threads = num_threads
@@ -22,6 +23,7 @@ class Parallel:
         self.return_failed_examples = return_failed_examples
         self.provide_traceback = provide_traceback
         self.disable_progress_bar = disable_progress_bar
+        self.adaptive_concurrency = adaptive_concurrency
 
         self.error_count = 0
         self.error_lock = threading.Lock()
@@ -37,6 +39,7 @@ class Parallel:
             max_errors=self.max_errors,
             provide_traceback=self.provide_traceback,
             disable_progress_bar=self.disable_progress_bar,
+            adaptive_concurrency=self.adaptive_concurrency,
         )
 
         def process_pair(pair):
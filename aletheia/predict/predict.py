@@ -72,7 +72,11 @@ class Predict(Module, Parameter):
     def __call__(self, **kwargs):
         return self.forward(**kwargs)
 
-    def forward(self, **kwargs):
+    @with_callbacks
+    async def acall(self, **kwargs):
+        return await self.aforward(**kwargs)
+
+    def _forward_preprocess(self, **kwargs):
         # Extract the three privileged keyword arguments.
         assert "new_signature" not in kwargs, "new_signature is no longer a valid keyword argument."
         signature = ensure_signature(kwargs.pop("signature", self.signature))
@@ -80,7 +84,7 @@ class Predict(Module, Parameter):
         config = dict(**self.config, **kwargs.pop("config", {}))
 
         # Get the right LM to use.
-        lm = kwargs.pop("lm", self.lm) or settings.lm
+        lm = kwargs.pop("lm", self.lm) or settings.snapshot().lm
         assert isinstance(lm, BaseLM), "No LM is loaded."
 
         # If temperature is 0.0 but its n > 1, set temperature to 0.7.
@@ -96,7 +100,21 @@ class Predict(Module, Parameter):
             missing = [k for k in signature.input_fields if k not in kwargs]
             print(f"WARNING: Not all input fields were provided to module. Present: {present}. Missing: {missing}.")
 
-        adapter = settings.adapter or ChatAdapter()
+        return lm, config, signature, demos, kwargs
+
+    def _forward_postprocess(self, completions, signature, **kwargs):
+        pred = Prediction.from_completions(completions, signature=signature)
+
+        trace = settings.snapshot().trace
+        if kwargs.pop("_trace", True) and trace is not None:
+            trace.append((self, {**kwargs}, pred))
+
+        return pred
+
+    def forward(self, **kwargs):
+        lm, config, signature, demos, kwargs = self._forward_preprocess(**kwargs)
+
+        adapter = settings.snapshot().adapter or ChatAdapter()
         completions = adapter(
             lm,
             lm_kwargs=config,
@@ -105,13 +123,67 @@ class Predict(Module, Parameter):
             inputs=kwargs,
         )
 
-        pred = Prediction.from_completions(completions, signature=signature)
+        return self._forward_postprocess(completions, signature, **kwargs)
 
-        if kwargs.pop("_trace", True) and settings.trace is not None:
-            trace = settings.trace
-            trace.append((self, {**kwargs}, pred))
+    async def aforward(self, **kwargs):
+        lm, config, signature, demos, kwargs = self._forward_preprocess(**kwargs)
 
-        return pred
+        adapter = settings.snapshot().adapter or ChatAdapter()
+        completions = await adapter.acall(
+            lm,
+            lm_kwargs=config,
+            signature=signature,
+            demos=demos,
+            inputs=kwargs,
+        )
+
+        return self._forward_postprocess(completions, signature, **kwargs)
+
+    def batch_forward(self, inputs_list, max_concurrency=None):
+        """
+        Runs the predictor on a batch of inputs, sending the LM requests of the whole batch in bulk through
+        `Adapter.batch_call` instead of one call per input.
+
+        Returns:
+            For each inputs, in order, the `Prediction`, or the exception raised while processing them.
+        """
+        results = [None] * len(inputs_list)
+
+        # Inputs that resolve to the same LM, signature, demos and config are sent to the LM as one batch.
+        groups = {}
+        for i, inputs in enumerate(inputs_list):
+            try:
+                lm, config, signature, demos, kwargs = self._forward_preprocess(**inputs)
+            except Exception as e:
+                results[i] = e
+                continue
+
+            key = (id(lm), id(signature), id(demos), repr(sorted(config.items())))
+            groups.setdefault(key, []).append((i, lm, config, signature, demos, kwargs))
+
+        adapter = settings.snapshot().adapter or ChatAdapter()
+        for group in groups.values():
+            _, lm, config, signature, demos, _ = group[0]
+            completions_list = adapter.batch_call(
+                lm,
+                lm_kwargs=config,
+                signature=signature,
+                demos=demos,
+                inputs_list=[kwargs for *_, kwargs in group],
+                max_concurrency=max_concurrency,
+            )
+
+            for (i, *_, kwargs), completions in zip(group, completions_list):
+                if isinstance(completions, Exception):
+                    results[i] = completions
+                else:
+                    results[i] = self._forward_postprocess(completions, signature, **kwargs)
+
+        return results
+
+    def _can_batch_forward(self):
+        # Subclasses that customize `forward` can't be served by the batched path.
+        return type(self).forward is Predict.forward and super()._can_batch_forward()
 
     def update_config(self, **kwargs):
         self.config = {**self.config, **kwargs}
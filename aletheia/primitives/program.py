@@ -1,11 +1,17 @@
+import itertools
+import logging
+
 import magicattr
 
 from aletheia.dsp.utils.settings import settings
 from aletheia.predict.parallel import Parallel
 from aletheia.primitives.module import BaseModule
 from aletheia.utils.callback import with_callbacks
+from aletheia.utils.parallelizer import ParallelExecutor
 from aletheia.utils.usage_tracker import track_usage
 
+logger = logging.getLogger(__name__)
+
 
 class ProgramMeta(type):
     pass
@@ -21,7 +27,8 @@ class Module(BaseModule, metaclass=ProgramMeta):
 
     @with_callbacks
     def __call__(self, *args, **kwargs):
-        if settings.track_usage and settings.usage_tracker is None:
+        current_settings = settings.snapshot()
+        if current_settings.track_usage and current_settings.usage_tracker is None:
             with track_usage() as usage_tracker:
                 output = self.forward(*args, **kwargs)
                 output.set_lm_usage(usage_tracker.get_total_tokens())
@@ -29,6 +36,26 @@ class Module(BaseModule, metaclass=ProgramMeta):
 
         return self.forward(*args, **kwargs)
 
+    @with_callbacks
+    async def acall(self, *args, **kwargs):
+        current_settings = settings.snapshot()
+        if current_settings.track_usage and current_settings.usage_tracker is None:
+            with track_usage() as usage_tracker:
+                output = await self.aforward(*args, **kwargs)
+                output.set_lm_usage(usage_tracker.get_total_tokens())
+                return output
+
+        return await self.aforward(*args, **kwargs)
+
+    async def aforward(self, *args, **kwargs):
+        """
+        The async counterpart of `forward`. Modules that only implement `forward` are run in a worker
+        thread via `aletheia.asyncify`, so that they can still be awaited without blocking the event loop.
+        """
+        from aletheia.utils.asyncify import asyncify
+
+        return await asyncify(self.forward)(*args, **kwargs)
+
     def named_predictors(self):
         from aletheia.predict.predict import Predict
 
@@ -97,6 +124,8 @@ class Module(BaseModule, metaclass=ProgramMeta):
         return_failed_examples: bool = False,
         provide_traceback: bool = False,
         disable_progress_bar: bool = False,
+        stream: bool = False,
+        adaptive_concurrency=False,
     ):
         """
         Processes a list of aletheia.Example instances in parallel using the Parallel module.
@@ -106,8 +135,29 @@ class Module(BaseModule, metaclass=ProgramMeta):
         :param max_errors: Maximum number of errors allowed before stopping execution.
         :param return_failed_examples: Whether to return failed examples and exceptions.
         :param provide_traceback: Whether to include traceback information in error logs.
+        :param stream: Whether to return a generator of `(index, result)` pairs, yielded as the examples complete.
+        :param adaptive_concurrency: Whether to adapt the number of examples run at once to the provider's rate
+            limits and latency, up to `num_threads`. Can also be an `AdaptiveConcurrency` instance to share.
         :return: List of results, and optionally failed examples and exceptions.
+
+        Programs that implement `batch_forward`, like `aletheia.Predict` and `aletheia.ChainOfThought`, send the LM
+        requests in bulk, `num_threads` examples at a time, unless the concurrency is adaptive. The progress and
+        the errors are accounted after each chunk, so that the run stops once `max_errors` is reached.
+
+        With `stream=True`, `examples` can be any iterable, even unbounded, as the examples are taken lazily, and
+        the results of the failed examples are None. This allows writing the results as they come, e.g. to resume
+        a large job after a crash, with a bounded memory. `return_failed_examples` is ignored.
         """
+        if stream:
+            return self._batch_stream(
+                examples, num_threads, max_errors, provide_traceback, disable_progress_bar, adaptive_concurrency
+            )
+
+        if not adaptive_concurrency and self._can_batch_forward():
+            return self._batch_with_batch_forward(
+                examples, num_threads, max_errors, return_failed_examples, provide_traceback, disable_progress_bar
+            )
+
         # Create a list of execution pairs (self, example)
         exec_pairs = [(self, example.inputs()) for example in examples]
 
@@ -118,6 +168,7 @@ class Module(BaseModule, metaclass=ProgramMeta):
             return_failed_examples=return_failed_examples,
             provide_traceback=provide_traceback,
             disable_progress_bar=disable_progress_bar,
+            adaptive_concurrency=adaptive_concurrency,
         )
 
         # Execute the forward method of Parallel
@@ -129,6 +180,80 @@ class Module(BaseModule, metaclass=ProgramMeta):
             return results
 
 
+    def _batch_stream(
+        self, examples, num_threads, max_errors, provide_traceback, disable_progress_bar, adaptive_concurrency
+    ):
+        # Examples are run one by one rather than with `batch_forward`, which needs all of them at once.
+        executor = ParallelExecutor(
+            num_threads=num_threads,
+            max_errors=max_errors,
+            provide_traceback=provide_traceback,
+            disable_progress_bar=disable_progress_bar,
+            adaptive_concurrency=adaptive_concurrency,
+        )
+        return executor.iter_execute(lambda example: self(**example.inputs()), examples)
+
+    def _can_batch_forward(self):
+        # The batched path bypasses `__call__`, so programs relying on its usage tracking or callbacks run each
+        # example separately.
+        if not hasattr(self, "batch_forward"):
+            return False
+        return not (settings.track_usage or settings.callbacks or getattr(self, "callbacks", None))
+
+    def _batch_with_batch_forward(
+        self, examples, num_threads, max_errors, return_failed_examples, provide_traceback, disable_progress_bar
+    ):
+        failures = {}
+
+        def process_prediction(item):
+            index, example, prediction = item
+            if isinstance(prediction, Exception):
+                failures[index] = (example, prediction)
+                raise prediction
+            return prediction
+
+        executor = ParallelExecutor(
+            num_threads=num_threads,
+            max_errors=max_errors,
+            provide_traceback=provide_traceback,
+            disable_progress_bar=disable_progress_bar,
+        )
+        results = executor.execute(process_prediction, self._batch_forward_chunks(examples, num_threads))
+
+        if return_failed_examples:
+            failed = [failures[index] for index in sorted(failures)]
+            return results, [example for example, _ in failed], [exception for _, exception in failed]
+        return results
+
+    def _batch_forward_chunks(self, examples, chunk_size):
+        """
+        Returns an iterable of `(index, example, prediction)`, where the prediction is the exception raised for
+        the example if it failed, running `batch_forward` on `chunk_size` examples at a time as it's iterated.
+        """
+        return _BatchForwardChunks(self, examples, chunk_size)
+
+
+class _BatchForwardChunks:
+    # Sized, so that the progress bar of ParallelExecutor knows the total. The chunks are only sent when the
+    # executor takes their items, so a cancelled execution doesn't send the remaining ones.
+    def __init__(self, program, examples, chunk_size):
+        self.program = program
+        self.examples = examples
+        self.chunk_size = max(1, chunk_size)
+
+    def __len__(self):
+        return len(self.examples)
+
+    def __iter__(self):
+        examples = enumerate(self.examples)
+        while chunk := list(itertools.islice(examples, self.chunk_size)):
+            predictions = self.program.batch_forward(
+                [{**example.inputs()} for _, example in chunk], max_concurrency=self.chunk_size
+            )
+            for (index, example), prediction in zip(chunk, predictions):
+                yield index, example, prediction
+
+
 def set_attribute_by_name(obj, name, value):
     magicattr.set(obj, name, value)
 
@@ -19,8 +19,10 @@ import ast
 import importlib
 import inspect
 import re
+import threading
 import types
 import typing
+from collections import OrderedDict
 from copy import deepcopy
 from typing import Any, Dict, Tuple, Type, Union  # noqa: UP035
 
@@ -30,6 +32,12 @@ from pydantic.fields import FieldInfo
 from aletheia.adapters.types.image import Image  # noqa: F401
 from aletheia.signatures.field import InputField, OutputField
 
+# The maximum number of signature classes kept by `make_signature` to return them again for the same fields
+MAX_CACHED_SIGNATURES = 1024
+
+_signature_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_signature_cache_lock = threading.Lock()
+
 
 def _default_instructions(cls) -> str:
     inputs_ = ", ".join([f"`{field}`" for field in cls.input_fields])
@@ -258,14 +266,12 @@ class Signature(BaseModel, metaclass=SignatureMeta):
 
     @classmethod
     def load_state(cls, state):
-        signature_copy = Signature(deepcopy(cls.fields), cls.instructions)
-
-        signature_copy.instructions = state["instructions"]
-        for field, saved_field in zip(signature_copy.fields.values(), state["fields"]):
+        fields = deepcopy(cls.fields)
+        for field, saved_field in zip(fields.values(), state["fields"]):
             field.json_schema_extra["prefix"] = saved_field["prefix"]
             field.json_schema_extra["desc"] = saved_field["description"]
 
-        return signature_copy
+        return Signature(fields, state["instructions"])
 
 
 def ensure_signature(signature: Union[str, Type[Signature]], instructions=None) -> Signature:
@@ -294,7 +300,10 @@ def make_signature(
             Defaults to "StringSignature".
 
     Returns:
-        A new signature class with the specified fields and instructions.
+        A signature class with the specified fields and instructions. Signature classes are memoized: the same
+        string, or fields equal in type and attributes, with the same instructions, give the same class, so that
+        deriving signatures on every call (e.g. with `append` or `with_instructions`) doesn't create new pydantic
+        models. Derive new signatures rather than modifying the returned classes in place.
 
     Examples:
 
@@ -309,6 +318,32 @@ def make_signature(
     })
     ```
     """
+    key = _signature_key(signature, instructions, signature_name)
+    if key is None:
+        return _make_signature(signature, instructions, signature_name)
+
+    with _signature_cache_lock:
+        entry = _signature_cache.get(key)
+        if entry is not None:
+            _signature_cache.move_to_end(key)
+
+    # Signatures modified in place since they were cached no longer match their key, and are created again.
+    if entry is not None and _signature_fingerprint(entry[0]) == entry[1]:
+        return entry[0]
+
+    cls = _make_signature(signature, instructions, signature_name)
+    with _signature_cache_lock:
+        _signature_cache[key] = (cls, _signature_fingerprint(cls))
+        while len(_signature_cache) > MAX_CACHED_SIGNATURES:
+            _signature_cache.popitem(last=False)
+    return cls
+
+
+def _make_signature(
+    signature: Union[str, Dict[str, Tuple[type, FieldInfo]]],
+    instructions: str = None,
+    signature_name: str = "StringSignature",
+) -> Type[Signature]:
     fields = _parse_signature(signature) if isinstance(signature, str) else signature
 
     # Validate the fields, this is important because we sometimes forget the
@@ -347,6 +382,38 @@ def make_signature(
     )
 
 
+def _signature_key(signature: Any, instructions: Any, signature_name: str) -> Union[tuple, None]:
+    """
+    The structural key of the arguments of `make_signature`, or None if they can't be memoized. Fields are compared
+    by type and by `repr`, which covers all the attributes of a `FieldInfo`, including the aletheia ones.
+    """
+    if isinstance(signature, str):
+        key = (signature, instructions, signature_name)
+    elif isinstance(signature, dict):
+        fields = []
+        for name, type_field in signature.items():
+            if isinstance(type_field, FieldInfo):
+                fields.append((name, type_field.annotation, repr(type_field)))
+            elif isinstance(type_field, tuple) and len(type_field) == 2:
+                fields.append((name, type_field[0], repr(type_field[1])))
+            else:
+                # Invalid fields are reported by `_make_signature`.
+                return None
+        key = (tuple(fields), instructions, signature_name)
+    else:
+        return None
+
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _signature_fingerprint(cls: Type[Signature]) -> tuple:
+    return cls.__doc__, tuple((name, repr(field)) for name, field in cls.model_fields.items())
+
+
 def _parse_signature(signature: str) -> Dict[str, Tuple[Type, Field]]:
     if signature.count("->") != 1:
         raise ValueError(f"Invalid signature format: '{signature}', must contain exactly one '->'.")
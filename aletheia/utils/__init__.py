@@ -1,6 +1,6 @@
 from aletheia.utils.callback import BaseCallback, with_callbacks
 from aletheia.utils.dummies import DummyLM, DummyVectorizer, dummy_rm
-from aletheia.utils.streaming import StatusMessage, StatusMessageProvider, streamify
+from aletheia.utils.streaming import StatusMessage, StatusMessageProvider, StreamResponse, streamify
 
 import os
 import requests
@@ -27,5 +27,6 @@ __all__ = [
     "dummy_rm",
     "StatusMessage",
     "StatusMessageProvider",
+    "StreamResponse",
     "streamify",
 ]
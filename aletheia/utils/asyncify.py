@@ -1,8 +1,13 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from typing import TYPE_CHECKING, Any, Awaitable, Callable
 
 import asyncer
 from anyio import CapacityLimiter
 
+from aletheia.utils.governor import governor
+
 if TYPE_CHECKING:
     from aletheia.primitives.program import Module
 
@@ -32,34 +37,42 @@ def asyncify(program: "Module") -> Callable[[Any, Any], Awaitable[Any]]:
     Wraps a aletheia program so that it can be called asynchronously. This is useful for running a
     program in parallel with another task (e.g., another aletheia program).
 
-    This implementation propagates the current thread's configuration context to the worker thread.
+    This implementation propagates the caller's configuration context to the worker thread, and runs the program on
+    a worker slot of the process-wide `governor`, shared with `ParallelExecutor`.
 
     Args:
         program: The aletheia program to be wrapped for asynchronous execution.
 
     Returns:
         An async function: An async function that, when awaited, runs the program in a worker thread.
-            The current thread's configuration context is inherited for each call.
+            The caller's configuration context is inherited for each call.
     """
 
     async def async_program(*args, **kwargs) -> Any:
-        # Capture the current overrides at call-time.
-        from aletheia.dsp.utils.settings import thread_local_overrides
+        # Capture the current context at call-time, so that the settings overrides apply in the worker thread.
+        context = contextvars.copy_context()
+        call_async = asyncer.asyncify(context.run, abandon_on_cancel=True, limiter=get_limiter())
+        return await call_async(_run_on_slot, program, *args, **kwargs)
 
-        parent_overrides = thread_local_overrides.overrides.copy()
+    return async_program
 
-        def wrapped_program(*a, **kw):
-            from aletheia.dsp.utils.settings import thread_local_overrides
 
-            original_overrides = thread_local_overrides.overrides
-            thread_local_overrides.overrides = parent_overrides.copy()
-            try:
-                return program(*a, **kw)
-            finally:
-                thread_local_overrides.overrides = original_overrides
+def _run_on_slot(program, *args, **kwargs):
+    with governor.slot():
+        return program(*args, **kwargs)
 
-        # Create a fresh asyncified callable each time, ensuring the latest context is used.
-        call_async = asyncer.asyncify(wrapped_program, abandon_on_cancel=True, limiter=get_limiter())
-        return await call_async(*args, **kwargs)
 
-    return async_program
+def run_async(function: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+    """
+    Runs an async function to completion from synchronous code and returns its result. If an event loop is
+    already running in the current thread (e.g., in a notebook), the function runs in a worker thread
+    instead, which inherits the caller's configuration context.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(function(*args, **kwargs))
+
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(context.run, asyncio.run, function(*args, **kwargs)).result()
@@ -256,28 +256,83 @@ class BaseCallback:
 
 
 def with_callbacks(fn):
-    @functools.wraps(fn)
-    def wrapper(instance, *args, **kwargs):
-        # Combine global and local (per-instance) callbacks.
-        callbacks = aletheia.settings.get("callbacks", []) + getattr(instance, "callbacks", [])
-
-        # If no callbacks are provided, just call the function
-        if not callbacks:
-            return fn(instance, *args, **kwargs)
-
-        # Generate call ID as the unique identifier for the call, this is useful for instrumentation.
-        call_id = uuid.uuid4().hex
+    """Decorator to add callback functionality to instance methods. Both sync and async methods are supported."""
 
+    def _execute_start_callbacks(instance, fn, call_id, callbacks, args, kwargs):
+        """Execute all start callbacks for a function call."""
         inputs = inspect.getcallargs(fn, instance, *args, **kwargs)
         inputs.pop("self")  # Not logging self as input
 
         for callback in callbacks:
             try:
                 _get_on_start_handler(callback, instance, fn)(call_id=call_id, instance=instance, inputs=inputs)
-
             except Exception as e:
                 logger.warning(f"Error when calling callback {callback}: {e}")
 
+    def _execute_end_callbacks(instance, fn, call_id, results, exception, callbacks):
+        """Execute all end callbacks for a function call."""
+        for callback in callbacks:
+            try:
+                _get_on_end_handler(callback, instance, fn)(
+                    call_id=call_id,
+                    outputs=results,
+                    exception=exception,
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Error when applying callback {callback}'s end handler on function {fn.__name__}: {e}."
+                )
+
+    def _get_active_callbacks(instance):
+        """Combine global and local (per-instance) callbacks."""
+        return aletheia.settings.snapshot().get("callbacks", []) + getattr(instance, "callbacks", [])
+
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(instance, *args, **kwargs):
+            callbacks = _get_active_callbacks(instance)
+
+            # If no callbacks are provided, just call the function
+            if not callbacks:
+                return await fn(instance, *args, **kwargs)
+
+            # Generate call ID as the unique identifier for the call, this is useful for instrumentation.
+            call_id = uuid.uuid4().hex
+
+            _execute_start_callbacks(instance, fn, call_id, callbacks, args, kwargs)
+
+            results = None
+            exception = None
+            try:
+                parent_call_id = ACTIVE_CALL_ID.get()
+                # Active ID must be set right before the function is called, not before calling the callbacks.
+                ACTIVE_CALL_ID.set(call_id)
+                results = await fn(instance, *args, **kwargs)
+                return results
+            except Exception as e:
+                exception = e
+                raise exception
+            finally:
+                # Execute the end handlers even if the function call raises an exception.
+                ACTIVE_CALL_ID.set(parent_call_id)
+                _execute_end_callbacks(instance, fn, call_id, results, exception, callbacks)
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def sync_wrapper(instance, *args, **kwargs):
+        callbacks = _get_active_callbacks(instance)
+
+        # If no callbacks are provided, just call the function
+        if not callbacks:
+            return fn(instance, *args, **kwargs)
+
+        # Generate call ID as the unique identifier for the call, this is useful for instrumentation.
+        call_id = uuid.uuid4().hex
+
+        _execute_start_callbacks(instance, fn, call_id, callbacks, args, kwargs)
+
         results = None
         exception = None
         try:
@@ -292,19 +347,9 @@ def with_callbacks(fn):
         finally:
             # Execute the end handlers even if the function call raises an exception.
             ACTIVE_CALL_ID.set(parent_call_id)
-            for callback in callbacks:
-                try:
-                    _get_on_end_handler(callback, instance, fn)(
-                        call_id=call_id,
-                        outputs=results,
-                        exception=exception,
-                    )
-                except Exception as e:
-                    logger.warning(
-                        f"Error when applying callback {callback}'s end handler on function {fn.__name__}: {e}."
-                    )
-
-    return wrapper
+            _execute_end_callbacks(instance, fn, call_id, results, exception, callbacks)
+
+    return sync_wrapper
 
 
 def _get_on_start_handler(callback: BaseCallback, instance: Any, fn: Callable) -> Callable:
@@ -130,6 +130,18 @@ class DummyLM(LM):
 
         return outputs
 
+    async def acall(self, prompt=None, messages=None, **kwargs):
+        return self(prompt=prompt, messages=messages, **kwargs)
+
+    def batch_call(self, requests, max_concurrency=None):
+        results = []
+        for request in requests:
+            try:
+                results.append(self(**request))
+            except Exception as e:
+                results.append(e)
+        return results
+
     def get_convo(self, index):
         """Get the prompt + answer from the ith message."""
         return self.history[index]["messages"], self.history[index]["outputs"]
@@ -0,0 +1,105 @@
+import contextvars
+import threading
+from contextlib import contextmanager
+
+# Whether the current context runs on a worker slot of the governor. Set in the contexts that the workers run in, so
+# that it's inherited by the nested executors, asyncio tasks, etc. started from them.
+_holding_slot: contextvars.ContextVar[bool] = contextvars.ContextVar("aletheia_holding_worker_slot", default=False)
+
+
+class ConcurrencyGovernor:
+    """
+    The process-wide budget of worker slots that `ParallelExecutor`, `asyncify` and `Unbatchify` draw from, so that
+    nested parallelism (e.g. a `Parallel` module inside a program evaluated by `Evaluate`) is bounded instead of
+    multiplying the threads and the LM requests in flight.
+
+    The budget is `aletheia.settings.max_parallel_workers` if it's set. Otherwise, each top-level user (i.e. one not
+    running on a slot) brings its own share for its duration, e.g. `num_threads` for a `ParallelExecutor`, so that
+    the top-level parallelism is unchanged, and nested parallelism only uses the slots left free by it.
+
+    A context holding a slot never waits for another one: when no slot is free, a nested executor runs its items in
+    the calling thread, on the slot that it holds, so that the slots can't deadlock. The waiting top-level users get
+    the released slots in the order they started waiting.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._in_use = 0
+        self._reserved = 0
+
+    @property
+    def capacity(self) -> int:
+        """The current number of worker slots."""
+        from aletheia.dsp.utils.settings import settings
+
+        return settings.snapshot().max_parallel_workers or self._reserved
+
+    def stats(self) -> dict:
+        """Return the number of worker slots, and the number in use."""
+        with self._condition:
+            return {"capacity": self.capacity, "in_use": self._in_use}
+
+    @staticmethod
+    def holds_slot() -> bool:
+        """Whether the current context runs on a worker slot."""
+        return _holding_slot.get()
+
+    @staticmethod
+    def mark_holding_slot():
+        """Mark the current context as running on a worker slot, e.g. in a worker thread's context."""
+        _holding_slot.set(True)
+
+    @contextmanager
+    def reserve(self, size: int):
+        """Add `size` slots to the budget for the duration of the block, unless the budget is configured."""
+        with self._condition:
+            self._reserved += size
+            self._condition.notify_all()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._reserved -= size
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free, without waiting."""
+        with self._condition:
+            if self._in_use < self.capacity:
+                self._in_use += 1
+                return True
+            return False
+
+    def acquire(self, timeout=None) -> bool:
+        """Wait for a free slot and take it. Returns False if none was freed within `timeout` seconds."""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._in_use < self.capacity, timeout):
+                return False
+            self._in_use += 1
+            return True
+
+    def release(self):
+        with self._condition:
+            self._in_use -= 1
+            self._condition.notify()
+
+    @contextmanager
+    def slot(self):
+        """
+        Run the block on a worker slot, as a top-level user of one slot. A context that already holds a slot runs the
+        block on it.
+        """
+        if _holding_slot.get():
+            yield
+            return
+
+        with self.reserve(1):
+            self.acquire()
+            token = _holding_slot.set(True)
+            try:
+                yield
+            finally:
+                _holding_slot.reset(token)
+                self.release()
+
+
+governor = ConcurrencyGovernor()
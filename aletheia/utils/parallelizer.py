@@ -1,4 +1,5 @@
 import contextlib
+import contextvars
 import copy
 import logging
 import signal
@@ -10,8 +11,98 @@ from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import tqdm
 
+from aletheia.utils.governor import governor
+
 logger = logging.getLogger(__name__)
 
+# The initial number of items run at once with the adaptive concurrency
+ADAPTIVE_INITIAL_LIMIT = 4
+# The factor by which the adaptive concurrency shrinks on rate limit or timeout errors
+ADAPTIVE_DECREASE_FACTOR = 0.5
+# The average latency, relative to the lowest one observed, above which the adaptive concurrency stops growing
+ADAPTIVE_LATENCY_TOLERANCE = 2.0
+# The weight of each new latency in the moving average of the latencies
+ADAPTIVE_LATENCY_SMOOTHING = 0.2
+
+# The names of the errors signaling that the provider is overloaded, matched by name so that they cover the errors of
+# the providers' clients without importing them
+CONGESTION_ERRORS = {"RateLimitError", "Timeout", "APITimeoutError", "TimeoutError"}
+
+# The congestion epoch at which the item of the current context started
+_item_epoch: contextvars.ContextVar[int] = contextvars.ContextVar("aletheia_parallel_item_epoch", default=None)
+
+
+def is_congestion_error(error):
+    return any(cls.__name__ in CONGESTION_ERRORS for cls in type(error).__mro__)
+
+
+class AdaptiveConcurrency:
+    """
+    An additive-increase/multiplicative-decrease (AIMD) limit on the number of items that `ParallelExecutor` runs at
+    once, so that the throughput tracks what the provider sustains instead of a fixed `num_threads`:
+
+        - While the latency stays within `ADAPTIVE_LATENCY_TOLERANCE` times the lowest one observed, the limit grows
+          by one per successful item until the first congestion (i.e. it doubles per round of items), then by one per
+          round of items.
+        - On a rate limit or timeout error, including the rate limit errors retried by the LM, the limit is
+          multiplied by `ADAPTIVE_DECREASE_FACTOR`. The errors of the items that started before the last decrease
+          are ignored, so that a burst of errors shrinks the limit once.
+
+    The current limit is exposed as `limit`, and shown in the progress bar. An instance can be passed to several
+    executors (e.g. to successive `Evaluate` calls) so that they share what it learned.
+    """
+
+    def __init__(self, max_limit, min_limit=1, initial_limit=None):
+        self.max_limit = max(max_limit, 1)
+        self.min_limit = min(max(min_limit, 1), self.max_limit)
+        initial_limit = initial_limit if initial_limit is not None else ADAPTIVE_INITIAL_LIMIT
+        self._limit = min(max(initial_limit, self.min_limit), self.max_limit)
+
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self._slow_start = True
+        self._successes = 0
+        self._latency = None
+        self._min_latency = None
+
+    @property
+    def limit(self):
+        """The current number of items that can run at once."""
+        return self._limit
+
+    @property
+    def epoch(self):
+        """The number of decreases so far, recorded by each item when it starts."""
+        return self._epoch
+
+    def record_success(self, latency):
+        with self._lock:
+            if self._latency is None:
+                self._latency = latency
+            else:
+                self._latency += ADAPTIVE_LATENCY_SMOOTHING * (latency - self._latency)
+            if self._min_latency is None or self._latency < self._min_latency:
+                self._min_latency = self._latency
+
+            if self._latency > ADAPTIVE_LATENCY_TOLERANCE * self._min_latency or self._limit >= self.max_limit:
+                return
+
+            self._successes += 1
+            if self._slow_start or self._successes >= self._limit:
+                self._limit += 1
+                self._successes = 0
+
+    def record_congestion(self, epoch=None):
+        with self._lock:
+            if epoch is not None and epoch < self._epoch:
+                return
+
+            self._epoch += 1
+            self._slow_start = False
+            self._successes = 0
+            self._limit = max(self.min_limit, int(self._limit * ADAPTIVE_DECREASE_FACTOR))
+            logger.debug(f"Congestion detected, the concurrency is decreased to {self._limit}.")
+
 
 class ParallelExecutor:
     def __init__(
@@ -23,10 +114,14 @@ class ParallelExecutor:
         compare_results=False,
         timeout=120,
         straggler_limit=3,
+        adaptive_concurrency=False,
     ):
         """
         Offers isolation between the tasks (aletheia.settings) irrespective of whether num_threads == 1 or > 1.
         Handles also straggler timeouts.
+
+        With `adaptive_concurrency=True`, or an `AdaptiveConcurrency` instance, the number of items run at once
+        adapts to the provider's rate limits and latency, up to `num_threads`.
         """
 
         self.num_threads = num_threads
@@ -37,6 +132,13 @@ class ParallelExecutor:
         self.timeout = timeout
         self.straggler_limit = straggler_limit
 
+        if isinstance(adaptive_concurrency, AdaptiveConcurrency):
+            self.concurrency = adaptive_concurrency
+        elif adaptive_concurrency:
+            self.concurrency = AdaptiveConcurrency(max_limit=num_threads)
+        else:
+            self.concurrency = None
+
         self.error_count = 0
         self.error_lock = threading.Lock()
         self.cancel_jobs = threading.Event()
@@ -46,6 +148,19 @@ class ParallelExecutor:
         wrapped = self._wrap_function(function)
         return self._execute_parallel(wrapped, data)
 
+    def iter_execute(self, function, data):
+        """
+        Run `function` on the items of `data` in parallel, and yield `(index, result)` as the items complete, in
+        completion order. The result of an item that failed is None.
+
+        Unlike `execute`, the results aren't collected: `data` can be any iterable, even unbounded, as its items are
+        taken lazily, and the memory stays bounded by the number of items in flight. Closing the generator cancels
+        the items that haven't started.
+        """
+        tqdm.tqdm._instances.clear()
+        wrapped = self._wrap_function(function)
+        yield from self._iter_parallel(wrapped, data)
+
     def _wrap_function(self, user_function):
         def safe_func(item):
             if self.cancel_jobs.is_set():
@@ -53,6 +168,8 @@ class ParallelExecutor:
             try:
                 return user_function(item)
             except Exception as e:
+                if self.concurrency is not None and is_congestion_error(e):
+                    self.concurrency.record_congestion(_item_epoch.get())
                 with self.error_lock:
                     self.error_count += 1
                     if self.error_count >= self.max_errors:
@@ -65,36 +182,99 @@ class ParallelExecutor:
 
         return safe_func
 
+    @property
+    def concurrency_limit(self):
+        """The number of items run at once: the adaptive limit, or `num_threads`."""
+        if self.concurrency is None:
+            return self.num_threads
+        return min(self.concurrency.limit, self.num_threads)
+
     def _execute_parallel(self, function, data):
-        results = [None] * len(data)
+        results = []
+        for index, outcome in self._iter_parallel(function, data):
+            if index >= len(results):
+                results.extend([None] * (index + 1 - len(results)))
+            results[index] = outcome
+
+        # Items that were never run (e.g. after a cancellation) have a None result.
+        if hasattr(data, "__len__") and len(results) < len(data):
+            results.extend([None] * (len(data) - len(results)))
+        return results
+
+    def _iter_parallel(self, function, data):
+        """
+        Run `function` on the items of `data`, which may be any iterable, and yield `(index, result)` as the items
+        complete. Items are taken from `data` lazily, keeping at most `num_threads` of them (or the adaptive
+        concurrency limit) submitted at once, and the progress is accounted incrementally, so that the time is
+        linear and the memory bounded in the number of items.
+
+        Each submitted item holds a slot of the process-wide `governor`. An executor running on a slot (i.e. nested
+        in another executor's item) only takes the free slots, and otherwise runs its items in the calling thread,
+        so that nested executors don't multiply the threads.
+        """
         job_cancelled = "cancelled"
+        items = enumerate(data)
+        total = len(data) if hasattr(data, "__len__") else None
+        concurrency = self.concurrency
+        nested = governor.holds_slot()
 
         # We resubmit at most once per item.
         start_time_map = {}
         start_time_lock = threading.Lock()
-        resubmitted = set()
 
         # This is the worker function each thread will run.
-        def worker(parent_overrides, submission_id, index, item):
+        def worker(parent_context, submission_id, index, item):
             if self.cancel_jobs.is_set():
                 return index, job_cancelled
             # Record actual start time
             with start_time_lock:
                 start_time_map[submission_id] = time.time()
 
-            # Apply parent's thread-local overrides
-            from aletheia.dsp.utils.settings import thread_local_overrides
-
-            original = thread_local_overrides.overrides
-            thread_local_overrides.overrides = parent_overrides.copy()
-            if parent_overrides.get("usage_tracker"):
-                # Usage tracker needs to be deep copied across threads so that each thread tracks its own usage
-                thread_local_overrides.overrides["usage_tracker"] = copy.deepcopy(parent_overrides["usage_tracker"])
+            # Run in a copy of the parent's context, which holds its settings overrides. A context can only be
+            # entered by one thread at a time, and copying it is O(1).
+            return index, parent_context.copy().run(run_item, item)
 
+        def worker_on_slot(*args):
             try:
-                return index, function(item)
+                return worker(*args)
             finally:
-                thread_local_overrides.overrides = original
+                governor.release()
+
+        def release_if_cancelled(future):
+            # The items cancelled before they started don't release their slot themselves.
+            if future.cancelled():
+                governor.release()
+
+        def run_item(item):
+            governor.mark_holding_slot()
+            if concurrency is not None:
+                return run_adaptive_item(item)
+            return run_with_usage_tracker(item)
+
+        def run_adaptive_item(item):
+            from aletheia.clients.rate_limiter import listen_to_rate_limits
+
+            # The context is a copy owned by this item, so that it needn't be reset.
+            epoch = concurrency.epoch
+            _item_epoch.set(epoch)
+            listen_to_rate_limits(lambda error: concurrency.record_congestion(epoch))
+
+            start_time = time.monotonic()
+            outcome = run_with_usage_tracker(item)
+            if outcome is not None:
+                concurrency.record_success(time.monotonic() - start_time)
+            return outcome
+
+        def run_with_usage_tracker(item):
+            from aletheia.dsp.utils.settings import settings
+
+            usage_tracker = settings.usage_tracker
+            if not usage_tracker:
+                return function(item)
+
+            # Usage tracker needs to be deep copied across threads so that each thread tracks its own usage
+            with settings.context(usage_tracker=copy.deepcopy(usage_tracker)):
+                return function(item)
 
         # Handle Ctrl-C in the main thread
         @contextlib.contextmanager
@@ -117,92 +297,133 @@ class ParallelExecutor:
 
         executor = ThreadPoolExecutor(max_workers=self.num_threads)
         try:
-            with interrupt_manager():
-                from aletheia.dsp.utils.settings import thread_local_overrides
-
-                parent_overrides = thread_local_overrides.overrides.copy()
+            # A top-level executor brings its `num_threads` slots to the governor's budget, unless it's configured.
+            with interrupt_manager(), contextlib.nullcontext() if nested else governor.reserve(self.num_threads):
+                parent_context = contextvars.copy_context()
 
+                # The submitted futures, and the futures of each item that hasn't completed yet
                 futures_map = {}
-                futures_set = set()
+                pending = {}
                 submission_counter = 0
-
-                for idx, item in enumerate(data):
-                    f = executor.submit(worker, parent_overrides, submission_counter, idx, item)
-                    futures_map[f] = (submission_counter, idx, item)
-                    futures_set.add(f)
+                exhausted = False
+
+                def submit(index, item):
+                    # The caller has taken a slot for the item, which is released once it completes or is cancelled.
+                    nonlocal submission_counter
+                    f = executor.submit(worker_on_slot, parent_context, submission_counter, index, item)
+                    f.add_done_callback(release_if_cancelled)
+                    futures_map[f] = (submission_counter, index, item)
+                    pending.setdefault(index, []).append(f)
                     submission_counter += 1
 
+                def fill():
+                    """
+                    Submit items while there are free slots. When there are none, a nested executor returns the next
+                    item to run in the calling thread, on the slot it holds, rather than leaving it idle.
+                    """
+                    nonlocal exhausted
+                    while not exhausted and len(pending) < self.concurrency_limit and not self.cancel_jobs.is_set():
+                        if not governor.try_acquire():
+                            if nested:
+                                try:
+                                    return next(items)
+                                except StopIteration:
+                                    exhausted = True
+                                    return None
+                            if pending:
+                                # Wait for the items in flight to free their slots.
+                                return None
+                            if not governor.acquire(timeout=1):
+                                continue
+
+                        try:
+                            index, item = next(items)
+                        except StopIteration:
+                            exhausted = True
+                            governor.release()
+                        else:
+                            submit(index, item)
+                    return None
+
                 pbar = tqdm.tqdm(
-                    total=len(data),
+                    total=total,
                     dynamic_ncols=True,
                     disable=self.disable_progress_bar,
                     file=sys.stdout,
                 )
-
-                def all_done():
-                    return all(r is not None for r in results)
-
-                while futures_set and not self.cancel_jobs.is_set():
-                    if all_done():
+                num_results = 0
+                score = 0
+
+                def update_progress(outcome):
+                    nonlocal num_results, score
+                    if outcome is not None:
+                        num_results += 1
+                        if self.compare_results:
+                            score += outcome[-1]
+                            self._update_progress(pbar, score, num_results)
+                        else:
+                            self._update_progress(pbar, num_results, total)
+                        if concurrency is not None:
+                            pbar.set_postfix(concurrency=self.concurrency_limit, refresh=False)
+
+                while not self.cancel_jobs.is_set():
+                    inline_item = fill()
+                    if inline_item is not None:
+                        index, item = inline_item
+                        _, outcome = worker(parent_context, None, index, item)
+                        if outcome != job_cancelled:
+                            yield index, outcome
+                            update_progress(outcome)
+                        continue
+
+                    if not futures_map:
                         break
-                    done, not_done = wait(futures_set, timeout=1, return_when=FIRST_COMPLETED)
+
+                    done, not_done = wait(futures_map, timeout=1, return_when=FIRST_COMPLETED)
                     for f in done:
-                        futures_set.remove(f)
+                        submission_id, index, _ = futures_map.pop(f)
+                        with start_time_lock:
+                            start_time_map.pop(submission_id, None)
                         try:
-                            index, outcome = f.result()
+                            _, outcome = f.result()
                         except Exception:
-                            pass
-                        else:
-                            if outcome != job_cancelled and results[index] is None:
-                                results[index] = outcome
-
-                            # Update progress
-                            if self.compare_results:
-                                vals = [r[-1] for r in results if r is not None]
-                                self._update_progress(pbar, sum(vals), len(vals))
-                            else:
-                                self._update_progress(
-                                    pbar,
-                                    len([r for r in results if r is not None]),
-                                    len(data),
-                                )
-
-                    if all_done():
-                        break
+                            outcome = None
+                        if outcome == job_cancelled or index not in pending:
+                            # Cancelled, or the item was already completed by a resubmission.
+                            continue
+
+                        for other in pending.pop(index):
+                            if other is not f:
+                                other.cancel()
+                        yield index, outcome
+                        update_progress(outcome)
 
                     # Check stragglers if few remain
-                    if 0 < self.timeout and len(not_done) <= self.straggler_limit:
+                    if 0 < self.timeout and exhausted and len(pending) <= self.straggler_limit:
                         now = time.time()
                         for f in list(not_done):
-                            if f not in resubmitted:
-                                sid, idx, item = futures_map[f]
-                                with start_time_lock:
-                                    st = start_time_map.get(sid, None)
-                                if st and (now - st) >= self.timeout:
-                                    resubmitted.add(f)
-                                    nf = executor.submit(
-                                        worker,
-                                        parent_overrides,
-                                        submission_counter,
-                                        idx,
-                                        item,
-                                    )
-                                    futures_map[nf] = (submission_counter, idx, item)
-                                    futures_set.add(nf)
-                                    submission_counter += 1
+                            if f not in futures_map:
+                                continue
+                            sid, idx, item = futures_map[f]
+                            if idx not in pending or len(pending[idx]) > 1:
+                                continue
+                            with start_time_lock:
+                                st = start_time_map.get(sid, None)
+                            if st and (now - st) >= self.timeout and governor.try_acquire():
+                                if concurrency is not None:
+                                    concurrency.record_congestion()
+                                submit(idx, item)
 
                 pbar.close()
 
         finally:
             # Avoid waiting on leftover tasks that no longer matter
-            executor.shutdown(wait=False)
+            executor.shutdown(wait=False, cancel_futures=True)
 
         if self.cancel_jobs.is_set():
             logger.warning("Execution cancelled due to errors or interruption.")
             raise Exception("Execution cancelled due to errors or interruption.")
 
-        return results
-
     def _update_progress(self, pbar, nresults, ntotal):
         if self.compare_results:
             pct = round(100 * nresults / ntotal, 1) if ntotal else 0
@@ -0,0 +1,105 @@
+import logging
+import multiprocessing
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+
+def _initialize_worker(config):
+    import aletheia
+
+    aletheia.settings.configure(**config)
+
+
+def _call_in_worker(function, args):
+    # The exceptions raised by the function are returned rather than raised, so that any exception raised by the
+    # future is known to come from the process pool itself (e.g. an argument that can't be pickled).
+    try:
+        return True, function(*args)
+    except Exception as e:
+        return False, e
+
+
+def _picklable_settings():
+    import aletheia
+
+    config = {}
+    for key, value in aletheia.settings.snapshot().items():
+        try:
+            pickle.dumps(value)
+        except Exception:
+            continue
+        config[key] = value
+    return config
+
+
+class ProcessPool:
+    """
+    Runs a function in a pool of worker processes, for the CPU-bound work (e.g. metrics, parsing) that threads can't
+    run in parallel because of the GIL. Calls block the calling thread, so that `ProcessPool` can be called from the
+    threads of `ParallelExecutor`: the threads wait on the I/O and the processes run the computation.
+
+    The workers are started with the picklable settings of the context that created the pool, i.e. the settings
+    that can't be pickled (e.g. callbacks, caches) are left at their defaults in the workers. When the function or its
+    arguments can't be pickled, or the pool breaks, the function is called in the calling thread instead.
+    """
+
+    def __init__(self, function, num_processes):
+        self.function = function
+        self.num_processes = num_processes
+        self.executor = None
+        self.lock = threading.Lock()
+
+        try:
+            pickle.dumps(function)
+        except Exception as e:
+            logger.warning(f"{function!r} can't be pickled, it will run in the calling threads: {e}")
+            self.fallback = True
+        else:
+            self.fallback = False
+
+    def __call__(self, *args):
+        if self.fallback:
+            return self.function(*args)
+
+        try:
+            ok, result = self._get_executor().submit(_call_in_worker, self.function, args).result()
+        except BrokenProcessPool as e:
+            logger.warning(f"The process pool is broken, {self.function!r} will run in the calling threads: {e}")
+            self.fallback = True
+            return self.function(*args)
+        except Exception as e:
+            logger.debug(f"Couldn't call {self.function!r} in the process pool, calling it in this thread: {e}")
+            return self.function(*args)
+
+        if not ok:
+            raise result
+        return result
+
+    def _get_executor(self):
+        # The processes are started on the first call, so that a pool that isn't used costs nothing
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.num_processes,
+                    # Forking a process that runs threads can deadlock, so the workers are spawned instead
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_initialize_worker,
+                    initargs=(_picklable_settings(),),
+                )
+            return self.executor
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True, cancel_futures=True)
+                self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
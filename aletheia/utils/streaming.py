@@ -9,6 +9,7 @@ from anyio import create_memory_object_stream, create_task_group
 from anyio.streams.memory import MemoryObjectSendStream
 from asyncer import syncify
 
+from aletheia.adapters.field_parser import StreamResponse
 from aletheia.dsp.utils.settings import settings
 from aletheia.primitives.prediction import Prediction
 from aletheia.utils.asyncify import asyncify
@@ -300,6 +301,9 @@ async def streaming_response(streamer: AsyncGenerator) -> AsyncGenerator:
         if isinstance(value, Prediction):
             data = {"prediction": {k: v for k, v in value.items(include_aletheia=False)}}
             yield f"data: {ujson.dumps(data)}\n\n"
+        elif isinstance(value, StreamResponse):
+            data = {"stream_response": {"signature_field_name": value.signature_field_name, "chunk": value.chunk}}
+            yield f"data: {ujson.dumps(data)}\n\n"
         elif isinstance(value, litellm.ModelResponseStream):
             data = {"chunk": value.json()}
             yield f"data: {ujson.dumps(data)}\n\n"
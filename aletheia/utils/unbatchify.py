@@ -4,6 +4,8 @@ import threading
 from typing import Any, Callable, List
 from concurrent.futures import Future
 
+from aletheia.utils.governor import governor
+
 class Unbatchify:
     def __init__(
         self,
@@ -18,6 +20,9 @@ class Unbatchify:
             batch_fn: The batch-processing function that accepts a list of inputs and returns a list of outputs.
             max_batch_size: The maximum number of items to include in a batch.
             max_wait_time: The maximum time (in seconds) to wait for batch to fill before processing.
+
+        The batches run on a worker slot of the process-wide `governor`: the slot of a caller waiting for the batch if
+        one holds a slot (e.g. a `ParallelExecutor` worker), otherwise a slot of their own.
         """
 
         self.batch_fn = batch_fn
@@ -40,7 +45,7 @@ class Unbatchify:
             The output corresponding to the input_item after processing through batch_fn.
         """
         future = Future()
-        self.input_queue.put((input_item, future))
+        self.input_queue.put((input_item, future, governor.holds_slot()))
         try:
             result = future.result()
         except Exception as e:
@@ -54,18 +59,25 @@ class Unbatchify:
         while not self.stop_event.is_set():
             batch = []
             futures = []
+            callers_hold_slot = False
             start_time = time.time()
             while len(batch) < self.max_batch_size and (time.time() - start_time) < self.max_wait_time:
                 try:
-                    input_item, future = self.input_queue.get(timeout=self.max_wait_time)
+                    input_item, future, holds_slot = self.input_queue.get(timeout=self.max_wait_time)
                     batch.append(input_item)
                     futures.append(future)
+                    callers_hold_slot = callers_hold_slot or holds_slot
                 except queue.Empty:
                     break
 
             if batch:
                 try:
-                    outputs = self.batch_fn(batch)
+                    # The callers holding a slot wait for the batch, so it runs on their slot rather than another one.
+                    if callers_hold_slot:
+                        outputs = self.batch_fn(batch)
+                    else:
+                        with governor.slot():
+                            outputs = self.batch_fn(batch)
                     for output, future in zip(outputs, futures):
                         future.set_result(output)
                 except Exception as e:
@@ -77,7 +89,7 @@ class Unbatchify:
         # Clean up remaining items when stopping
         while True:
             try:
-                _, future = self.input_queue.get_nowait()
+                _, future, _ = self.input_queue.get_nowait()
                 future.set_exception(RuntimeError("Unbatchify is closed"))
             except queue.Empty:
                 break
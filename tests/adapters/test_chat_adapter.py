@@ -1,9 +1,11 @@
+import importlib
 from typing import Literal
 from unittest import mock
 
 import pytest
 
 import aletheia
+from aletheia.utils.dummies import DummyLM
 
 
 @pytest.mark.parametrize(
@@ -77,3 +79,76 @@ def test_chat_adapter_quotes_literals_as_expected(
 
     assert expected_input_str in content
     assert expected_output_str in content
+
+
+@pytest.mark.parametrize("adapter_type", [aletheia.ChatAdapter, aletheia.JSONAdapter])
+def test_instructions_and_demos_are_compiled_once(adapter_type):
+    signature = aletheia.Signature("question -> answer")
+    demos = [aletheia.Example(question=f"What is {i} + {i}?", answer=str(2 * i)) for i in range(8)]
+    adapter = adapter_type()
+    module = importlib.import_module(adapter_type.__module__)
+
+    with mock.patch.object(module, "prepare_instructions", wraps=module.prepare_instructions) as spy:
+        first = adapter.format(signature, demos, {"question": "What is 9 + 9?"})
+        first[0]["content"] = "modified"
+        second = adapter.format(signature, demos, {"question": "What is 10 + 10?"})
+        assert spy.call_count == 1
+
+        # New demos, e.g. assigned by an optimizer, are compiled again
+        adapter.format(signature, demos[:4], {"question": "What is 9 + 9?"})
+        assert spy.call_count == 2
+
+    assert second[0]["content"] != "modified"
+    assert len(second) == 1 + 2 * len(demos) + 1
+    assert "What is 10 + 10?" in second[-1]["content"]
+
+
+def test_missing_fields_are_asked_again_without_resending_the_request():
+    class QA(aletheia.Signature):
+        question: str = aletheia.InputField()
+        answer: str = aletheia.OutputField()
+        confidence: float = aletheia.OutputField()
+
+    lm = DummyLM([{"answer": "Paris"}, {"confidence": "0.9"}])
+    stats = aletheia.ChatAdapter.stats()
+    with aletheia.context(lm=lm):
+        result = aletheia.Predict(QA)(question="What is the capital of France?")
+
+    assert result.answer == "Paris"
+    assert result.confidence == 0.9
+
+    # The follow-up turn asks only for the missing field, after the previous response.
+    repair_messages = lm.history[-1]["messages"]
+    assert repair_messages[:-2] == lm.history[0]["messages"]
+    assert repair_messages[-2] == {"role": "assistant", "content": "[[ ## answer ## ]]\nParis"}
+    assert "`[[ ## confidence ## ]]`" in repair_messages[-1]["content"]
+    assert "`[[ ## answer ## ]]`" not in repair_messages[-1]["content"]
+
+    assert aletheia.ChatAdapter.stats()["repaired"] == stats["repaired"] + 1
+    assert aletheia.ChatAdapter.stats()["fallback"] == stats["fallback"]
+
+
+def test_invalid_choices_are_fixed_up_locally():
+    class Classify(aletheia.Signature):
+        text: str = aletheia.InputField()
+        sentiment: Literal["positive", "negative"] = aletheia.OutputField()
+
+    lm = DummyLM([{"sentiment": "Positive."}])
+    stats = aletheia.ChatAdapter.stats()
+    with aletheia.context(lm=lm):
+        assert aletheia.Predict(Classify)(text="I love it").sentiment == "positive"
+
+    assert len(lm.history) == 1
+    assert aletheia.ChatAdapter.stats()["fixed"] == stats["fixed"] + 1
+
+
+def test_falls_back_to_json_adapter_without_repair():
+    lm = DummyLM([{"reasoning": "No answer"}])
+    stats = aletheia.ChatAdapter.stats()
+    with mock.patch.object(aletheia.JSONAdapter, "__call__", return_value=[{"answer": "Paris"}]) as json_adapter_call:
+        with aletheia.context(lm=lm, adapter=aletheia.ChatAdapter(repair=False)):
+            assert aletheia.Predict("question -> answer")(question="What is the capital of France?").answer == "Paris"
+
+    json_adapter_call.assert_called_once()
+    assert len(lm.history) == 1
+    assert aletheia.ChatAdapter.stats()["fallback"] == stats["fallback"] + 1
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from aletheia.adapters.field_parser import FieldParser, field_header_pattern
+
+
+def parse_sections(completion):
+    # The line-by-line parsing of the whole completion, which the streaming parser must match.
+    sections = [(None, [])]
+    for line in completion.splitlines():
+        match = field_header_pattern.match(line.strip())
+        if match:
+            remaining_content = line[match.end() :].strip()
+            sections.append((match.group(1), [remaining_content] if remaining_content else []))
+        else:
+            sections[-1][1].append(line)
+    return [(k, "\n".join(v).strip()) for k, v in sections]
+
+
+COMPLETIONS = [
+    "[[ ## answer ## ]]\nParis\n\n[[ ## completed ## ]]",
+    "Some preamble\n[[ ## reasoning ## ]]  Let's think\nstep by step.  \n\n[[ ## answer ## ]]\n  42\n",
+    "[[ ## answer ## ]]\nfirst\n[[ ## answer ## ]]\nsecond\n[[ ## completed ## ]]\n",
+    "  [[ ## answer ## ]] inline value\r\nnext line\r\n[[ ## completed ## ]]",
+    "[[ ## answer ## ]]\n[[ ## not a header\n  indented\n\n\nlast",
+    "no headers at all",
+    "",
+]
+
+
+@pytest.mark.parametrize("completion", COMPLETIONS)
+def test_streamed_fields_add_up_to_the_parsed_values(completion):
+    expected = parse_sections(completion)
+    first_values = {}
+    for header, value in expected:
+        first_values.setdefault(header, value)
+
+    rng = random.Random(0)
+    for _ in range(20):
+        parser = FieldParser(stream_fields=["reasoning", "answer"])
+        streamed = {}
+        position = 0
+        while position < len(completion):
+            size = rng.randint(1, 8)
+            for field_name, chunk in parser.feed(completion[position : position + size]):
+                streamed[field_name] = streamed.get(field_name, "") + chunk
+            position += size
+
+        assert parser.text == completion
+        assert parser.finish() == expected
+        for field_name in ("reasoning", "answer"):
+            if first_values.get(field_name):
+                assert streamed[field_name] == first_values[field_name]
+            else:
+                assert field_name not in streamed
+
+
+def test_fields_are_streamed_before_their_section_ends():
+    parser = FieldParser(stream_fields=["answer"])
+    assert parser.feed("[[ ## ans") == []
+    assert parser.feed("wer ## ]]\nThe capital") == [("answer", "The capital")]
+    assert parser.feed(" of France ") == [("answer", " of France")]
+    assert parser.feed("is Paris.\n[[ ## completed ## ]]") == [("answer", " is Paris.")]
+    assert parser.finish()[1] == ("answer", "The capital of France is Paris.")
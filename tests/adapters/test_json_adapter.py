@@ -93,3 +93,29 @@ def test_json_adapter_with_structured_outputs_does_not_mutate_original_signature
         program(input1="Test input")
 
     assert program.signature.output_fields == TestSignature.output_fields
+
+
+def test_json_adapter_reuses_response_formats_and_supported_params():
+    class TestSignature(aletheia.Signature):
+        input1: str = aletheia.InputField()
+        output1: list[int] = aletheia.OutputField()
+
+    aletheia.configure(lm=aletheia.LM(model="openai/gpt-4o-mini-memoized"), adapter=aletheia.JSONAdapter())
+    program = aletheia.Predict(TestSignature)
+
+    with mock.patch("litellm.completion") as mock_completion, mock.patch(
+        "litellm.get_supported_openai_params", return_value=["response_format"]
+    ) as mock_supported_params:
+        program(input1="Test input")
+        program(input1="Other test input")
+
+    assert mock_supported_params.call_count == 1
+    first_format = mock_completion.call_args_list[0].kwargs["response_format"]
+    assert mock_completion.call_args_list[1].kwargs["response_format"] is first_format
+
+
+def test_type_adapters_are_shared_across_parsed_values():
+    from aletheia.adapters.utils import get_type_adapter, parse_value
+
+    assert get_type_adapter(list[int]) is get_type_adapter(list[int])
+    assert parse_value("[1, 2]", list[int]) == [1, 2]
@@ -0,0 +1,101 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import aletheia
+from aletheia.cache import DiskCache, MemoryCache, TieredCache, create_cache
+from aletheia.clients.embedding import Embedder
+from aletheia.clients.lm import request_cache
+
+
+class MockEmbeddingResponse:
+    def __init__(self, embeddings):
+        self.data = [{"embedding": emb} for emb in embeddings]
+
+
+def test_disk_cache_persists_across_instances(tmp_path):
+    cache = DiskCache(tmp_path / "lm", size_limit=1e7, shards=2)
+    cache.put("key", {"answer": 42})
+    assert cache.get("key") == {"answer": 42}
+    assert cache.get("missing", "default") == "default"
+    cache.close()
+
+    reopened = DiskCache(tmp_path / "lm", shards=2)
+    assert "key" in reopened
+    assert reopened.get("key") == {"answer": 42}
+
+    stats = reopened.stats()
+    assert stats["hits"] == 1
+    assert stats["entries"] == 1
+    assert reopened.persistent
+
+
+def test_tiered_cache_promotes_entries_to_faster_tiers(tmp_path):
+    memory = MemoryCache()
+    disk = DiskCache(tmp_path / "lm")
+    disk.put("key", "value")
+
+    cache = TieredCache([memory, disk])
+    assert "key" not in memory
+    assert cache.get("key") == "value"
+    assert memory.get("key") == "value"
+    assert cache.persistent
+
+    cache.put("other", 1)
+    assert memory.get("other") == 1 and disk.get("other") == 1
+
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_create_cache_uses_a_directory_per_namespace(tmp_path, monkeypatch):
+    monkeypatch.setenv("aletheia_CACHEDIR", str(tmp_path))
+
+    lm_cache = create_cache("lm")
+    assert isinstance(lm_cache, TieredCache)
+    assert lm_cache.tiers[1].directory == str(tmp_path / "lm")
+
+    embedding_cache = create_cache("embeddings", memory=False, disk_size_limit=1e6)
+    assert isinstance(embedding_cache, DiskCache)
+    assert embedding_cache.directory == str(tmp_path / "embeddings")
+    assert embedding_cache.size_limit == 1e6
+
+    assert isinstance(create_cache("retrievers", disk=False), MemoryCache)
+
+    with pytest.raises(ValueError):
+        create_cache("unknown")
+
+
+def test_lm_cache_can_be_disabled():
+    calls = []
+
+    @request_cache()
+    def completion(request):
+        calls.append(request)
+        return len(calls)
+
+    with aletheia.context(lm_cache=None):
+        assert completion({"prompt": "question"}) == 1
+        assert completion({"prompt": "question"}) == 2
+
+    with aletheia.context(lm_cache=MemoryCache()):
+        assert completion({"prompt": "question"}) == 3
+        assert completion({"prompt": "question"}) == 3
+
+
+def test_embedder_uses_the_embedding_cache():
+    cache = MemoryCache()
+    with aletheia.context(embedding_cache=cache):
+        with patch("litellm.embedding") as mock_litellm:
+            mock_litellm.return_value = MockEmbeddingResponse([[0.1, 0.2], [0.3, 0.4]])
+            embedder = Embedder("text-embedding-ada-002")
+
+            first = embedder(["hello", "world"])
+            second = embedder(["hello", "world"])
+
+            mock_litellm.assert_called_once_with(model="text-embedding-ada-002", input=["hello", "world"], caching=False)
+            np.testing.assert_allclose(first, [[0.1, 0.2], [0.3, 0.4]])
+            np.testing.assert_allclose(second, first)
+            assert cache.stats()["hits"] == 1
@@ -0,0 +1,90 @@
+from unittest.mock import patch
+
+import pydantic
+import pytest
+
+import aletheia
+from aletheia.cache import MemoryCache
+from aletheia.cache.keys import MEMOIZED_TEXT_MIN_LENGTH, _text_digest, request_cache_key
+
+
+def test_request_cache_key_ignores_dict_order():
+    request1 = {"model": "openai/gpt-4o", "messages": [{"role": "user", "content": "hi"}], "temperature": 0.0}
+    request2 = {"temperature": 0.0, "messages": [{"content": "hi", "role": "user"}], "model": "openai/gpt-4o"}
+    assert request_cache_key(request1) == request_cache_key(request2)
+
+
+@pytest.mark.parametrize(
+    ("value1", "value2"),
+    [
+        (1, True),
+        (1, 1.0),
+        (1, "1"),
+        (None, "None"),
+        (["a", "b"], ["ab"]),
+        ({"a": "b"}, ["a", "b"]),
+        ("x" * MEMOIZED_TEXT_MIN_LENGTH, "x" * (MEMOIZED_TEXT_MIN_LENGTH - 1)),
+    ],
+)
+def test_request_cache_key_distinguishes_values(value1, value2):
+    assert request_cache_key({"value": value1}) != request_cache_key({"value": value2})
+
+
+def test_request_cache_key_supports_pydantic_models():
+    class ResponseFormat(pydantic.BaseModel):
+        response: str
+
+    class OtherResponseFormat(pydantic.BaseModel):
+        other_response: str
+
+    assert request_cache_key({"response_format": ResponseFormat}) == request_cache_key(
+        {"response_format": ResponseFormat}
+    )
+    assert request_cache_key({"response_format": ResponseFormat}) != request_cache_key(
+        {"response_format": OtherResponseFormat}
+    )
+    assert request_cache_key({"value": ResponseFormat(response="a")}) != request_cache_key(
+        {"value": ResponseFormat(response="b")}
+    )
+
+
+def test_request_cache_key_raises_for_unencodable_values():
+    class NonJsonSerializable:
+        pass
+
+    with pytest.raises(Exception):
+        request_cache_key({"value": NonJsonSerializable()})
+
+
+def test_request_cache_key_memoizes_long_text():
+    _text_digest.cache_clear()
+    passage = "passage " * MEMOIZED_TEXT_MIN_LENGTH
+    for query in ["query 1", "query 2"]:
+        request_cache_key({"messages": [{"role": "user", "content": passage}, {"role": "user", "content": query}]})
+
+    info = _text_digest.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+
+
+def test_lm_call_performs_a_single_cache_lookup():
+    class CountingCache(MemoryCache):
+        def __init__(self):
+            super().__init__()
+            self.lookups = 0
+
+        def get(self, key, default=None):
+            self.lookups += 1
+            return super().get(key, default)
+
+    cache = CountingCache()
+    aletheia.settings.configure(lm_cache=cache)
+
+    with patch("litellm.completion") as mock_completion:
+        mock_completion.return_value = {"choices": []}
+        lm = aletheia.LM(model="openai/aletheia-test-model", api_base="fakebase", api_key="fakekey")
+        lm.forward("Example query")
+        lm.forward("Example query")
+
+    assert cache.lookups == 2
+    assert mock_completion.call_count == 1
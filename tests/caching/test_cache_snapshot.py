@@ -0,0 +1,85 @@
+import gzip
+import pickle
+
+import pytest
+
+import aletheia
+from aletheia.cache import MemoryCache
+from aletheia.clients.lm import request_cache
+
+
+def test_export_and_import_replay_cached_requests(tmp_path):
+    calls = []
+
+    @request_cache()
+    def completion(request):
+        calls.append(request)
+        return {"answer": request["prompt"].upper()}
+
+    path = str(tmp_path / "snapshot.pkl.gz")
+    with aletheia.context(lm_cache=MemoryCache()):
+        completion({"prompt": "a"})
+        completion({"prompt": "b"})
+        assert aletheia.cache.export(path) == 2
+
+    with aletheia.context(lm_cache=MemoryCache()):
+        assert aletheia.cache.import_(path) == 2
+        assert completion({"prompt": "a"}) == {"answer": "A"}
+        assert completion({"prompt": "b"}) == {"answer": "B"}
+
+    assert len(calls) == 2
+
+
+def test_export_deduplicates_identical_values(tmp_path):
+    cache = MemoryCache()
+    value = {"embedding": [0.1] * 100}
+    cache.put("embedding:a", value)
+    cache.put("embedding:b", value)
+
+    path = tmp_path / "snapshot.pkl.gz"
+    with aletheia.context(lm_cache=None, embedding_cache=cache):
+        assert aletheia.cache.export(str(path)) == 2
+
+    with gzip.open(path, "rb") as f:
+        snapshot = pickle.load(f)
+    assert len(snapshot["entries"]) == 2
+    assert len(snapshot["blobs"]) == 1
+
+
+def test_export_filter(tmp_path):
+    cache = MemoryCache()
+    cache.put("litellm_completion:a", 1)
+    cache.put("litellm_text_completion:b", 2)
+
+    path = str(tmp_path / "snapshot.pkl.gz")
+    with aletheia.context(lm_cache=cache):
+        exported = aletheia.cache.export(path, filter=lambda namespace, key: key.startswith("litellm_completion:"))
+    assert exported == 1
+
+    with aletheia.context(lm_cache=MemoryCache()):
+        aletheia.cache.import_(path)
+        assert aletheia.settings.lm_cache.get("litellm_completion:a") == 1
+        assert "litellm_text_completion:b" not in aletheia.settings.lm_cache
+
+
+def test_import_configures_missing_caches(tmp_path):
+    path = str(tmp_path / "snapshot.pkl.gz")
+    cache = MemoryCache()
+    cache.put("embedding:a", [0.1, 0.2])
+    with aletheia.context(embedding_cache=cache):
+        aletheia.cache.export(path, namespaces=["embeddings"])
+
+    assert aletheia.settings.embedding_cache is None
+    aletheia.cache.import_(path)
+    assert aletheia.settings.embedding_cache.get("embedding:a") == [0.1, 0.2]
+
+
+def test_import_rejects_corrupted_snapshots(tmp_path):
+    path = tmp_path / "snapshot.pkl.gz"
+    with gzip.open(path, "wb") as f:
+        pickle.dump(
+            {"format": "aletheia-cache-snapshot", "version": 1, "entries": [], "blobs": {"0" * 64: b"data"}}, f
+        )
+
+    with pytest.raises(ValueError, match="corrupted"):
+        aletheia.cache.import_(str(path))
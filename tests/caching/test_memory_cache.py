@@ -0,0 +1,85 @@
+import time
+from unittest.mock import patch
+
+import aletheia
+from aletheia.cache import MemoryCache
+
+
+def test_memory_cache_evicts_least_recently_used_entries():
+    cache = MemoryCache(max_entries=2, max_bytes=None)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    # Touch "a" so that "b" becomes the least recently used entry
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_memory_cache_is_bounded_by_bytes():
+    value = "x" * 1000
+    cache = MemoryCache(max_entries=None, max_bytes=2500)
+    for i in range(10):
+        cache.put(i, value)
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] <= 2500
+    assert stats["evictions"] == 8
+    assert cache.get(9) == value
+
+
+def test_memory_cache_skips_values_larger_than_the_limit():
+    cache = MemoryCache(max_entries=None, max_bytes=100)
+    cache.put("small", "x")
+    cache.put("large", "x" * 1000)
+
+    assert "small" in cache
+    assert "large" not in cache
+
+
+def test_memory_cache_entries_expire_after_ttl():
+    cache = MemoryCache(ttl=0.05)
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+
+    time.sleep(0.1)
+    assert cache.get("a", "missing") == "missing"
+
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["entries"] == 0
+    assert stats["bytes"] == 0
+
+
+def test_memory_cache_records_hits_and_misses():
+    cache = MemoryCache()
+    cache.get("a")
+    cache.put("a", None)
+    cache.get("a")
+    cache.get("a")
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_lm_calls_are_recorded_in_settings_lm_cache():
+    cache = MemoryCache()
+    aletheia.settings.configure(lm_cache=cache)
+
+    with patch("litellm.completion") as mock_completion:
+        mock_completion.return_value = {"choices": []}
+        lm = aletheia.LM(model="openai/aletheia-test-model", api_base="fakebase", api_key="fakekey")
+        lm.forward("Example query")
+        lm.forward("Example query")
+
+    assert mock_completion.call_count == 1
+    stats = aletheia.settings.lm_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+    assert stats["bytes"] > 0
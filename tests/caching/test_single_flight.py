@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+import aletheia
+from aletheia.cache import MemoryCache
+from aletheia.cache.single_flight import SingleFlight
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    single_flight = SingleFlight()
+    num_calls = 0
+    lock = threading.Lock()
+
+    def slow_call():
+        nonlocal num_calls
+        with lock:
+            num_calls += 1
+        time.sleep(0.2)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        outcomes = list(executor.map(lambda _: single_flight.do("key", slow_call), range(8)))
+
+    assert num_calls == 1
+    assert [result for result, _ in outcomes] == ["result"] * 8
+    assert sum(shared for _, shared in outcomes) == 7
+
+
+def test_single_flight_propagates_leader_exceptions():
+    single_flight = SingleFlight()
+
+    def failing_call():
+        time.sleep(0.2)
+        raise ValueError("provider error")
+
+    def call(_):
+        try:
+            single_flight.do("key", failing_call)
+        except ValueError as e:
+            return str(e)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        errors = list(executor.map(call, range(4)))
+
+    assert errors == ["provider error"] * 4
+    # Once the failed call has completed, the key can be called again
+    assert single_flight.do("key", lambda: "retried") == ("retried", False)
+
+
+def test_identical_concurrent_lm_requests_are_sent_once():
+    aletheia.settings.configure(lm_cache=MemoryCache())
+
+    def slow_completion(**kwargs):
+        time.sleep(0.2)
+        return {"choices": []}
+
+    with patch("litellm.completion", side_effect=slow_completion) as mock_completion:
+        lm = aletheia.LM(model="openai/aletheia-test-model", api_base="fakebase", api_key="fakekey")
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: lm.forward("Example query"), range(8)))
+
+    assert mock_completion.call_count == 1
+
+
+@pytest.mark.anyio
+async def test_identical_concurrent_async_lm_requests_are_sent_once():
+    aletheia.settings.configure(lm_cache=MemoryCache())
+
+    async def slow_acompletion(**kwargs):
+        await asyncio.sleep(0.2)
+        return {"choices": []}
+
+    with patch("litellm.acompletion", side_effect=slow_acompletion) as mock_acompletion:
+        lm = aletheia.LM(model="openai/aletheia-test-model", api_base="fakebase", api_key="fakekey")
+        await asyncio.gather(*[lm.aforward("Example query") for _ in range(8)])
+
+    assert mock_acompletion.call_count == 1
+
+
+@pytest.mark.anyio
+async def test_cancelling_an_async_waiter_does_not_affect_the_others():
+    single_flight = SingleFlight()
+    num_calls = 0
+
+    async def slow_call():
+        nonlocal num_calls
+        num_calls += 1
+        await asyncio.sleep(0.2)
+        return "result"
+
+    leader = asyncio.create_task(single_flight.ado("key", slow_call))
+    await asyncio.sleep(0.01)
+    waiters = [asyncio.create_task(single_flight.ado("key", slow_call)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+
+    waiters[0].cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiters[0]
+
+    assert await leader == ("result", False)
+    assert [await waiter for waiter in waiters[1:]] == [("result", True)] * 2
+    assert num_calls == 1
+
+
+@pytest.mark.anyio
+async def test_waiters_retry_when_the_async_leader_is_cancelled():
+    single_flight = SingleFlight()
+    num_calls = 0
+
+    async def slow_call():
+        nonlocal num_calls
+        num_calls += 1
+        await asyncio.sleep(0.2)
+        return "result"
+
+    leader = asyncio.create_task(single_flight.ado("key", slow_call))
+    await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(single_flight.ado("key", slow_call))
+    await asyncio.sleep(0.01)
+
+    leader.cancel()
+    assert await waiter == ("result", False)
+    assert num_calls == 2
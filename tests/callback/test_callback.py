@@ -258,3 +258,23 @@ def test_active_id():
     assert len(set(callback.call_ids)) == 3
     parent_call_id = callback.call_ids[0]
     assert callback.parent_call_ids == [None, parent_call_id, parent_call_id]
+
+
+@pytest.mark.anyio
+async def test_callback_on_async_methods():
+    callback = MyCallback()
+    aletheia.settings.configure(
+        lm=DummyLM([{"answer": "test output"}]),
+        callbacks=[callback],
+    )
+
+    class Target(aletheia.Module):
+        @with_callbacks
+        async def aforward(self, x: int):
+            return x * 2
+
+    result = await Target().aforward(3)
+    assert result == 6
+    assert [call["handler"] for call in callback.calls] == ["on_module_start", "on_module_end"]
+    assert callback.calls[0]["inputs"] == {"x": 3}
+    assert callback.calls[1]["outputs"] == 6
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from unittest import mock
+
+import pytest
+from litellm.types.utils import Choices, Message, ModelResponse, Usage
+
+import aletheia
+from aletheia.cache import MemoryCache
+
+
+def slow_primary_completion(**request):
+    # The primary deployment is stuck, while the secondary one answers immediately
+    if request.get("api_base") != "http://secondary":
+        time.sleep(1.0)
+    return ModelResponse(
+        choices=[Choices(message=Message(content=request.get("api_base") or "primary"))],
+        model=request["model"],
+        usage=Usage(prompt_tokens=10, completion_tokens=5, total_tokens=15),
+    )
+
+
+def test_slow_requests_are_hedged():
+    hedging = aletheia.Hedging(delay=0.05)
+    calls = []
+
+    def send(request):
+        calls.append(request)
+        time.sleep(1.0 if len(calls) == 1 else 0.0)
+        return len(calls)
+
+    start = time.monotonic()
+    assert hedging.call(send, {"model": "openai/test-model"}) == 2
+    assert time.monotonic() - start < 0.5
+    assert hedging.stats() == {"delay": 0.05, "requests": 1, "hedged": 1, "hedge_wins": 1}
+
+
+def test_fast_requests_are_not_hedged():
+    hedging = aletheia.Hedging(delay=1.0)
+    send = mock.Mock(return_value="response")
+
+    assert hedging.call(send, {"model": "openai/test-model"}) == "response"
+    send.assert_called_once()
+    assert hedging.stats()["hedged"] == 0
+
+
+def test_hedging_delay_is_a_percentile_of_recent_latencies():
+    hedging = aletheia.Hedging(percentile=90, min_samples=10)
+    for latency in range(1, 10):
+        hedging._record_latency(latency / 10)
+    assert hedging.hedge_delay() is None
+
+    hedging._record_latency(1.0)
+    assert hedging.hedge_delay() == 1.0
+    for latency in range(11, 101):
+        hedging._record_latency(latency / 10)
+    assert hedging.hedge_delay() == pytest.approx(9.1)
+
+
+def test_failed_hedges_fall_back_to_the_other_request():
+    hedging = aletheia.Hedging(delay=0.05, deployment={"api_base": "http://secondary"})
+
+    def send(request):
+        if request.get("api_base") == "http://secondary":
+            raise ValueError("Secondary deployment down")
+        time.sleep(0.2)
+        return "primary"
+
+    assert hedging.call(send, {"model": "openai/test-model"}) == "primary"
+
+    with pytest.raises(ValueError, match="down"):
+        hedging.call(lambda request: send({**request, "api_base": "http://secondary"}), {"model": "openai/test-model"})
+
+
+@pytest.mark.anyio
+async def test_async_hedging_cancels_the_losing_request():
+    hedging = aletheia.Hedging(delay=0.05, deployment={"api_base": "http://secondary"})
+    cancelled = asyncio.Event()
+
+    async def send(request):
+        if request.get("api_base") == "http://secondary":
+            return "secondary"
+        try:
+            await asyncio.sleep(1.0)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "primary"
+
+    assert await hedging.acall(send, {"model": "openai/test-model"}) == "secondary"
+    await asyncio.wait_for(cancelled.wait(), timeout=1.0)
+
+
+def test_hedged_lm_caches_the_winning_response_and_tracks_its_usage_once():
+    hedging = aletheia.Hedging(delay=0.05, deployment={"api_base": "http://secondary"})
+    lm = aletheia.LM("openai/test-model", api_base="http://primary", hedging=hedging)
+    cache = MemoryCache()
+
+    with mock.patch("litellm.completion", side_effect=slow_primary_completion) as completion:
+        with aletheia.context(lm_cache=cache), aletheia.track_usage() as usage:
+            assert lm("query") == ["http://secondary"]
+            assert lm("query") == ["http://secondary"]
+            assert completion.call_count == 2
+
+    assert len(list(cache.items())) == 1
+    assert usage.get_total_tokens()["openai/test-model"]["total_tokens"] == 15
+    assert lm.copy(temperature=0.5).hedging is hedging
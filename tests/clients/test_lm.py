@@ -3,6 +3,7 @@ from unittest import mock
 import litellm
 import pydantic
 import pytest
+from litellm.types.utils import Choices, Message, ModelResponse
 
 import aletheia
 from tests.test_utils.server import litellm_test_server, read_litellm_test_server_request_logs
@@ -74,6 +75,53 @@ def test_text_lms_can_be_queried(litellm_test_server):
     assert azure_openai_lm("azure openai query") == expected_response
 
 
+@pytest.mark.anyio
+@pytest.mark.parametrize("model_type", ["chat", "text"])
+async def test_lms_can_be_queried_asynchronously(litellm_test_server, model_type):
+    api_base, _ = litellm_test_server
+    expected_response = ["Hi!"]
+
+    openai_lm = aletheia.LM(
+        model="openai/aletheia-test-model",
+        api_base=api_base,
+        api_key="fakekey",
+        model_type=model_type,
+    )
+    assert await openai_lm.acall("openai async query") == expected_response
+    assert len(openai_lm.history) == 1
+
+
+@pytest.mark.parametrize("model_type", ["chat", "text"])
+def test_lms_can_be_queried_in_batches(litellm_test_server, model_type):
+    api_base, _ = litellm_test_server
+
+    openai_lm = aletheia.LM(
+        model="openai/aletheia-test-model",
+        api_base=api_base,
+        api_key="fakekey",
+        model_type=model_type,
+    )
+    requests = [{"prompt": f"batch query {i}"} for i in range(4)]
+    # Each batch runs on its own event loop
+    for _ in range(2):
+        assert openai_lm.batch_call(requests, max_concurrency=2) == [["Hi!"]] * 4
+    assert len(openai_lm.history) == 8
+
+
+def test_batch_call_returns_per_request_exceptions():
+    class FlakyLM(aletheia.BaseLM):
+        def forward(self, prompt=None, messages=None, **kwargs):
+            if prompt == "fail":
+                raise ValueError("failed request")
+            return ModelResponse(choices=[Choices(message=Message(content=prompt))], model="flaky")
+
+    results = FlakyLM("flaky").batch_call([{"prompt": "a"}, {"prompt": "fail"}, {"prompt": "b"}])
+
+    assert results[0] == ["a"]
+    assert isinstance(results[1], ValueError)
+    assert results[2] == ["b"]
+
+
 def test_lm_calls_support_callables(litellm_test_server):
     api_base, _ = litellm_test_server
 
@@ -250,3 +298,20 @@ def test_dump_state():
         "launch_kwargs": { "temperature": 1 },
         "train_kwargs": { "temperature": 5 },
     }
+
+
+def test_copy_overrides_kwargs_and_shares_everything_else():
+    callback = aletheia.utils.BaseCallback()
+    lm = aletheia.LM("openai/gpt-4o-mini", temperature=0.0, callbacks=[callback])
+    # E.g. the server process of a launched local model, which copies should use rather than duplicate
+    lm.process = mock.Mock()
+
+    copied = lm.copy(temperature=0.7, num_retries=2)
+
+    assert copied.kwargs["temperature"] == 0.7
+    assert lm.kwargs["temperature"] == 0.0
+    assert copied.num_retries == 2 and lm.num_retries == 8
+    assert copied.provider is lm.provider
+    assert copied.callbacks[0] is callback
+    assert copied.process is lm.process
+    assert copied.history is not lm.history
@@ -0,0 +1,60 @@
+import json
+
+from litellm.types.utils import Choices, Message, ModelResponse
+
+import aletheia
+from aletheia.clients.base_lm import GLOBAL_HISTORY
+from aletheia.clients.history import JSONLHistorySink, LMHistory
+
+
+class EchoLM(aletheia.BaseLM):
+    def __init__(self):
+        super().__init__("openai/echo-model")
+
+    def forward(self, prompt=None, messages=None, **kwargs):
+        return ModelResponse(choices=[Choices(message=Message(content=prompt))], model=self.model)
+
+
+def test_history_keeps_the_most_recent_entries():
+    history = LMHistory(max_size=3)
+    for i in range(10):
+        history.append({"outputs": [i]})
+    assert [entry["outputs"] for entry in history] == [[7], [8], [9]]
+
+
+def test_history_size_is_configurable():
+    lm = EchoLM()
+    with aletheia.context(max_history_size=2):
+        for i in range(5):
+            lm(str(i))
+        assert len(lm.history) == 2
+        assert len(GLOBAL_HISTORY) <= 2
+    assert lm.history[-1]["outputs"] == ["4"]
+
+
+def test_history_entries_are_compact_by_default():
+    lm = EchoLM()
+    lm("hello")
+    assert "response" not in lm.history[-1]
+    assert lm.history[-1]["outputs"] == ["hello"]
+
+    with aletheia.context(history_include_response=True):
+        lm("hello")
+    assert isinstance(lm.history[-1]["response"], ModelResponse)
+
+
+def test_history_entries_are_written_to_the_sink(tmp_path):
+    path = tmp_path / "history.jsonl"
+    sink = JSONLHistorySink(str(path), max_bytes=2000, backup_count=1)
+    lm = EchoLM()
+
+    with aletheia.context(history_sink=sink):
+        for i in range(20):
+            lm(f"prompt {i}")
+    sink.close()
+
+    # The file was rotated, and the current file holds the latest entries
+    assert (tmp_path / "history.jsonl.1").exists()
+    entries = [json.loads(line) for line in path.read_text().splitlines()]
+    assert entries[-1]["outputs"] == ["prompt 19"]
+    assert entries[-1]["model"] == "openai/echo-model"
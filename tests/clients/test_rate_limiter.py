@@ -0,0 +1,89 @@
+from unittest import mock
+
+import litellm
+import pytest
+
+from aletheia.clients.rate_limiter import RateLimiter, _parse_duration, call_with_rate_limit, get_rate_limiter
+
+
+@pytest.fixture
+def sleeps():
+    with mock.patch("aletheia.clients.rate_limiter.time.sleep") as sleep:
+        yield sleep
+
+
+class MockResponse:
+    def __init__(self, total_tokens=None, headers=None):
+        self.usage = litellm.Usage(total_tokens=total_tokens) if total_tokens is not None else None
+        self._hidden_params = {"additional_headers": headers or {}}
+
+
+def test_requests_are_limited_per_minute(sleeps):
+    limiter = RateLimiter(rpm=60)
+    for _ in range(60):
+        assert limiter.acquire() == 0
+
+    # The bucket is empty: the next request waits for one request's worth of refill, i.e. a second
+    assert limiter.acquire() == pytest.approx(1.0, abs=0.05)
+    assert limiter.acquire() == pytest.approx(2.0, abs=0.05)
+    assert sleeps.call_count == 2
+
+
+def test_tokens_are_limited_per_minute(sleeps):
+    limiter = RateLimiter(tpm=600)
+    assert limiter.acquire(tokens=600) == 0
+    assert limiter.acquire(tokens=100) == pytest.approx(10.0, abs=0.05)
+
+
+def test_unused_reserved_tokens_are_refunded(sleeps):
+    limiter = RateLimiter(tpm=600)
+    limiter.acquire(tokens=600)
+    limiter.record_success(estimated_tokens=600, response=MockResponse(total_tokens=100))
+    assert limiter.acquire(tokens=500) == 0
+
+
+def test_rate_limit_errors_shrink_limits_and_pause_requests(sleeps):
+    limiter = RateLimiter(rpm=100)
+    assert limiter.record_rate_limit(retry_after=2.0) == 2.0
+    assert limiter.rpm == pytest.approx(70)
+    assert limiter.acquire() >= 1.9
+
+    for _ in range(100):
+        limiter.record_success()
+    assert limiter.rpm == 100
+
+
+def test_limits_adapt_to_rate_limit_headers(sleeps):
+    limiter = RateLimiter(rpm=1000)
+    headers = {
+        "x-ratelimit-limit-requests": "50",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "1.5s",
+    }
+    limiter.record_success(response=MockResponse(headers=headers))
+
+    assert limiter.rpm == 50
+    assert limiter.acquire() == pytest.approx(1.5, abs=0.05)
+
+
+def test_rate_limit_errors_are_retried(sleeps):
+    limiter = get_rate_limiter("openai/rate-limited-model")
+    call = mock.Mock(
+        side_effect=[
+            litellm.RateLimitError(message="Rate limit exceeded", llm_provider="openai", model="rate-limited-model"),
+            "response",
+        ]
+    )
+
+    assert call_with_rate_limit({"model": "openai/rate-limited-model", "messages": []}, 2, call) == "response"
+    assert call.call_count == 2
+    assert limiter.stats()["throttled"] == 1
+    sleeps.assert_called_once()
+
+
+def test_parse_duration():
+    assert _parse_duration("20ms") == pytest.approx(0.02)
+    assert _parse_duration("1.5s") == 1.5
+    assert _parse_duration("6m0s") == 360
+    assert _parse_duration("2") == 2
+    assert _parse_duration(None) is None
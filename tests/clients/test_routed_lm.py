@@ -0,0 +1,114 @@
+import threading
+import time
+
+import litellm
+import pytest
+from litellm.types.utils import Choices, Message, ModelResponse
+
+import aletheia
+
+
+class EndpointLM(aletheia.BaseLM):
+    def __init__(self, name, delay=0.0, fail=False, release=None):
+        super().__init__("openai/test-model", api_base=f"http://{name}")
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.release = release
+        self.calls = 0
+
+    def forward(self, prompt=None, messages=None, **kwargs):
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(timeout=5)
+        time.sleep(self.delay)
+        if self.fail:
+            raise litellm.InternalServerError(message="Endpoint down", llm_provider="openai", model=self.model)
+        return ModelResponse(choices=[Choices(message=Message(content=self.name))], model=self.model)
+
+    async def aforward(self, prompt=None, messages=None, **kwargs):
+        return self.forward(prompt=prompt, messages=messages, **kwargs)
+
+
+def test_routed_lm_sends_requests_to_the_least_loaded_endpoint():
+    release = threading.Event()
+    lms = [EndpointLM("a", release=release), EndpointLM("b", release=release)]
+    lm = aletheia.RoutedLM(lms)
+
+    threads = [threading.Thread(target=lm, args=("query",)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+        # Wait for the request to be in flight before sending the next one
+        while sum(endpoint["in_flight"] for endpoint in lm.stats()) == 0:
+            time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert [lm.calls for lm in lms] == [1, 1]
+
+
+def test_routed_lm_prefers_the_fastest_endpoint():
+    lms = [EndpointLM("slow", delay=0.05), EndpointLM("fast")]
+    lm = aletheia.RoutedLM(lms, strategy="latency")
+
+    outputs = [lm("query")[0] for _ in range(6)]
+
+    # Each endpoint is measured once, after which the fast one receives every request
+    assert outputs[2:] == ["fast"] * 4
+    assert lms[0].calls == 1
+
+
+def test_routed_lm_fails_over_and_ejects_failing_endpoints():
+    lms = [EndpointLM("down", fail=True), EndpointLM("up")]
+    lm = aletheia.RoutedLM(lms, failure_threshold=2, cooldown=60)
+
+    assert [lm("query")[0] for _ in range(5)] == ["up"] * 5
+
+    # The failing endpoint is ejected after two failures, and receives no more requests
+    assert lms[0].calls <= 2
+    assert lm.stats()[0]["healthy"] == (lms[0].calls < 2)
+    assert lm.stats()[1]["healthy"]
+
+
+def test_routed_lm_probes_ejected_endpoints_after_the_cooldown():
+    down = EndpointLM("flaky", fail=True)
+    lm = aletheia.RoutedLM([down, EndpointLM("up")], strategy="latency", failure_threshold=1, cooldown=0.05)
+
+    while down.calls == 0:
+        lm("query")
+    assert not lm.stats()[0]["healthy"]
+
+    down.fail = False
+    time.sleep(0.1)
+    while lm.stats()[0]["requests"] < 2:
+        lm("query")
+    assert lm.stats()[0]["healthy"]
+
+
+def test_routed_lm_does_not_retry_invalid_requests():
+    class InvalidRequestLM(EndpointLM):
+        def forward(self, prompt=None, messages=None, **kwargs):
+            self.calls += 1
+            raise litellm.BadRequestError(message="Bad request", llm_provider="openai", model=self.model)
+
+    lms = [InvalidRequestLM("a"), InvalidRequestLM("b")]
+    with pytest.raises(litellm.BadRequestError):
+        aletheia.RoutedLM(lms)("query")
+    assert sum(lm.calls for lm in lms) == 1
+
+
+@pytest.mark.anyio
+async def test_routed_lm_can_be_queried_asynchronously():
+    lm = aletheia.RoutedLM([EndpointLM("a"), EndpointLM("b")])
+    assert (await lm.acall("query"))[0] in ("a", "b")
+    assert len(lm.history) == 1
+
+
+def test_routed_lm_works_with_predict():
+    lm = aletheia.RoutedLM([EndpointLM("[[ ## answer ## ]]\nblue"), EndpointLM("[[ ## answer ## ]]\nblue")])
+    with aletheia.context(lm=lm):
+        assert aletheia.Predict("question -> answer")(question="What color is the sky?").answer == "blue"
+
+    copied = lm.copy(temperature=0.5)
+    assert all(endpoint.kwargs["temperature"] == 0.5 for endpoint in copied.lms)
@@ -0,0 +1,69 @@
+from unittest import mock
+
+import litellm
+import pytest
+
+import aletheia
+from aletheia.clients.tokens import (
+    calibrate_token_count,
+    count_tokens,
+    get_context_window,
+    register_context_window,
+)
+from aletheia.utils.dummies import DummyLM
+
+
+def test_count_tokens_with_a_local_tokenizer():
+    messages = [{"role": "user", "content": "hello world"}]
+    # Two text tokens, plus the message and prompt overhead
+    assert count_tokens("openai/gpt-4o-mini", messages=messages) == 2 + 4 + 3
+    assert count_tokens("gpt-4o-mini", prompt="hello world") == 2
+
+
+def test_token_estimates_are_calibrated_with_reported_usage():
+    model = "test-provider/calibrated-model"
+    prompt = "x" * 400
+    assert count_tokens(model, prompt=prompt) == 100
+
+    for _ in range(50):
+        calibrate_token_count(model, 200, prompt=prompt)
+    assert count_tokens(model, prompt=prompt) == pytest.approx(200, abs=2)
+
+
+def test_context_window_registry():
+    assert get_context_window("openai/gpt-4o-mini") == 128000
+    assert get_context_window("test-provider/unknown-model") is None
+
+    register_context_window("test-provider/registered-model", 4096)
+    assert get_context_window("test-provider/registered-model") == 4096
+
+
+def test_adapter_drops_history_to_fit_the_context_window():
+    class QA(aletheia.Signature):
+        question: str = aletheia.InputField()
+        history: aletheia.History = aletheia.InputField()
+        answer: str = aletheia.OutputField()
+
+    lm = DummyLM([{"answer": "Paris"}])
+    lm.model = "test-provider/small-model"
+    history = aletheia.History(messages=[{"question": "x" * 2000, "answer": "y"}, {"question": "Hi", "answer": "Hi"}])
+
+    register_context_window(lm.model, 400)
+    with aletheia.context(lm=lm):
+        assert aletheia.Predict(QA)(question="What is the capital of France?", history=history).answer == "Paris"
+
+    # The oversized first turn was dropped, and the second one kept
+    messages = lm.history[-1]["messages"]
+    assert "x" * 2000 not in str(messages)
+    assert any("[[ ## question ## ]]\nHi\n" in message["content"] for message in messages)
+
+
+def test_adapter_rejects_prompts_exceeding_the_context_window_without_sending_them():
+    lm = DummyLM([{"answer": "Paris"}])
+    lm.model = "test-provider/tiny-model"
+    register_context_window(lm.model, 50)
+
+    with mock.patch.object(DummyLM, "forward") as forward:
+        with aletheia.context(lm=lm), pytest.raises(litellm.ContextWindowExceededError):
+            aletheia.Predict("question -> answer")(question="x" * 1000)
+    forward.assert_not_called()
@@ -250,3 +250,13 @@ def test_evaluate_callback():
     assert callback.start_call_count == 1
     assert callback.end_call_outputs == 100.0
     assert callback.end_call_count == 1
+
+
+def test_evaluate_metric_processes():
+    aletheia.settings.configure(lm=DummyLM({"What is 1+1?": {"answer": "2"}, "What is 2+2?": {"answer": "5"}}))
+    devset = [new_example("What is 1+1?", "2"), new_example("What is 2+2?", "4")]
+    ev = Evaluate(devset=devset, metric=answer_exact_match, num_threads=2, metric_processes=2, return_all_scores=True)
+    score, scores = ev(Predict("question -> answer"))
+
+    assert score == 50.0
+    assert sorted(scores) == [False, True]
@@ -261,6 +261,14 @@ def test_forward_method():
     assert result == "No more responses"
 
 
+@pytest.mark.anyio
+async def test_async_forward_method():
+    program = Predict("question -> answer")
+    aletheia.settings.configure(lm=DummyLM([{"answer": "Paris"}]))
+    result = await program.acall(question="What is the capital of France?")
+    assert result.answer == "Paris"
+
+
 def test_forward_method2():
     program = Predict("question -> answer1, answer2")
     aletheia.settings.configure(lm=DummyLM([{"answer1": "my first answer", "answer2": "my second answer"}]))
@@ -1,3 +1,7 @@
+from unittest import mock
+
+import pytest
+
 import aletheia
 from aletheia.primitives.program import Module, set_attribute_by_name  # Adjust the import based on your file structure
 from aletheia.utils import DummyLM
@@ -48,6 +52,120 @@ def test_forward():
     assert result == "2"
 
 
+@pytest.mark.anyio
+async def test_async_call():
+    class AsyncHopModule(HopModule):
+        async def aforward(self, question):
+            query = (await self.predict1.acall(question=question)).query
+            return await self.predict2.acall(query=query)
+
+    aletheia.settings.configure(
+        lm=DummyLM(
+            {
+                "What is 1+1?": {"query": "let me check"},
+                "let me check": {"answer": "2"},
+            }
+        )
+    )
+    result = await AsyncHopModule().acall(question="What is 1+1?")
+    assert result.answer == "2"
+
+
+@pytest.mark.anyio
+async def test_async_call_falls_back_to_forward():
+    aletheia.settings.configure(
+        lm=DummyLM(
+            {
+                "What is 1+1?": {"query": "let me check"},
+                "let me check": {"answer": "2"},
+            }
+        )
+    )
+    result = await HopModule().acall(question="What is 1+1?")
+    assert result.answer == "2"
+
+
+def test_batch_sends_lm_requests_in_bulk():
+    lm = DummyLM({"What is 1+1?": {"answer": "2"}, "What is 2+2?": {"answer": "4"}})
+    aletheia.settings.configure(lm=lm)
+    program = aletheia.Predict("question -> answer")
+    examples = [
+        aletheia.Example(question="What is 1+1?").with_inputs("question"),
+        aletheia.Example(question="What is 2+2?").with_inputs("question"),
+    ]
+
+    with mock.patch.object(lm, "batch_call", wraps=lm.batch_call) as batch_call:
+        results = program.batch(examples)
+
+    batch_call.assert_called_once()
+    assert [result.answer for result in results] == ["2", "4"]
+
+
+def test_batch_returns_failed_examples():
+    class FailingLM(DummyLM):
+        def __call__(self, prompt=None, messages=None, **kwargs):
+            if "fail" in messages[-1]["content"]:
+                raise ValueError("failed request")
+            return super().__call__(prompt=prompt, messages=messages, **kwargs)
+
+    aletheia.settings.configure(lm=FailingLM({"ok": {"answer": "fine"}}))
+    examples = [
+        aletheia.Example(question="ok").with_inputs("question"),
+        aletheia.Example(question="fail").with_inputs("question"),
+    ]
+
+    results, failed_examples, exceptions = aletheia.Predict("question -> answer").batch(
+        examples, return_failed_examples=True
+    )
+    assert results[0].answer == "fine"
+    assert results[1] is None
+    assert failed_examples == [examples[1]]
+    assert isinstance(exceptions[0], ValueError)
+
+
+def test_batch_forward_stops_sending_chunks_at_max_errors():
+    class FailingLM(DummyLM):
+        def __call__(self, prompt=None, messages=None, **kwargs):
+            raise ValueError("failed request")
+
+    lm = FailingLM({})
+    aletheia.settings.configure(lm=lm)
+    examples = [aletheia.Example(question=f"What is {i}+{i}?").with_inputs("question") for i in range(20)]
+
+    with mock.patch.object(lm, "batch_call", wraps=lm.batch_call) as batch_call:
+        with pytest.raises(Exception, match="Execution cancelled"):
+            aletheia.Predict("question -> answer").batch(examples, num_threads=2, max_errors=2)
+
+    # The chunks after the one that reached `max_errors` aren't sent
+    assert batch_call.call_count < 10
+
+
+def test_batch_forward_reports_progress(capsys):
+    lm = DummyLM({f"What is {i}+{i}?": {"answer": str(2 * i)} for i in range(6)})
+    aletheia.settings.configure(lm=lm)
+    examples = [aletheia.Example(question=f"What is {i}+{i}?").with_inputs("question") for i in range(6)]
+
+    with mock.patch.object(lm, "batch_call", wraps=lm.batch_call) as batch_call:
+        results = aletheia.Predict("question -> answer").batch(examples, num_threads=2)
+
+    assert [result.answer for result in results] == [str(2 * i) for i in range(6)]
+    assert batch_call.call_count == 3
+    assert "Processed 6 / 6 examples" in capsys.readouterr().out
+
+    aletheia.Predict("question -> answer").batch(examples, num_threads=2, disable_progress_bar=True)
+    assert "Processed" not in capsys.readouterr().out
+
+
+def test_batch_streams_results_as_they_complete():
+    lm = DummyLM({f"What is {i}+{i}?": {"answer": str(2 * i)} for i in range(20)})
+    aletheia.settings.configure(lm=lm)
+    examples = (aletheia.Example(question=f"What is {i}+{i}?").with_inputs("question") for i in range(20))
+
+    results = aletheia.Predict("question -> answer").batch(examples, num_threads=4, stream=True)
+    assert not isinstance(results, list)
+    assert sorted((index, result.answer) for index, result in results) == [(i, str(2 * i)) for i in range(20)]
+
+
 def test_nested_named_predictors():
     class Hop2Module(aletheia.Module):
         def __init__(self):
@@ -409,3 +409,24 @@ def test_signature_field_with_constraints():
     output2_constraints = MySignature.output_fields["outputs2"].json_schema_extra["constraints"]
     assert "greater than or equal to: 5" in output2_constraints
     assert "less than or equal to: 10" in output2_constraints
+
+
+def test_equal_signatures_are_the_same_class():
+    assert Signature("question -> answer: int") is Signature("question -> answer: int")
+    assert Signature("question -> answer") is not Signature("question -> answer", "Answer the question.")
+
+    base = Signature("question -> answer")
+    hinted = base.append("hint_", InputField(desc="A hint"))
+    assert hinted is base.append("hint_", InputField(desc="A hint"))
+    assert hinted is not base.append("hint_", InputField(desc="Another hint"))
+    assert base.with_instructions("Be brief.") is base.with_instructions("Be brief.")
+    assert hinted.delete("hint_") is hinted.delete("hint_")
+
+
+def test_signatures_modified_in_place_are_not_reused():
+    signature = Signature("context -> summary")
+    signature.instructions = "Summarize the context."
+
+    fresh = Signature("context -> summary")
+    assert fresh is not signature
+    assert fresh.instructions == "Given the fields `context`, produce the fields `summary`."
@@ -0,0 +1,63 @@
+import threading
+import time
+
+import aletheia
+from aletheia.utils.governor import governor
+from aletheia.utils.parallelizer import ParallelExecutor
+
+
+class RunningCounter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.threads = set()
+
+    def __call__(self, x):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            self.threads.add(threading.get_ident())
+        time.sleep(0.01)
+        with self.lock:
+            self.running -= 1
+        return x
+
+
+def test_nested_executors_are_bounded_by_the_top_level_one():
+    counter = RunningCounter()
+
+    def outer(x):
+        inner = ParallelExecutor(num_threads=4, disable_progress_bar=True)
+        return sum(inner.execute(counter, range(x, x + 4)))
+
+    results = ParallelExecutor(num_threads=4, disable_progress_bar=True).execute(outer, range(8))
+
+    assert results == [4 * x + 6 for x in range(8)]
+    assert counter.max_running <= 4
+    assert len(counter.threads) <= 8
+    assert governor.stats()["in_use"] == 0
+
+
+def test_configured_budget_bounds_top_level_executors():
+    counter = RunningCounter()
+
+    with aletheia.context(max_parallel_workers=2):
+        results = ParallelExecutor(num_threads=8, disable_progress_bar=True).execute(counter, range(20))
+
+    assert results == list(range(20))
+    assert counter.max_running <= 2
+    assert governor.stats()["in_use"] == 0
+
+
+def test_slot_is_reused_by_a_context_holding_one():
+    assert not governor.holds_slot()
+
+    with governor.slot():
+        assert governor.holds_slot()
+        assert governor.stats()["in_use"] == 1
+        with governor.slot():
+            assert governor.stats()["in_use"] == 1
+
+    assert not governor.holds_slot()
+    assert governor.stats()["in_use"] == 0
@@ -0,0 +1,119 @@
+import threading
+import time
+
+from aletheia.clients.rate_limiter import _notify_rate_limit
+from aletheia.utils.parallelizer import AdaptiveConcurrency, ParallelExecutor
+
+
+def test_items_are_taken_lazily_within_a_bounded_window():
+    lock = threading.Lock()
+    taken = 0
+    running = 0
+    max_ahead = 0
+
+    def items():
+        nonlocal taken, max_ahead
+        for i in range(100):
+            with lock:
+                taken += 1
+                max_ahead = max(max_ahead, taken - running)
+            yield i
+
+    def double(x):
+        nonlocal running
+        with lock:
+            running += 1
+        return 2 * x
+
+    results = ParallelExecutor(num_threads=4, disable_progress_bar=True).execute(double, items())
+
+    assert results == [2 * i for i in range(100)]
+    assert max_ahead <= 4 + 1
+
+
+def test_failed_items_have_no_result():
+    def invert(x):
+        return 1 / x
+
+    results = ParallelExecutor(num_threads=2, disable_progress_bar=True, max_errors=10).execute(invert, [1, 0, 2])
+    assert results == [1.0, None, 0.5]
+
+
+def test_results_are_yielded_in_completion_order():
+    release = threading.Event()
+
+    def wait_for_release(x):
+        if x == 0:
+            release.wait(5)
+        return x
+
+    executor = ParallelExecutor(num_threads=2, disable_progress_bar=True)
+    results = executor.iter_execute(wait_for_release, iter(range(5)))
+
+    # The first item is blocked until the others complete.
+    first = [next(results) for _ in range(4)]
+    assert sorted(first) == [(i, i) for i in range(1, 5)]
+    release.set()
+    assert list(results) == [(0, 0)]
+
+
+class RateLimitError(Exception):
+    pass
+
+
+def test_adaptive_concurrency_increases_additively_and_decreases_multiplicatively():
+    concurrency = AdaptiveConcurrency(max_limit=32, initial_limit=4)
+
+    # Slow start: one more per success, until the first congestion
+    for _ in range(4):
+        concurrency.record_success(1.0)
+    assert concurrency.limit == 8
+
+    epoch = concurrency.epoch
+    concurrency.record_congestion(epoch)
+    assert concurrency.limit == 4
+    # The errors of the items started before the decrease are ignored
+    concurrency.record_congestion(epoch)
+    assert concurrency.limit == 4
+
+    # Then one more per round of items
+    for _ in range(4):
+        concurrency.record_success(1.0)
+    assert concurrency.limit == 5
+
+    # No growth while the latency is unhealthy
+    for _ in range(20):
+        concurrency.record_success(10.0)
+    assert concurrency.limit == 5
+
+
+def test_adaptive_concurrency_bounds_the_items_run_at_once():
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def work(x):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        if x == 10:
+            # Retried by the LM, and reported to the executor
+            _notify_rate_limit(RateLimitError())
+        if x == 20:
+            raise RateLimitError()
+        return x
+
+    concurrency = AdaptiveConcurrency(max_limit=8, initial_limit=2)
+    executor = ParallelExecutor(
+        num_threads=8, max_errors=10, disable_progress_bar=True, adaptive_concurrency=concurrency
+    )
+    results = executor.execute(work, range(40))
+
+    assert results == [None if x == 20 else x for x in range(40)]
+    assert concurrency.epoch == 2
+    assert max_running <= 8
+    assert executor.concurrency_limit == concurrency.limit < 8
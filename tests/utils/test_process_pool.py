@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+import aletheia
+from aletheia.utils.process_pool import ProcessPool
+
+
+def get_pid_and_lm_model(value):
+    return os.getpid(), aletheia.settings.lm.model, value
+
+
+def raise_value_error(value):
+    raise ValueError(value)
+
+
+def test_process_pool_runs_in_worker_processes_with_settings():
+    with aletheia.context(lm=aletheia.LM("openai/gpt-4o-mini")):
+        with ProcessPool(get_pid_and_lm_model, num_processes=1) as pool:
+            pid, model, value = pool(1)
+
+    assert pid != os.getpid()
+    assert model == "openai/gpt-4o-mini"
+    assert value == 1
+
+
+def test_process_pool_raises_function_errors():
+    with ProcessPool(raise_value_error, num_processes=1) as pool:
+        with pytest.raises(ValueError, match="boom"):
+            pool("boom")
+
+
+def test_process_pool_falls_back_to_calling_thread():
+    pid = os.getpid()
+
+    with ProcessPool(lambda value: (os.getpid(), value), num_processes=1) as pool:
+        assert pool.fallback
+        assert pool(1) == (pid, 1)
+
+    # The function can be pickled, but not its argument
+    with ProcessPool(get_pid_and_lm_model, num_processes=1) as pool, aletheia.context(lm=aletheia.LM("openai/gpt-4o")):
+        assert pool(lambda: None)[0] == pid
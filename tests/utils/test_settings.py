@@ -0,0 +1,73 @@
+import asyncio
+import threading
+
+import pytest
+
+import aletheia
+from aletheia.utils.asyncify import asyncify
+from aletheia.utils.parallelizer import ParallelExecutor
+from aletheia.dsp.utils.settings import current_overrides, settings
+
+
+def test_snapshot_is_reused_until_the_settings_change():
+    snapshot = settings.snapshot()
+    assert settings.snapshot() is snapshot
+
+    with aletheia.context(trace=None):
+        assert settings.snapshot() is not snapshot
+        assert settings.snapshot().trace is None
+        assert settings.snapshot() is settings.snapshot()
+    assert settings.snapshot() is snapshot
+
+    with pytest.raises(AttributeError):
+        snapshot.trace = None
+
+
+def test_snapshot_reflects_configure():
+    previous = settings.async_max_workers
+    snapshot = settings.snapshot()
+    try:
+        aletheia.configure(async_max_workers=previous + 1)
+        assert snapshot.async_max_workers == previous
+        assert settings.snapshot().async_max_workers == previous + 1
+    finally:
+        aletheia.configure(async_max_workers=previous)
+
+
+def test_context_only_holds_the_overridden_settings():
+    with aletheia.context(trace=None):
+        with aletheia.context(experimental=True):
+            assert dict(current_overrides.get().values) == {"trace": None, "experimental": True}
+            assert settings.trace is None
+            assert settings.lm_cache is not None
+        assert dict(current_overrides.get().values) == {"trace": None}
+
+
+@pytest.mark.anyio
+async def test_context_is_isolated_between_asyncio_tasks():
+    both_entered = asyncio.Event()
+    entered = []
+
+    async def run(value):
+        with aletheia.context(backoff_time=value):
+            entered.append(value)
+            if len(entered) == 2:
+                both_entered.set()
+            await both_entered.wait()
+            return settings.backoff_time, settings.snapshot().backoff_time
+
+    assert await asyncio.gather(run(1), run(2)) == [(1, 1), (2, 2)]
+
+
+@pytest.mark.anyio
+async def test_context_propagates_to_worker_threads():
+    def read_settings(_=None):
+        return threading.get_ident(), settings.backoff_time
+
+    with aletheia.context(backoff_time=42):
+        thread_id, value = await asyncify(read_settings)()
+        assert thread_id != threading.get_ident()
+        assert value == 42
+
+        results = ParallelExecutor(num_threads=4, disable_progress_bar=True).execute(read_settings, list(range(8)))
+        assert [value for _, value in results] == [42] * 8
@@ -1,7 +1,10 @@
+from unittest import mock
+
 import pytest
+from litellm.types.utils import Delta, ModelResponseStream, StreamingChoices
 
 import aletheia
-from aletheia.utils.streaming import StatusMessage, StatusMessageProvider, streaming_response
+from aletheia.utils.streaming import StatusMessage, StatusMessageProvider, StreamResponse, streaming_response
 from ..test_utils.server import litellm_test_server
 
 
@@ -122,3 +125,25 @@ async def test_custom_status_streaming():
         assert status_messages[0].message == "Tool starting!"
         assert status_messages[1].message == "Tool finished!"
         assert status_messages[2].message == "Predict starting!"
+
+
+@pytest.mark.anyio
+async def test_streamify_yields_output_fields_as_they_are_generated():
+    pieces = ["[[ ## ans", "wer ## ]]\nThe capital", " is", " Paris.\n\n[[ ## completed ## ]]"]
+
+    async def acompletion(**kwargs):
+        async def stream():
+            for piece in pieces:
+                yield ModelResponseStream(model="gpt-4o-mini", choices=[StreamingChoices(delta=Delta(content=piece))])
+
+        return stream()
+
+    lm = aletheia.LM(model="openai/gpt-4o-mini", cache=False)
+    program = aletheia.streamify(aletheia.Predict("question -> answer"))
+    with aletheia.context(lm=lm), mock.patch("litellm.acompletion", side_effect=acompletion):
+        output_chunks = [chunk async for chunk in program(question="What is the capital of France?")]
+
+    streamed = [chunk for chunk in output_chunks if isinstance(chunk, StreamResponse)]
+    assert [chunk.chunk for chunk in streamed] == ["The capital", " is", " Paris."]
+    assert all(chunk.signature_field_name == "answer" for chunk in streamed)
+    assert output_chunks[-1].answer == "The capital is Paris."